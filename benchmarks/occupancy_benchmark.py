@@ -0,0 +1,330 @@
+"""Headless benchmark and replay harness for the Home Occupancy hot path.
+
+Drives ``HomeOccupancyBinarySensor`` with synthetic presence event streams
+against small local stand-ins for ``hass.states``, the event bus and
+``async_write_ha_state``, and reports per-event latency percentiles, state
+writes per event and allocations (tracemalloc).
+
+Requires Home Assistant to be installed (the entity subclasses its entity
+classes), but does not start an instance. Run from the repository root::
+
+    python benchmarks/occupancy_benchmark.py --trackers 10 100 1000 10000 --events 1000000
+    python benchmarks/occupancy_benchmark.py --trackers 1000 --burstiness 0.5 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Iterator
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from homeassistant.core import CoreState, Event, State  # noqa: E402
+from homeassistant.const import EVENT_STATE_CHANGED  # noqa: E402
+
+from custom_components.occupancy.binary_sensor import HomeOccupancyBinarySensor  # noqa: E402
+from custom_components.occupancy.core import OccupancyCore  # noqa: E402
+from custom_components.occupancy.const import (  # noqa: E402
+    CONF_FUSION_POLICY,
+    CONF_NAME,
+    CONF_RECONCILE_INTERVAL,
+    CONF_TRACKERS,
+    FUSION_POLICIES,
+)
+
+PERCENTILES = (50, 90, 99, 99.9)
+ZONES = ("Work", "School", "Gym")
+
+
+class FakeStates:
+    """Dict backed stand-in for ``hass.states``."""
+
+    def __init__(self) -> None:
+        self._states: dict[str, State] = {}
+
+    def get(self, entity_id: str) -> State | None:
+        return self._states.get(entity_id)
+
+    def async_all(self, domain_filter: str | None = None) -> list[State]:
+        return [
+            state for state in self._states.values()
+            if domain_filter is None or state.domain == domain_filter
+        ]
+
+    def async_set(self, state: State) -> None:
+        self._states[state.entity_id] = state
+
+
+class FakeBus:
+    """Event bus stand-in that only counts fired events."""
+
+    def __init__(self) -> None:
+        self.fired = 0
+
+    def async_fire(self, event_type: str, event_data: Any = None, *args: Any, **kwargs: Any) -> None:
+        self.fired += 1
+
+    def async_listen(self, *args: Any, **kwargs: Any):
+        return lambda: None
+
+    async_listen_once = async_listen
+
+
+class FakeHass:
+    """The parts of ``HomeAssistant`` the occupancy entity uses on the hot path."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.states = FakeStates()
+        self.bus = FakeBus()
+        self.data: dict[str, Any] = {}
+        self.state = CoreState.running
+
+
+def build_config(trackers: int, per_person: int, rng: random.Random) -> dict[str, Any]:
+    """Return config entry data with ``trackers`` trackers spread over people."""
+    config: dict[str, Any] = {CONF_RECONCILE_INTERVAL: 0}
+    domains = ("person", "device_tracker", "device_tracker", "binary_sensor")
+    number = 0
+    for start in range(0, trackers, per_person):
+        number += 1
+        config[f"sensor_{number}"] = {
+            CONF_NAME: f"Person {number}",
+            CONF_TRACKERS: [
+                f"{domains[(start + i) % len(domains)]}.bench_{start + i}"
+                for i in range(min(per_person, trackers - start))
+            ],
+            CONF_FUSION_POLICY: rng.choice(FUSION_POLICIES),
+        }
+    config["number_of_sensors"] = number
+    return config
+
+
+def tracker_state(entity_id: str, home: bool, rng: random.Random) -> str:
+    """Return a realistic raw state for a tracker."""
+    if rng.random() < 0.01:
+        return "unavailable"
+    if entity_id.startswith("binary_sensor."):
+        return "on" if home else "off"
+    if home:
+        return "home"
+    return rng.choice(ZONES) if rng.random() < 0.3 else "not_home"
+
+
+def event_stream(
+    entity_ids: list[str],
+    hass: FakeHass,
+    events: int,
+    burstiness: float,
+    burst_size: int,
+    rng: random.Random,
+) -> Iterator[list[Event]]:
+    """Yield batches of state_changed events, each fired in one pass of the event loop.
+
+    A ``burstiness`` fraction of the events comes in bursts of ``burst_size``
+    trackers flipping the same way, like a household arriving together or a
+    router reconnecting.
+    """
+    home = dict.fromkeys(entity_ids, False)
+    produced = 0
+    while produced < events:
+        if rng.random() < burstiness:
+            direction = rng.random() < 0.5
+            batch = rng.sample(entity_ids, min(burst_size, len(entity_ids)))
+        else:
+            batch = [rng.choice(entity_ids)]
+            direction = not home[batch[0]]
+        fired = []
+        for entity_id in batch[:events - produced]:
+            home[entity_id] = direction
+            old_state = hass.states.get(entity_id)
+            new_state = State(entity_id, tracker_state(entity_id, direction, rng))
+            hass.states.async_set(new_state)
+            produced += 1
+            fired.append(Event(
+                EVENT_STATE_CHANGED,
+                {"entity_id": entity_id, "old_state": old_state, "new_state": new_state},
+            ))
+        yield fired
+
+
+def make_sensor(hass: FakeHass, config: dict[str, Any]) -> tuple[HomeOccupancyBinarySensor, list[int]]:
+    """Create a sensor wired to the stand-ins. Return it and its write counter."""
+    config_entry = SimpleNamespace(entry_id="benchmark", title="Home Occupancy")
+    sensor = HomeOccupancyBinarySensor(hass, config_entry, config)
+    writes = [0]
+
+    def async_write_ha_state() -> None:
+        # Build what the state machine would store.
+        sensor.is_on  # noqa: B018
+        sensor.extra_state_attributes  # noqa: B018
+        writes[0] += 1
+
+    sensor.async_write_ha_state = async_write_ha_state
+    sensor.rebuild_index()
+    sensor._async_apply_zones()
+    return sensor, writes
+
+
+def percentiles(samples: list[int]) -> dict[str, float]:
+    """Return latency percentiles in microseconds."""
+    samples.sort()
+    last = len(samples) - 1
+    return {f"p{p:g}": samples[min(last, int(last * p / 100))] / 1000 for p in PERCENTILES}
+
+
+async def run_case(args: argparse.Namespace, trackers: int) -> dict[str, Any]:
+    """Benchmark one tracker count."""
+    rng = random.Random(args.seed)
+    hass = FakeHass(asyncio.get_running_loop())
+    config = build_config(trackers, args.per_person, rng)
+    sensor, writes = make_sensor(hass, config)
+    for entity_id in sensor.presence_sensors:
+        hass.states.async_set(State(entity_id, tracker_state(entity_id, False, rng)))
+    await sensor.async_update()
+    writes[0] = 0
+
+    # async_track_home: latency of every event, plus the drain of its batch.
+    stream = event_stream(
+        sensor.presence_sensors, hass, args.events, args.burstiness, args.burst_size, rng
+    )
+    latencies: list[int] = []
+    handle = sensor.async_track_home
+    clock = time.perf_counter_ns
+    drains = sensor.stats.drains
+    gc.disable()
+    try:
+        for batch in stream:
+            for event in batch:
+                start = clock()
+                handle(event)
+                latencies.append(clock() - start)
+            # Let the queued batch be applied.
+            await asyncio.sleep(0)
+    finally:
+        gc.enable()
+    track_home = {
+        "events": len(latencies),
+        "mean_us": sum(latencies) / len(latencies) / 1000,
+        **percentiles(latencies),
+        "drain_mean_us": sensor.stats.drain_latency.total_ns / sensor.stats.drain_latency.count / 1000,
+        "drains_per_event": (sensor.stats.drains - drains) / len(latencies),
+        "writes_per_event": writes[0] / len(latencies),
+    }
+
+    # OccupancyCore alone: feed and commit every event, without the entity.
+    core = OccupancyCore.from_config(config)
+    core.resync((entity_id, hass.states.get(entity_id).state) for entity_id in sensor.presence_sensors)
+    stream = event_stream(
+        sensor.presence_sensors, hass, args.events, args.burstiness, args.burst_size, rng
+    )
+    core_latencies: list[int] = []
+    gc.disable()
+    try:
+        for batch in stream:
+            for event in batch:
+                start = clock()
+                if (person := core.feed(event.data["entity_id"], event.data["new_state"].state)) is not None:
+                    core.commit(person)
+                core_latencies.append(clock() - start)
+    finally:
+        gc.enable()
+    core_feed = {"events": len(core_latencies), **percentiles(core_latencies)}
+
+    # async_update: full resync against the state machine.
+    update_latencies = []
+    for _ in range(args.updates):
+        start = clock()
+        await sensor.async_update()
+        update_latencies.append(clock() - start)
+    full_update = {"runs": args.updates, **percentiles(update_latencies)}
+
+    # Allocations on the hot path, measured separately as tracemalloc is slow.
+    stream = event_stream(
+        sensor.presence_sensors, hass, args.alloc_events, args.burstiness, args.burst_size, rng
+    )
+    batches = list(stream)
+    events = [event for batch in batches for event in batch]
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    for batch in batches:
+        for event in batch:
+            handle(event)
+        await asyncio.sleep(0)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    allocations = {
+        "events": len(events),
+        "net_bytes_per_event": sum(stat.size_diff for stat in stats) / max(len(events), 1),
+        "net_blocks_per_event": sum(stat.count_diff for stat in stats) / max(len(events), 1),
+        "peak_bytes": peak,
+    }
+
+    return {
+        "trackers": trackers,
+        "people": config["number_of_sensors"],
+        "async_track_home": track_home,
+        "core_feed": core_feed,
+        "async_update": full_update,
+        "allocations": allocations,
+    }
+
+
+def print_report(results: list[dict[str, Any]]) -> None:
+    """Print a human readable table."""
+    header = f"{'trackers':>8} {'events':>9} {'mean':>8} " + " ".join(
+        f"{'p' + format(p, 'g'):>8}" for p in PERCENTILES
+    ) + f" {'drain':>8} {'core p50':>8} {'drains/ev':>9} {'writes/ev':>9} {'update p50':>10} {'B/ev':>8} {'blk/ev':>7}"
+    print("async_track_home latency, mean queue drain time and OccupancyCore feed latency in microseconds")
+    print(header)
+    for result in results:
+        track_home = result["async_track_home"]
+        print(
+            f"{result['trackers']:>8} {track_home['events']:>9} {track_home['mean_us']:>8.2f} "
+            + " ".join(f"{track_home[f'p{p:g}']:>8.2f}" for p in PERCENTILES)
+            + f" {track_home['drain_mean_us']:>8.2f} {result['core_feed']['p50']:>8.2f}"
+            + f" {track_home['drains_per_event']:>9.3f}"
+            + f" {track_home['writes_per_event']:>9.3f}"
+            + f" {result['async_update']['p50']:>10.1f}"
+            + f" {result['allocations']['net_bytes_per_event']:>8.1f}"
+            + f" {result['allocations']['net_blocks_per_event']:>7.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trackers", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--per-person", type=int, default=2, help="trackers per person")
+    parser.add_argument("--events", type=int, default=100_000, help="transitions per case")
+    parser.add_argument("--burstiness", type=float, default=0.1,
+                        help="fraction of events that arrive in bursts")
+    parser.add_argument("--burst-size", type=int, default=8)
+    parser.add_argument("--updates", type=int, default=20, help="async_update runs per case")
+    parser.add_argument("--alloc-events", type=int, default=10_000,
+                        help="events measured with tracemalloc")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = [asyncio.run(run_case(args, trackers)) for trackers in args.trackers]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
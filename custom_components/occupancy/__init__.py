@@ -2,14 +2,32 @@
 Based on https://github.com/scaarup/aula/blob/main/custom_components/aula/__init__.py
 """
 
-from homeassistant.loader import async_get_integration
-import asyncio
-from homeassistant import config_entries, core
-from homeassistant.const import EVENT_HOMEASSISTANT_START
-from .const import DOMAIN, STARTUP, PRESENCE_SENSOR
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .const import (
+    DOMAIN,
+    STARTUP,
+    PRESENCE_SENSOR,
+    CONF_HISTORY_SIZE,
+    DATA_FORECAST,
+    DATA_HISTORY,
+    DATA_STATS,
+    DEFAULT_HISTORY_SIZE,
+)
+from .forecast import TransitionForecast
+from .history import TransitionHistory
+from .index import migrate_people_v1, migrate_people_v2
+from .stats import OccupancyStats
 import logging
 
-PLATFORMS: list[str] = ["binary_sensor"]
+# Home Assistant is only imported when the integration is set up, so that the
+# engine, index and replay modules can be used without it (see replay.py).
+if TYPE_CHECKING:
+    from homeassistant import config_entries, core
+
+PLATFORMS: list[str] = ["binary_sensor", "sensor"]
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,8 +37,10 @@ async def async_setup_entry(
         entry: config_entries.ConfigEntry
 ) -> bool:
     """Set up platform from a ConfigEntry."""
+    from homeassistant.loader import async_get_integration
+
     integration = await async_get_integration(hass, DOMAIN)
-    _LOGGER.info(STARTUP, integration.version)
+    _LOGGER.info("%sVersion %s", STARTUP, integration.version)
     hass.data.setdefault(DOMAIN, {})
     hass_data = dict(entry.data)
 
@@ -29,6 +49,15 @@ async def async_setup_entry(
 
     # Store a reference to the unsubscribe function to clean up if an entry is unloaded.
     hass_data["unsub_options_update_listener"] = unsub_options_update_listener
+    # Runtime counters, shared by the binary_sensor, diagnostic sensors and diagnostics.
+    hass_data[DATA_STATS] = OccupancyStats()
+    # Arrive/leave history, restored by the binary_sensor and read by the history sensors.
+    hass_data[DATA_HISTORY] = TransitionHistory(
+        entry.options.get(CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE)
+    )
+    # Weekly arrive/leave histograms, updated and restored by the binary_sensor
+    # and read by the forecast sensors.
+    hass_data[DATA_FORECAST] = TransitionForecast()
     hass.data[DOMAIN][entry.entry_id] = hass_data
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
@@ -60,6 +89,35 @@ async def async_setup_entry(
     # return True
 
 
+async def async_migrate_entry(
+        hass: core.HomeAssistant,
+        config_entry: config_entries.ConfigEntry
+) -> bool:
+    """Migrate old config entries."""
+    _LOGGER.debug("Migrating from version %s", config_entry.version)
+
+    if config_entry.version == 1:
+        # One sensor_N per tracker -> one sensor_N per person with a list of trackers.
+        hass.config_entries.async_update_entry(
+            config_entry,
+            data=migrate_people_v1(config_entry.data),
+            options=migrate_people_v1(config_entry.options),
+            version=2,
+        )
+
+    if config_entry.version == 2:
+        # Guests by name -> explicit guest flag.
+        hass.config_entries.async_update_entry(
+            config_entry,
+            data=migrate_people_v2(config_entry.data),
+            options=migrate_people_v2(config_entry.options),
+            version=3,
+        )
+
+    _LOGGER.debug("Migration to version %s successful", config_entry.version)
+    return True
+
+
 async def options_update_listener(
         hass: core.HomeAssistant,
         config_entry: config_entries.ConfigEntry
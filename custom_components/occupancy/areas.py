@@ -0,0 +1,175 @@
+"""Area index shared by all Home Occupancy area sensors."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import (
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+)
+
+from .const import AREA_DEVICE_CLASSES, DATA_AREAS, DOMAIN, KIND_BINARY_SENSOR
+
+_LOGGER = logging.getLogger(__name__)
+
+AreaListener = Callable[[set[str]], None]
+
+
+@callback
+def async_get_area_index(hass: HomeAssistant) -> AreaIndex:
+    """Return the area index, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (index := domain_data.get(DATA_AREAS)) is None:
+        index = domain_data[DATA_AREAS] = AreaIndex(hass)
+    return index
+
+
+class AreaIndex:
+    """Keep the motion, presence and door sensors of every area.
+
+    The index is built once from the entity and device registries (an
+    entity is in its own area, or else in the area of its device) and then
+    updated from registry events, touching only the entities concerned.
+    Listeners are told which areas changed.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        # area_id -> ordered set of entity_ids, and the reverse.
+        self._entities: dict[str, dict[str, None]] = {}
+        self._area_of: dict[str, str] = {}
+        # entity_id -> AREA_KIND_*
+        self.kinds: dict[str, str] = {}
+        self._listeners: list[AreaListener] = []
+        self._unsubs: list[CALLBACK_TYPE] = []
+
+    @property
+    def area_ids(self) -> list[str]:
+        """Return the areas with at least one sensor."""
+        return list(self._entities)
+
+    def entity_ids(self, area_id: str) -> tuple[str, ...]:
+        """Return the sensors of an area."""
+        return tuple(self._entities.get(area_id, ()))
+
+    def area_name(self, area_id: str) -> str:
+        """Return the name of an area."""
+        area = ar.async_get(self.hass).async_get_area(area_id)
+        return area.name if area is not None else area_id
+
+    @callback
+    def async_add_listener(self, update_callback: AreaListener) -> CALLBACK_TYPE:
+        """Listen for areas gaining or losing sensors. Return a function to stop listening.
+
+        The index only follows the registries while it has listeners.
+        """
+        if not self._listeners:
+            self._async_start()
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+            if not self._listeners:
+                self._async_stop()
+
+        return remove_listener
+
+    @callback
+    def _async_start(self) -> None:
+        self._entities.clear()
+        self._area_of.clear()
+        self.kinds.clear()
+        entities = er.async_get(self.hass)
+        devices = dr.async_get(self.hass)
+        for entry in entities.entities.values():
+            self._async_index(entry, devices)
+        bus = self.hass.bus
+        self._unsubs = [
+            bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, self._async_entity_updated),
+            bus.async_listen(dr.EVENT_DEVICE_REGISTRY_UPDATED, self._async_device_updated),
+        ]
+
+    @callback
+    def _async_stop(self) -> None:
+        while self._unsubs:
+            self._unsubs.pop()()
+
+    @callback
+    def _async_index(self, entry: er.RegistryEntry, devices: dr.DeviceRegistry) -> str | None:
+        """Add an entity to the index if it is an area sensor. Return its area."""
+        if entry.domain != KIND_BINARY_SENSOR or entry.disabled_by is not None:
+            return None
+        # The area sensors of this integration are occupancy sensors too.
+        if entry.platform == DOMAIN:
+            return None
+        kind = AREA_DEVICE_CLASSES.get(entry.device_class or entry.original_device_class)
+        if kind is None:
+            return None
+        area_id = entry.area_id
+        if area_id is None and entry.device_id is not None:
+            device = devices.async_get(entry.device_id)
+            area_id = device.area_id if device is not None else None
+        if area_id is None:
+            return None
+        self._entities.setdefault(area_id, {})[entry.entity_id] = None
+        self._area_of[entry.entity_id] = area_id
+        self.kinds[entry.entity_id] = kind
+        return area_id
+
+    @callback
+    def _async_remove(self, entity_id: str) -> str | None:
+        """Remove an entity from the index. Return the area it was in."""
+        self.kinds.pop(entity_id, None)
+        if (area_id := self._area_of.pop(entity_id, None)) is None:
+            return None
+        entity_ids = self._entities[area_id]
+        del entity_ids[entity_id]
+        if not entity_ids:
+            del self._entities[area_id]
+        return area_id
+
+    @callback
+    def _async_reindex(self, entity_ids: list[str]) -> None:
+        """Re-read some entities from the registries and tell listeners what changed."""
+        entities = er.async_get(self.hass)
+        devices = dr.async_get(self.hass)
+        changed: set[str] = set()
+        for entity_id in entity_ids:
+            old_area = self._async_remove(entity_id)
+            new_area = None
+            if (entry := entities.async_get(entity_id)) is not None:
+                new_area = self._async_index(entry, devices)
+            if old_area != new_area:
+                changed.update(area for area in (old_area, new_area) if area is not None)
+        if not changed:
+            return
+        _LOGGER.debug("Sensors of areas %s changed", changed)
+        for update_callback in list(self._listeners):
+            update_callback(changed)
+
+    @callback
+    def _async_entity_updated(self, event: Event) -> None:
+        """Handle an entity being added, removed, renamed or moved."""
+        entity_ids = [event.data["entity_id"]]
+        if old_entity_id := event.data.get("old_entity_id"):
+            entity_ids.append(old_entity_id)
+        self._async_reindex(entity_ids)
+
+    @callback
+    def _async_device_updated(self, event: Event) -> None:
+        """Handle a device being moved, which moves entities without an area of their own."""
+        if event.data["action"] == "update" and "area_id" not in event.data.get("changes", {}):
+            return
+        entities = er.async_get(self.hass)
+        self._async_reindex(
+            [
+                entry.entity_id for entry in er.async_entries_for_device(
+                    entities, event.data["device_id"], include_disabled_entities=True
+                )
+            ]
+        )
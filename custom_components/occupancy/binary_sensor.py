@@ -1,48 +1,97 @@
 from __future__ import annotations
 from typing import Any
+from types import MappingProxyType
 import asyncio
 from datetime import timedelta
-from collections.abc import Callable
+from collections import deque
+from collections.abc import Callable, Mapping
+from functools import partial
+import time
+import voluptuous as vol
+from homeassistant.helpers import entity_platform, entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity import Entity
-from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.restore_state import ExtraStoredData, RestoreEntity
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.components.binary_sensor import BinarySensorDeviceClass
+from homeassistant.components.binary_sensor import DOMAIN as BINARY_SENSOR_DOMAIN
 from homeassistant import config_entries, core
-from homeassistant.core import CoreState, callback
-from homeassistant.const import EVENT_HOMEASSISTANT_START
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    Event,
+    ServiceResponse,
+    State,
+    SupportsResponse,
+    callback,
+)
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.typing import (
     ConfigType,
     DiscoveryInfoType
 )
 from homeassistant.const import (
+    EVENT_STATE_REPORTED,
     STATE_ON,
     STATE_OFF,
-    STATE_HOME,
-    STATE_NOT_HOME,
-    STATE_UNKNOWN
-)
-from homeassistant.helpers.event import (
-    async_track_state_change
 )
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.start import async_at_start
+from homeassistant.util import dt as dt_util
 import logging
+from .areas import AreaIndex, async_get_area_index
+from .core import OccupancyCore
+from .dispatcher import async_get_dispatcher
+from .forecast import TransitionForecast
+from .history import TransitionHistory
+from .scheduler import Timer, async_get_scheduler
+from .stats import OccupancyStats
+from .zones import async_get_zone_catalogue
 from .const import (
     DOMAIN,
+    AREA_KIND_DOOR,
+    CONF_AREA_CLEAR_TIMEOUT,
+    CONF_AREA_SENSORS,
+    CONF_AREA_TIMEOUTS,
+    DEFAULT_AREA_CLEAR_TIMEOUT,
+    DATA_ENTITY,
+    DATA_FORECAST,
+    DATA_HISTORY,
+    DATA_STATS,
     OCCUPANCY_SENSOR,
-    PRESENCE_SENSOR,
-    STATE_AWAY,
-    CONF_NAME,
+    CONF_DEBOUNCE,
+    CONF_FIRE_EVENTS,
+    CONF_FORECAST_BOOTSTRAP,
+    CONF_RECONCILE_INTERVAL,
+    DEFAULT_DEBOUNCE,
+    DEFAULT_HISTORY_SIZE,
+    DEFAULT_RECONCILE_INTERVAL,
+    MIN_RECONCILE_INTERVAL,
+    FORECAST_BOOTSTRAP_WEEKS,
+    ATTR_ARRIVED,
+    ATTR_CONFIDENCE,
     ATTR_FRIENDLY_NAME,
+    ATTR_LEFT,
+    ATTR_LIMIT,
+    ATTR_OCCUPANCY_CHANGED,
+    ATTR_OCCUPIED,
     ATTR_GUESTS,
     ATTR_KNOWN_PEOPLE,
     ATTR_LAST_TO_ARRIVE,
     ATTR_LAST_TO_LEAVE,
+    ATTR_RECONCILIATIONS,
+    ATTR_STALE_TRACKERS,
     ATTR_WHO_IS_HOME,
+    EVENT_OCCUPANCY_CHANGED,
+    SERVICE_GET_HISTORY,
+    SIGNAL_OCCUPANCY_WRITTEN,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# Unique ID of the occupancy sensor before it was derived from the config entry.
+LEGACY_UNIQUE_ID = f"combined_{OCCUPANCY_SENSOR}"
+
 
 async def async_setup_entry(
         hass: core.HomeAssistant,
@@ -55,9 +104,79 @@ async def async_setup_entry(
     if config_entry.options:
         config.update(config_entry.options)
 
+    _async_migrate_unique_id(hass, config_entry)
+
     # Initialize the binary_sensor with the configuration
-    binary_sensors = [HomeOccupancyBinarySensor(hass, config)]
-    async_add_entities(binary_sensors, update_before_add=True)
+    binary_sensors = [HomeOccupancyBinarySensor(hass, config_entry, config)]
+    config[DATA_ENTITY] = binary_sensors[0]
+    # The entity restores its model and syncs once Home Assistant has started.
+    async_add_entities(binary_sensors)
+
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_GET_HISTORY,
+        {vol.Optional(ATTR_LIMIT): cv.positive_int},
+        "async_get_history",
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    if config.get(CONF_AREA_SENSORS, False):
+        _async_setup_area_sensors(hass, config_entry, config, async_add_entities)
+
+
+@callback
+def _async_migrate_unique_id(hass: core.HomeAssistant, config_entry: config_entries.ConfigEntry) -> None:
+    """Move the registry entry of the sensor from the legacy unique ID to one of this entry.
+
+    Every entry used to share the legacy unique ID, so only the first entry
+    set up takes over the existing entity, keeping its entity_id.
+    """
+    registry = er.async_get(hass)
+    entity_id = registry.async_get_entity_id(BINARY_SENSOR_DOMAIN, DOMAIN, LEGACY_UNIQUE_ID)
+    if entity_id is None:
+        return
+    unique_id = f"{config_entry.entry_id}_{OCCUPANCY_SENSOR}"
+    if registry.async_get_entity_id(BINARY_SENSOR_DOMAIN, DOMAIN, unique_id) is not None:
+        return
+    _LOGGER.debug("Migrating the unique ID of %s to %s", entity_id, unique_id)
+    registry.async_update_entity(entity_id, new_unique_id=unique_id, config_entry_id=config_entry.entry_id)
+
+
+@callback
+def _async_setup_area_sensors(
+        hass: core.HomeAssistant,
+        config_entry: config_entries.ConfigEntry,
+        config: dict[str, Any],
+        async_add_entities,
+) -> None:
+    """Add an occupancy sensor for every area with sensors, including areas that get them later."""
+    areas = async_get_area_index(hass)
+    area_sensors: dict[str, AreaOccupancyBinarySensor] = {}
+    default_timeout = config.get(CONF_AREA_CLEAR_TIMEOUT, DEFAULT_AREA_CLEAR_TIMEOUT)
+    timeouts: Mapping[str, float] = config.get(CONF_AREA_TIMEOUTS, {})
+
+    @callback
+    def _async_areas_updated(changed: set[str]) -> None:
+        new_sensors = []
+        for area_id in changed:
+            if (sensor := area_sensors.get(area_id)) is not None:
+                sensor.async_area_updated()
+            elif areas.entity_ids(area_id):
+                sensor = area_sensors[area_id] = AreaOccupancyBinarySensor(
+                    config_entry, areas, area_id, timeouts.get(area_id, default_timeout)
+                )
+                new_sensors.append(sensor)
+        if new_sensors:
+            async_add_entities(new_sensors)
+
+    config_entry.async_on_unload(areas.async_add_listener(_async_areas_updated))
+    _async_areas_updated(set(areas.area_ids))
+
+
+def local_day() -> tuple[float, int, float]:
+    """Return the current timestamp, local date ordinal and timestamp of local midnight."""
+    now = dt_util.now()
+    return now.timestamp(), now.date().toordinal(), dt_util.start_of_local_day(now).timestamp()
 
 
 async def async_setup_platform(
@@ -71,93 +190,246 @@ async def async_setup_platform(
     binary_sensors = [config[OCCUPANCY_SENSOR]]
     async_add_entities(binary_sensors, update_before_add=True)
 
+class OccupancyStoredData(ExtraStoredData):
+    """Occupancy model, transition history and forecast stored with the last state of the entity."""
+
+    # Bump when the layout of the stored model changes; older models are ignored.
+    VERSION = 1
+
+    def __init__(
+            self,
+            model: dict[str, Any],
+            history: TransitionHistory,
+            forecast: TransitionForecast,
+    ) -> None:
+        self.model = model
+        self.history = history
+        self.forecast = forecast
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a dict representation of the stored data."""
+        return {
+            "version": self.VERSION,
+            **self.model,
+            "history": self.history.as_dict(),
+            "forecast": self.forecast.as_dict(),
+        }
+
+
 class HomeOccupancyBinarySensor(BinarySensorEntity, RestoreEntity):
     """Occupancy Sensor."""
 
-    def __init__(self, hass: core.HomeAssistant, config):
+    def __init__(
+            self,
+            hass: core.HomeAssistant,
+            config_entry: config_entries.ConfigEntry,
+            config,
+    ):
         _LOGGER.debug("Initializing HomeOccupancyBinarySensor class for Home Occupancy.")
         super().__init__()
-        self.attrs: dict[str, Any] = {ATTR_FRIENDLY_NAME: "Home occupancy"}
-        self._name = OCCUPANCY_SENSOR
-        self.entity_id = f"binary_sensor.{DOMAIN}_{self._name}"
-        self._attr_unique_id = f"{DOMAIN}_{self._name}_unique_id"
+        # Attribute payload, rebuilt only when the model version changes.
+        self._attributes: Mapping[str, Any] = MappingProxyType({})
+        self._attributes_version = -1
+        self._written_version = -1
+        # One sensor per config entry, named and identified after it.
+        self._name = config_entry.title
+        self._attr_unique_id = f"{config_entry.entry_id}_{OCCUPANCY_SENSOR}"
+        self._signal_written = SIGNAL_OCCUPANCY_WRITTEN.format(config_entry.entry_id)
         self._attr_device_class = BinarySensorDeviceClass.OCCUPANCY
         self._state = None
         self._available = True
-        self._attr_unique_id = f"combined_{self._name}"
         self.config = config
-        self.home_states: list[str] = [STATE_ON, STATE_HOME]
-        self.away_states: list[str] = [STATE_OFF, STATE_NOT_HOME, STATE_AWAY]
-        self.home_and_unknown_states: list[str] = self.home_states + [STATE_UNKNOWN]
-        self.away_and_unknown_states: list[str] = self.away_states + [STATE_UNKNOWN]
         self.hass = hass
+        self.zones = async_get_zone_catalogue(hass)
+        # Fire a delta event with every state write, and the delta since the last one.
+        self.fire_events: bool = config.get(CONF_FIRE_EVENTS, False)
+        # The occupancy model; this entity feeds it from Home Assistant.
+        self.core = OccupancyCore.from_config({}, self.fire_events)
         self.presence_sensors: list[str] = []
-        self.last_to_leave = None
-        self.last_to_arrive = None
-
-        @callback
-        def _async_on_ha_start(_):
-            self.hass.async_create_task(self.update_away_states())
-
-        self.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_START, _async_on_ha_start)
-
-    async def update_away_states(self):
-        """Update away states to include all zone names, excluding home states."""
-        zone_entities = [state.entity_id for state in self.hass.states.async_all()
-                         if state.entity_id.startswith("zone.") and state.entity_id != "zone.home"]
-        zone_names = [self.hass.states.get(entity_id).state for entity_id in zone_entities]
-
-        # Filter out any states that are considered home states
-        zone_names = [name for name in zone_names if name not in self.home_states]
-
-        self.away_states.extend(zone_names)
-        self.away_states = list(set(self.away_states))  # Remove duplicates, if any
+        self.scheduler = async_get_scheduler(hass)
+        # Pending arrive/leave of each person, held back by their grace period.
+        self._pending: list[Timer | None] = []
+        # Freshness deadline of each tracker with a stale timeout, unless stale.
+        self._deadlines: dict[str, Timer] = {}
+        # Seconds during which presence changes are merged into one state write.
+        self.debounce: float = config.get(CONF_DEBOUNCE, DEFAULT_DEBOUNCE)
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        # Last state object handled for each tracker, used to detect missed events.
+        self._seen: dict[str, State | None] = {}
+        # Upper bound of the drift check back-off. 0 means push only.
+        self.reconcile_max_interval = timedelta(
+            minutes=config.get(CONF_RECONCILE_INTERVAL, DEFAULT_RECONCILE_INTERVAL)
+        )
+        self._reconcile_interval = MIN_RECONCILE_INTERVAL
+        self._unsub_reconcile: CALLBACK_TYPE | None = None
+        self.stats: OccupancyStats = config.get(DATA_STATS) or OccupancyStats()
+        # Shared with the sensors, so an empty (falsy) one is still the one to use.
+        history = config.get(DATA_HISTORY)
+        self.history = TransitionHistory(DEFAULT_HISTORY_SIZE) if history is None else history
+        forecast = config.get(DATA_FORECAST)
+        self.forecast = TransitionForecast() if forecast is None else forecast
+        # Seed the forecast from the recorder once, in the background.
+        self.forecast_bootstrap: bool = config.get(CONF_FORECAST_BOOTSTRAP, False)
+        self._written_guests = 0
+        # Changes to the model waiting to be applied, oldest first. Events,
+        # grace periods, drift checks and resyncs all go through this queue
+        # and only _async_drain applies it.
+        self._queue: deque[Callable[[], None]] = deque()
+        self._drain_handle: asyncio.Handle | None = None
+
+    @callback
+    def _async_zones_updated(self) -> None:
+        """Queue including the names of all zones in the away states."""
+        self._async_enqueue(self._async_apply_zones)
+
+    @callback
+    def _async_apply_zones(self) -> None:
+        """Include the names of all zones in the away states, reclassifying the trackers."""
+        # Until the zones are loaded, the restored zone names are kept.
+        for person in self.core.set_zones(self.zones.away_states or self.core.zones):
+            self._async_transition(person)
 
     async def async_added_to_hass(self):
-        """Run when entity is added to hass."""
+        """Run when entity is added to hass.
+
+        The model stored at the last shutdown is restored right away, so the
+        entity starts with the state it had. Once Home Assistant has started,
+        only trackers whose state differs from the stored one are applied.
+        """
+        self.rebuild_index()
+        await self._async_restore()
+        # Transitions from now on are counted as they happen; those before
+        # can only come from the recorder.
+        if self.forecast.started is None:
+            timestamp, day, _day_start = local_day()
+            self.forecast.start(timestamp, day)
+
+        self.async_on_remove(self.zones.async_add_listener(self._async_zones_updated))
+        self._async_zones_updated()
+
+        self.async_on_remove(
+            async_get_dispatcher(self.hass).async_subscribe(
+                self.presence_sensors,
+                self.async_track_home
+            )
+        )
+        if self.core.stale_timeouts:
+            self.async_on_remove(
+                self.hass.bus.async_listen(
+                    EVENT_STATE_REPORTED,
+                    self.async_track_report,
+                    event_filter=self._async_is_stale_report,
+                    run_immediately=True,
+                )
+            )
+
+        self.async_on_remove(self._async_cancel_drain)
+        self.async_on_remove(self._async_cancel_flush)
+        self.async_on_remove(self._async_cancel_reconcile)
+        self.async_on_remove(self._async_cancel_pending)
+        self.async_on_remove(self._async_cancel_deadlines)
+        self.async_on_remove(async_at_start(self.hass, self._async_at_start))
+
+        # The restored state is written by Home Assistant when the entity is added.
+        self._written_version = self.core.version
+        _LOGGER.debug(f"Presence sensors list: {self.presence_sensors}")
 
-        # Restore the last state if available
+    async def _async_at_start(self, _hass: HomeAssistant) -> None:
+        await self.async_update()
+        if self.forecast_bootstrap and not self.forecast.bootstrapped:
+            self.async_on_remove(
+                self.hass.async_create_background_task(
+                    self._async_bootstrap_forecast(), f"{self.entity_id} forecast bootstrap"
+                ).cancel
+            )
+
+    async def _async_bootstrap_forecast(self) -> None:
+        """Count the arrivals and departures in the recorder history of this entity.
+
+        They are read from the changes of who_is_home, over the whole weeks
+        before the day the forecast started counting transitions as they happen.
+        Every day of those weeks counts, from the first one the recorder
+        still has, whether or not anyone arrived or left on it.
+        """
+        if "recorder" not in self.hass.config.components:
+            _LOGGER.debug("The recorder is not loaded, not seeding the occupancy forecast")
+            return
+        from homeassistant.components.recorder import get_instance, history
+
+        # Whole days only: the day the forecast started on is its own.
+        started_day = dt_util.as_local(dt_util.utc_from_timestamp(self.forecast.started)).date()
+        first_day = started_day - timedelta(weeks=FORECAST_BOOTSTRAP_WEEKS)
+        last_day = started_day - timedelta(days=1)
+        states = await get_instance(self.hass).async_add_executor_job(
+            partial(
+                history.get_significant_states,
+                self.hass,
+                dt_util.start_of_local_day(first_day),
+                dt_util.start_of_local_day(started_day),
+                [self.entity_id],
+                include_start_time_state=False,
+                significant_changes_only=False,
+            )
+        )
+        # Counted apart, as the weekdays of the two periods must not be mixed up.
+        seed = TransitionForecast()
+        names = set(self.core.engine.names)
+        who_was_home: set[str] | None = None
+        for state in (entity_states := states.get(self.entity_id, ())):
+            who_is_home = names.intersection(state.attributes.get(ATTR_WHO_IS_HOME) or ())
+            when = dt_util.as_local(state.last_updated)
+            day = when.date().toordinal()
+            if who_was_home is None:
+                seed.count_days(day, last_day.toordinal())
+            elif who_is_home != who_was_home:
+                seconds = when.timestamp() - dt_util.start_of_local_day(when).timestamp()
+                for name in who_is_home - who_was_home:
+                    seed.record(name, True, day, seconds)
+                for name in who_was_home - who_is_home:
+                    seed.record(name, False, day, seconds)
+            who_was_home = who_is_home
+        self.forecast.merge(seed)
+        self.forecast.bootstrapped = True
+        _LOGGER.debug(f"Seeded the occupancy forecast from {len(entity_states)} states")
+
+    async def _async_restore(self) -> None:
+        """Restore the state, attributes, model and history of the last run."""
         last_state = await self.async_get_last_state()
         if last_state is not None:
             self._state = last_state.state
-            self.attrs.update(last_state.attributes)
-
-        self.presence_sensors = [self.config[key][PRESENCE_SENSOR] for key in self.config if key.startswith("sensor_")]
-
-        async_track_state_change(
-            self.hass,
-            self.presence_sensors,
-            self.async_track_home,
-            self.away_and_unknown_states,
-            self.home_states
-        )
-
-        async_track_state_change(
-            self.hass,
-            self.presence_sensors,
-            self.async_track_home,
-            self.home_and_unknown_states,
-            self.away_states
-        )
-
-        async_track_time_interval(
-            self.hass,
-            self.async_update,
-            timedelta(minutes=10)
-        )
+            self.core.last_to_arrive = last_state.attributes.get(ATTR_LAST_TO_ARRIVE)
+            self.core.last_to_leave = last_state.attributes.get(ATTR_LAST_TO_LEAVE)
+        if (last_extra_data := await self.async_get_last_extra_data()) is None:
+            return
 
-        # await asyncio.sleep(15)  # Delete once you have a better solution.
-        # await self.async_update()
-        if self.hass.state == CoreState.running:
-            await self.async_update()
+        data = last_extra_data.as_dict()
+        try:
+            self.history.restore(data["history"])
+        except (KeyError, TypeError, ValueError, OverflowError):
+            _LOGGER.warning("Could not restore the occupancy history, starting a new one")
+            self.history.clear()
+        if "forecast" in data:
+            try:
+                self.forecast.restore(data["forecast"])
+            except (KeyError, TypeError, ValueError, OverflowError, AttributeError):
+                _LOGGER.warning("Could not restore the occupancy forecast, starting a new one")
+                self.forecast.clear()
+        if data.get("version") != OccupancyStoredData.VERSION:
+            return
+        try:
+            self.core.restore(data)
+        except (KeyError, TypeError, ValueError):
+            _LOGGER.warning("Could not restore the occupancy model, doing a full sync")
+            last_to_arrive, last_to_leave = self.core.last_to_arrive, self.core.last_to_leave
+            self.rebuild_index()
+            self.core.last_to_arrive, self.core.last_to_leave = last_to_arrive, last_to_leave
         else:
-            @callback
-            def _async_set_initial_state(_):
-                self.hass.async_create_task(self.async_update())
+            self._state = STATE_ON if self.core.occupied else STATE_OFF
 
-            self.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_START, _async_set_initial_state)
-
-        _LOGGER.debug(f"Presence sensors list: {self.presence_sensors}")
+    @property
+    def extra_restore_state_data(self) -> OccupancyStoredData:
+        """Return the occupancy model and history to store with the state."""
+        return OccupancyStoredData(self.core.as_dict(), self.history, self.forecast)
 
     @property
     def name(self) -> str:
@@ -174,116 +446,536 @@ class HomeOccupancyBinarySensor(BinarySensorEntity, RestoreEntity):
         """Return True if entity is available."""
         return self._available
 
+    @property
+    def pending_transitions(self) -> int:
+        """Return the number of arrivals and departures waiting for their grace period."""
+        return sum(timer is not None for timer in self._pending)
+
+    @property
+    def queued_changes(self) -> int:
+        """Return the number of changes waiting to be applied to the model."""
+        return len(self._queue)
+
     @property
     def is_on(self) -> bool | None:
         if self._state is None:
             return None
         return self._state == STATE_ON
-    
+
     # @property
     # def state(self) -> str | None:
     #     return self._state
 
-    # @property
-    # def extra_state_attributes(self) -> dict[str, Any]:
-    #     return self.attrs
-
     @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return extra state attributes."""
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return extra state attributes.
+
+        The payload is immutable and cached per model version, so reading it
+        again without a change in between costs one integer comparison.
+        """
+        if self._attributes_version != self.core.version:
+            self._attributes = MappingProxyType(self.update_attributes())
+            self._attributes_version = self.core.version
+        return self._attributes
+
+    @callback
+    def rebuild_index(self) -> None:
+        """Compile the config entry into a new occupancy model.
+
+        The model is built before being assigned, so a reload swaps it in
+        one go. Its version continues from the old one, which keeps cached
+        attributes from being mistaken for current.
+        """
+        core = OccupancyCore.from_config(self.config, self.fire_events)
+        core.version = self.core.version + 1
+        self._async_cancel_pending()
+        self._async_cancel_deadlines()
+        self.core, self._pending = core, [None] * len(core.index.people)
+        self.presence_sensors = list(core.index)
+
+    def update_attributes(self) -> dict[str, Any]:
+        """Build the attributes from the occupancy model."""
+        who_is_home = self.core.who_is_home
         return {
-            'last_to_leave': self.last_to_leave,
-            'last_to_arrive': self.last_to_arrive,
-            **self.attrs  # Include other attributes already set in self.attrs
+            ATTR_FRIENDLY_NAME: "Home occupancy",
+            ATTR_KNOWN_PEOPLE: len(who_is_home),
+            ATTR_WHO_IS_HOME: who_is_home,
+            ATTR_GUESTS: self.core.guest_count,
+            ATTR_LAST_TO_ARRIVE: self.core.last_to_arrive,
+            ATTR_LAST_TO_LEAVE: self.core.last_to_leave,
+            ATTR_RECONCILIATIONS: self.stats.reconciliations,
+            ATTR_STALE_TRACKERS: self.core.stale_trackers,
+            ATTR_CONFIDENCE: self.core.confidence,
         }
 
-    async def async_update_guests(self):
-        # Retrieve guest sensor state
-        guest_sensors = [val[PRESENCE_SENSOR] for val in self.config.values() if
-                         isinstance(val, dict) and CONF_NAME in val and "guest" in val[CONF_NAME].lower()]
-        guest_sensor_entity_id = guest_sensors[0] if guest_sensors else None
-        return self.check_is_on(guest_sensor_entity_id) if guest_sensor_entity_id else None
-
-    async def async_update_attributes(self):
-        # Get current who is home
-        new_attrs = self.who_is_home()
-        # Update guests
-        new_attrs[ATTR_GUESTS] = await self.async_update_guests()
-        # Update last to arrive and leave based on tracked changes
-        new_attrs[ATTR_LAST_TO_ARRIVE] = self.last_to_arrive
-        new_attrs[ATTR_LAST_TO_LEAVE] = self.last_to_leave
-        return new_attrs
-
     async def async_update(self, now=None) -> None:
         """Update binary_sensor"""
-        new_attrs = await self.async_update_attributes()
-        # Determine if anyone is home
-        anyone_home = any(self.check_is_on(sensor) for sensor in self.presence_sensors)
-        new_state = STATE_ON if anyone_home else STATE_OFF
-
-        # Check for changes in attributes and state
-        attributes_changed = any(self.attrs.get(attr) != new_attrs.get(attr) for attr in new_attrs)
-        state_changed = self._state != new_state
-
-        # Update state and attributes if there are changes
-        if state_changed or attributes_changed:
-            self._state = new_state
-            self.attrs.update(new_attrs)
-            self.async_write_ha_state()  # This will schedule an update to HA
-
-    async def async_track_home(self, entity_id, old_state, new_state) -> None:
-        """Track state changes of associated device_tracker, person, and binary_sensor entities"""
-        if old_state == new_state:
-            return
-        # Retrieve the person's name associated with the entity_id from self.config
-        person_name = next((config[CONF_NAME] for key, config in self.config.items()
-                            if isinstance(config, dict) and PRESENCE_SENSOR in config and config[
-                                PRESENCE_SENSOR] == entity_id), "unknown")
-
-        # Assign last to arrive or leave based on state
-        if new_state.state in self.home_states:
-            self.last_to_arrive = person_name
-        if new_state.state in self.away_states:
-            self.last_to_leave = person_name
-
-        # Update attributes
-        new_attrs = await self.async_update_attributes()
-
-        # Determine if anyone is home
-        anyone_home = any(self.check_is_on(sensor) for sensor in self.presence_sensors)
-        new_sensor_state = STATE_ON if anyone_home else STATE_OFF
-
-        # Check for changes in attributes
-        attributes_changed = any(self.attrs.get(attr) != new_attrs.get(attr) for attr in new_attrs)
-
-        # Check if the state or any attributes have changed before updating
-        if self._state != new_sensor_state or attributes_changed:
-            self._state = new_sensor_state
-            self.attrs.update(new_attrs)
-            self.async_write_ha_state()
+        started = time.perf_counter_ns()
+        # The resync reads every tracker from the state machine, which already
+        # holds the events still queued, so those are dropped instead of
+        # applied. Other changes, such as new zones, are applied before it.
+        queue = self._queue
+        for _ in range(len(queue)):
+            update = queue.popleft()
+            if getattr(update, "func", None) != self._async_apply_event:
+                queue.append(update)
+        queue.append(self._async_resync)
+        self._async_drain(write_now=True)
+
+        # Check again soon in case an event was missed while (re)loading.
+        self._reconcile_interval = MIN_RECONCILE_INTERVAL
+        self._async_schedule_reconcile()
+        self.stats.update_latency.record(time.perf_counter_ns() - started)
+
+    @callback
+    def _async_resync(self) -> None:
+        """Sync the model with the state machine, committing without grace periods."""
+        get_state = self.hass.states.get
+        self._seen = {sensor: get_state(sensor) for sensor in self.presence_sensors}
+        if self.core.stale_timeouts:
+            for sensor, state in self._seen.items():
+                if (person := self._async_check_stale(sensor, state)) is not None:
+                    self._async_transition(person)
+        for person in self.core.resync(
+            (sensor, state.state if state else None) for sensor, state in self._seen.items()
+        ):
+            self._async_cancel_pending(person)
+
+        # Catch up on arrivals and departures missed while not running.
+        engine = self.core.engine
+        timestamp, day, day_start = local_day()
+        for person, name in enumerate(engine.names):
+            if self.history.is_home(name) != engine.is_home(person):
+                self.history.record(timestamp, name, engine.is_home(person), day, day_start)
+
+    async def async_get_history(self, limit: int | None = None) -> ServiceResponse:
+        """Return the most recent transitions and the dwell-time statistics of everyone."""
+        now, day, day_start = local_day()
+        people = {}
+        for name in self.core.engine.names:
+            summary = self.history.summary(name, now, day, day_start)
+            if summary["home_since"] is not None:
+                summary["home_since"] = dt_util.utc_from_timestamp(summary["home_since"]).isoformat()
+            people[name] = summary
+        return {
+            "transitions": [
+                {
+                    "time": dt_util.utc_from_timestamp(timestamp).isoformat(),
+                    "name": name,
+                    "arrived": arrived,
+                }
+                for timestamp, name, arrived in self.history.transitions(limit)
+            ],
+            "people": people,
+        }
 
-    def who_is_home(self) -> dict:
-        """Determine who is home and return attributes."""
-        who_is_home = [
-            self.config[f"sensor_{i + 1}"]["name"]
-            for i in range(self.config["number_of_sensors"])
-            if self.hass.states.get(self.config[f"sensor_{i + 1}"][PRESENCE_SENSOR]) and
-               self.hass.states.get(self.config[f"sensor_{i + 1}"][PRESENCE_SENSOR]).state.lower() == "home"
+    @callback
+    def async_track_home(self, event: Event) -> None:
+        """Queue a state change of an associated device_tracker, person, binary_sensor or count entity.
+
+        The queue is drained once the current pass of the event loop is done,
+        so a burst of events (e.g. a router reconnecting) is applied in order
+        and written once.
+        """
+        started = time.perf_counter_ns()
+        entity_id = event.data["entity_id"]
+        if entity_id not in self.core:
+            return
+        self.stats.events_received += 1
+        new_state = self._seen[entity_id] = event.data["new_state"]
+        self._async_enqueue(partial(self._async_apply_event, entity_id, new_state))
+        self.stats.track_home_latency.record(time.perf_counter_ns() - started)
+
+    @callback
+    def _async_enqueue(self, update: Callable[[], None]) -> None:
+        """Queue a change, to be applied once the current pass of the event loop is done."""
+        self._queue.append(update)
+        if self._drain_handle is None:
+            self._drain_handle = self.hass.loop.call_soon(self._async_drain)
+
+    @callback
+    def _async_drain(self, write_now: bool = False) -> None:
+        """Apply the queued changes in order, then write the state once.
+
+        The changes bump the model version themselves, so nothing is written
+        (and no attributes are rebuilt) when the queue held no real change.
+        ``write_now`` skips the coalescing window.
+        """
+        started = time.perf_counter_ns()
+        self._async_cancel_drain()
+        version = self.core.version
+        queue = self._queue
+        while queue:
+            queue.popleft()()
+        if write_now:
+            self._async_write_state(STATE_ON if self.core.occupied else STATE_OFF)
+        elif self.core.version != version:
+            self._async_schedule_write()
+        self.stats.drains += 1
+        self.stats.drain_latency.record(time.perf_counter_ns() - started)
+
+    @callback
+    def _async_cancel_drain(self) -> None:
+        if self._drain_handle is not None:
+            self._drain_handle.cancel()
+            self._drain_handle = None
+
+    @callback
+    def _async_apply_event(self, entity_id: str, new_state: State | None) -> None:
+        if not self._async_apply(entity_id, new_state):
+            self.stats.events_ignored += 1
+
+    @callback
+    def _async_apply(self, entity_id: str, new_state: State | None) -> bool:
+        """Feed the new state of one tracker to the model.
+
+        Return False if it changed neither the state of the person nor the
+        number of guests.
+        """
+        version = self.core.version
+        revived = None
+        # A tracker with a pending deadline is not stale, and the deadline
+        # checks when it last reported once it is due.
+        if self.core.stale_timeouts and entity_id not in self._deadlines:
+            revived = self._async_check_stale(entity_id, new_state)
+        person = self.core.feed(entity_id, new_state.state if new_state else None)
+        if person is None and (person := revived) is None:
+            return self.core.version != version
+        self._async_transition(person)
+        return True
+
+    @callback
+    def _async_check_stale(self, entity_id: str, state: State | None) -> int | None:
+        """Mark a tracker stale if it has not reported within its timeout, or fresh if it has.
+
+        A fresh tracker gets a deadline at the end of its timeout. Return the
+        position of the person as ``OccupancyCore.set_stale`` does.
+        """
+        if (timeout := self.core.stale_after(entity_id)) is None:
+            return None
+        if state is not None:
+            remaining = timeout - (dt_util.utcnow() - state.last_reported).total_seconds()
+            if remaining > 0:
+                if entity_id not in self._deadlines:
+                    self._deadlines[entity_id] = self.scheduler.async_call_later(
+                        remaining, partial(self._async_deadline, entity_id)
+                    )
+                return self.core.set_stale(entity_id, False)
+        if (timer := self._deadlines.pop(entity_id, None)) is not None:
+            timer.cancel()
+        return self.core.set_stale(entity_id, True)
+
+    @callback
+    def _async_is_stale_report(self, event_data: Mapping[str, Any]) -> bool:
+        """Return True for a report of a stale tracker, the only reports that matter here."""
+        return event_data["entity_id"] in self.core.stale
+
+    @callback
+    def async_track_report(self, event: Event) -> None:
+        """Queue a report of a stale tracker that repeated its state.
+
+        Home Assistant fires state_reported instead of state_changed then and
+        keeps the State object, so neither the dispatcher nor the drift checks
+        see it. Fresh trackers do not need it, as their deadline reads when
+        they last reported once it is due.
+        """
+        self._async_enqueue(partial(self._async_apply_report, event.data["entity_id"]))
+
+    @callback
+    def _async_apply_report(self, entity_id: str) -> None:
+        """Bring back a stale tracker if it reported within its timeout."""
+        if entity_id not in self.core.stale:
+            return
+        if (person := self._async_check_stale(entity_id, self.hass.states.get(entity_id))) is not None:
+            self._async_transition(person)
+
+    @callback
+    def _async_deadline(self, entity_id: str) -> None:
+        """Check a tracker whose freshness deadline has passed."""
+        del self._deadlines[entity_id]
+        # Deadlines that pass together are applied and written together.
+        self._async_enqueue(partial(self._async_apply_deadline, entity_id))
+
+    @callback
+    def _async_apply_deadline(self, entity_id: str) -> None:
+        # Trackers that reported since get a new deadline.
+        if (person := self._async_check_stale(entity_id, self.hass.states.get(entity_id))) is not None:
+            self._async_transition(person)
+
+    @callback
+    def _async_cancel_deadlines(self) -> None:
+        while self._deadlines:
+            self._deadlines.popitem()[1].cancel()
+
+    @callback
+    def _async_transition(self, person: int) -> None:
+        """Commit a change of the fused state of a person, after their grace period."""
+        # A flap within the grace period cancels the pending transition.
+        self._async_cancel_pending(person)
+        if (delay := self.core.delay(person)) is None:
+            return
+        if delay:
+            self._pending[person] = self.scheduler.async_call_later(
+                delay, partial(self._async_grace_elapsed, person)
+            )
+        else:
+            self._async_commit(person)
+
+    @callback
+    def _async_grace_elapsed(self, person: int) -> None:
+        """Queue the commit of a person whose grace period has passed, and apply it."""
+        self._pending[person] = None
+        self._queue.append(partial(self._async_commit, person))
+        self._async_drain()
+
+    @callback
+    def _async_commit(self, person: int) -> None:
+        """Let a person arrive or leave."""
+        self._pending[person] = None
+        if not self.core.commit(person):
+            return
+        timestamp, day, day_start = local_day()
+        name, is_home = self.core.engine.names[person], self.core.engine.is_home(person)
+        self.history.record(timestamp, name, is_home, day, day_start)
+        self.forecast.record(name, is_home, day, timestamp - day_start)
+
+    @callback
+    def _async_cancel_pending(self, person: int | None = None) -> None:
+        """Cancel the pending transition of a person, or of everyone."""
+        for position in range(len(self._pending)) if person is None else (person,):
+            if (timer := self._pending[position]) is not None:
+                timer.cancel()
+                self._pending[position] = None
+
+    @callback
+    def async_reconcile(self, _now=None) -> None:
+        """Apply any tracker changes that were not received as events.
+
+        The check only compares the current state object of each tracker with
+        the last one handled, which is cheap enough to run regularly. The
+        interval doubles up to the configured maximum while no drift is found
+        and drops back to the minimum when it is.
+        """
+        self._unsub_reconcile = None
+        self.stats.reconciliation_checks += 1
+        drifted = [
+            sensor for sensor in self.presence_sensors
+            if self.hass.states.get(sensor) is not self._seen.get(sensor)
         ]
-
-        # Construct the dictionary of attributes
-        attributes = {
-            ATTR_KNOWN_PEOPLE: str(len(who_is_home)),
-            ATTR_WHO_IS_HOME: who_is_home,
-            # Include other attributes like last_to_leave and last_to_arrive if needed
+        for sensor in drifted:
+            new_state = self._seen[sensor] = self.hass.states.get(sensor)
+            self._queue.append(partial(self._async_apply, sensor, new_state))
+        # Reports that repeat the state keep the State object, so stale
+        # trackers are checked for them apart, in case one was missed.
+        for sensor in self.core.stale:
+            self._queue.append(partial(self._async_apply_report, sensor))
+
+        if drifted:
+            _LOGGER.debug(f"Reconciled missed changes of {drifted}")
+            self.stats.reconciliations += 1
+            # The reconciliations attribute changed, so the state is written.
+            self.core.version += 1
+            self._reconcile_interval = MIN_RECONCILE_INTERVAL
+        else:
+            self._reconcile_interval = min(self._reconcile_interval * 2, self.reconcile_max_interval)
+        if self._queue:
+            self._async_drain()
+        self._async_schedule_reconcile()
+
+    @callback
+    def _async_schedule_reconcile(self) -> None:
+        self._async_cancel_reconcile()
+        if self.reconcile_max_interval:
+            self._unsub_reconcile = async_call_later(
+                self.hass, self._reconcile_interval, self.async_reconcile
+            )
+
+    @callback
+    def _async_cancel_reconcile(self) -> None:
+        if self._unsub_reconcile is not None:
+            self._unsub_reconcile()
+            self._unsub_reconcile = None
+
+    @callback
+    def _async_schedule_write(self) -> None:
+        """Write the state now, or once the coalescing window has passed.
+
+        The window is not extended by later changes, so a burst of changes is
+        written at most ``debounce`` seconds after the first one. The model
+        is updated for every change, so the written state and the
+        last_to_arrive/last_to_leave order are the same as without coalescing.
+        """
+        if not self.debounce:
+            self._async_flush()
+        elif self._unsub_flush is None:
+            self._unsub_flush = async_call_later(self.hass, self.debounce, self._async_flush)
+        else:
+            self.stats.writes_suppressed += 1
+
+    @callback
+    def _async_flush(self, _now=None) -> None:
+        """Write the coalesced state."""
+        self._unsub_flush = None
+        self._async_write_state(STATE_ON if self.core.occupied else STATE_OFF)
+
+    @callback
+    def _async_cancel_flush(self) -> None:
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+
+    @callback
+    def _async_write_state(self, new_state: str) -> None:
+        """Store the new state and write it to HA, unless nothing changed."""
+        # Anything pending is included in this write.
+        self._async_cancel_flush()
+        if self._written_version == self.core.version and self._state == new_state:
+            self.stats.writes_suppressed += 1
+            return
+        self._written_version = self.core.version
+        old_state, self._state = self._state, new_state
+        self.stats.state_writes += 1
+        self.async_write_ha_state()
+        async_dispatcher_send(self.hass, self._signal_written)
+        if self.fire_events:
+            self._async_fire_delta(old_state)
+
+    @callback
+    def _async_fire_delta(self, old_state: str | None) -> None:
+        """Fire an event with what changed since the last state write, if anything did."""
+        occupancy_changed = old_state in (STATE_ON, STATE_OFF) and old_state != self._state
+        guests = self.core.engine.guest_count
+        if not (self.core.arrived or self.core.left or occupancy_changed or guests != self._written_guests):
+            return
+        arrived, left = self.core.take_delta()
+        self.hass.bus.async_fire(
+            EVENT_OCCUPANCY_CHANGED,
+            {
+                "entity_id": self.entity_id,
+                ATTR_ARRIVED: arrived,
+                ATTR_LEFT: left,
+                ATTR_KNOWN_PEOPLE: len(self.core.who_is_home),
+                ATTR_GUESTS: self.core.guest_count,
+                ATTR_OCCUPIED: self._state == STATE_ON,
+                ATTR_OCCUPANCY_CHANGED: occupancy_changed,
+            },
+        )
+        self._written_guests = guests
+
+
+class AreaOccupancyBinarySensor(BinarySensorEntity):
+    """Occupancy of one area, from the motion, presence and door sensors in it.
+
+    The area is occupied while any motion or presence sensor is on, and for
+    the clear timeout after the last one turns off or a door opens or
+    closes. Each event only touches this area: the set of active sensors
+    and at most one timer on the shared timer heap.
+    """
+
+    _attr_device_class = BinarySensorDeviceClass.OCCUPANCY
+    _attr_should_poll = False
+
+    def __init__(
+            self,
+            config_entry: config_entries.ConfigEntry,
+            areas: AreaIndex,
+            area_id: str,
+            clear_timeout: float,
+    ) -> None:
+        self.areas = areas
+        self.area_id = area_id
+        self.clear_timeout = clear_timeout
+        self._attr_name = f"{areas.area_name(area_id)} occupancy"
+        self._attr_unique_id = f"{config_entry.entry_id}_area_{area_id}"
+        self._attr_is_on = False
+        # Motion and presence sensors of the area that are on.
+        self._active: set[str] = set()
+        self._clear: Timer | None = None
+        self._unsub_sensors: CALLBACK_TYPE | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Run when entity is added to hass."""
+        self.async_on_remove(self._async_unsubscribe)
+        self.async_on_remove(self._async_cancel_clear)
+        self.async_area_updated()
+
+    @callback
+    def async_area_updated(self) -> None:
+        """Follow the current sensors of the area."""
+        if self.hass is None:
+            # Not added yet; this runs again once it is.
+            return
+        self._async_unsubscribe()
+        entity_ids = self.areas.entity_ids(self.area_id)
+        self._unsub_sensors = async_get_dispatcher(self.hass).async_subscribe(
+            entity_ids, self.async_track_activity
+        )
+        self._active = {
+            entity_id for entity_id in entity_ids
+            if self.areas.kinds.get(entity_id) != AREA_KIND_DOOR
+            and (state := self.hass.states.get(entity_id)) is not None
+            and state.state == STATE_ON
         }
+        self._attr_available = bool(entity_ids)
+        if self._active:
+            self._async_cancel_clear()
+            self._attr_is_on = True
+        elif self._attr_is_on and self._clear is None:
+            self._async_start_clear()
+        self.async_write_ha_state()
+
+    @callback
+    def async_track_activity(self, event: Event) -> None:
+        """Handle a state change of a sensor in the area."""
+        entity_id = event.data["entity_id"]
+        old_state = event.data["old_state"]
+        new_state = event.data["new_state"]
+        if self.areas.kinds.get(entity_id) == AREA_KIND_DOOR:
+            # Opening or closing a door is activity; attribute updates are not.
+            if old_state is None or new_state is None or old_state.state == new_state.state:
+                return
+            if not self._active:
+                self._async_start_clear()
+            self._async_set(True)
+            return
+
+        if new_state is not None and new_state.state == STATE_ON:
+            self._active.add(entity_id)
+            self._async_cancel_clear()
+            self._async_set(True)
+        elif entity_id in self._active:
+            self._active.discard(entity_id)
+            if not self._active:
+                self._async_start_clear()
+
+    @callback
+    def _async_set(self, is_on: bool) -> None:
+        if self._attr_is_on != is_on:
+            self._attr_is_on = is_on
+            self.async_write_ha_state()
 
-        return attributes
+    @callback
+    def _async_start_clear(self) -> None:
+        """(Re)start the clear timeout."""
+        self._async_cancel_clear()
+        self._clear = async_get_scheduler(self.hass).async_call_later(
+            self.clear_timeout, self._async_clear
+        )
 
-    def check_is_on(self, entity_id) -> bool:
-        """Check state of entity (Synchronous version)"""
-        entity = self.hass.states.get(entity_id)
-        if entity:
-            is_home = entity.state in self.home_states
-            return is_home
-        return False
+    @callback
+    def _async_clear(self) -> None:
+        self._clear = None
+        if not self._active:
+            self._async_set(False)
+
+    @callback
+    def _async_cancel_clear(self) -> None:
+        if self._clear is not None:
+            self._clear.cancel()
+            self._clear = None
+
+    @callback
+    def _async_unsubscribe(self) -> None:
+        if self._unsub_sensors is not None:
+            self._unsub_sensors()
+            self._unsub_sensors = None
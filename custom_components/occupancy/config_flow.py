@@ -1,66 +1,155 @@
 from __future__ import annotations
 
+from collections.abc import Mapping
 import logging
 from typing import Any
 
 from homeassistant import config_entries, exceptions
+from homeassistant.const import ATTR_ENTITY_ID
 from homeassistant.core import HomeAssistant
 import homeassistant.helpers.config_validation as cv
 from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er, selector
 
 import voluptuous as vol
 from .const import (
     DOMAIN,
-    PRESENCE_SENSOR,
     CONF_NAME,
+    CONF_TRACKERS,
+    CONF_FUSION_POLICY,
+    CONF_GUEST,
+    CONF_ENTITIES,
+    CONF_GROUPS,
+    CONF_IMPORT_PERSONS,
+    CONF_STALE_TIMEOUTS,
+    CONF_TRACKER,
+    CONF_RELIABILITY,
+    CONF_TRACKER_RELIABILITY,
+    CONF_CONFIDENCE_ON,
+    CONF_CONFIDENCE_OFF,
+    CONF_PROBABILITY_SENSOR,
+    CONF_ARRIVE_DELAY,
+    CONF_LEAVE_DELAY,
+    FUSION_POLICIES,
+    POLICY_ANY,
     CONF_HOME_OCCUPANCY,
-    CONF_ADD_ANOTHER
+    CONF_ADD_ANOTHER,
+    CONF_DEBOUNCE,
+    CONF_RECONCILE_INTERVAL,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_HISTORY_SIZE,
+    CONF_HISTORY_SENSORS,
+    CONF_FORECAST_SENSORS,
+    CONF_FORECAST_BOOTSTRAP,
+    CONF_FIRE_EVENTS,
+    CONF_AREA,
+    CONF_AREA_CLEAR_TIMEOUT,
+    CONF_AREA_SENSORS,
+    CONF_AREA_TIMEOUTS,
+    DEFAULT_AREA_CLEAR_TIMEOUT,
+    DEFAULT_CONFIDENCE_OFF,
+    DEFAULT_CONFIDENCE_ON,
+    DEFAULT_DEBOUNCE,
+    DEFAULT_HISTORY_SIZE,
+    DEFAULT_RECONCILE_INTERVAL,
+    SENSOR_PREFIX,
+    KIND_GROUP,
+    KIND_PERSON,
+    TRACKER_KINDS,
 )
+from .index import tracker_entity_ids
 
 _LOGGER = logging.getLogger(__name__)
 
-# The schema sort of works with vol.Required(PRESENCE_SENSOR): str
-# but not so much with vol.Required(PRESENCE_SENSOR): cv.entity_id
+# One person per form: a name, the trackers that belong to them (in priority
+# order) and how the trackers are combined.
 DATA_SCHEMA = vol.Schema(
     {
-        vol.Required(PRESENCE_SENSOR): str,  # cv.entity_id,
         vol.Required(CONF_NAME): str,  # cv.string,
+        vol.Required(CONF_TRACKERS): selector.EntitySelector(
+            selector.EntitySelectorConfig(domain=list(TRACKER_KINDS), multiple=True)
+        ),
+        vol.Optional(CONF_FUSION_POLICY, default=POLICY_ANY): selector.SelectSelector(
+            selector.SelectSelectorConfig(
+                options=list(FUSION_POLICIES), translation_key=CONF_FUSION_POLICY
+            )
+        ),
+        vol.Optional(CONF_GUEST, default=False): bool,
+        vol.Optional(CONF_ARRIVE_DELAY, default=0): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=3600)
+        ),
+        vol.Optional(CONF_LEAVE_DELAY, default=0): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=3600)
+        ),
         vol.Optional(CONF_ADD_ANOTHER): bool,  # cv.boolean,
     }
 )
 
+# Many people at once: every selected tracker, every person entity and the
+# members of groups become a person of their own, named after the entity.
+IMPORT_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_ENTITIES, default=[]): selector.EntitySelector(
+            selector.EntitySelectorConfig(domain=list(TRACKER_KINDS), multiple=True)
+        ),
+        vol.Optional(CONF_IMPORT_PERSONS, default=False): bool,
+        vol.Optional(CONF_GROUPS, default=[]): selector.EntitySelector(
+            selector.EntitySelectorConfig(domain=KIND_GROUP, multiple=True)
+        ),
+        vol.Optional(CONF_ARRIVE_DELAY, default=0): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=3600)
+        ),
+        vol.Optional(CONF_LEAVE_DELAY, default=0): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=3600)
+        ),
+    }
+)
+
 RECONFIG_OPTIONS = {
     "full": "Full Reconfiguration",
-    "add": "Add New Entities"
+    "add": "Add New Entities",
+    "bulk_import": "Import Many People",
+    "settings": "Settings",
+    "areas": "Area Clear Timeouts",
+    "stale": "Stale Trackers",
+    "reliability": "Tracker Reliability",
 }
 
-async def async_validate_input_entity_id(hass: HomeAssistant, data: dict) -> dict[str, Any]:
-    """Validate the user input is valid entity_id.
-    Either person.*, device_tracker.* or binary_sensor.*
-    """
-
-    _LOGGER.error("async_validate_input_entity_id")
+@callback
+def async_validate_trackers(hass: HomeAssistant, entity_ids: list[str]) -> list[str]:
+    """Validate a batch of trackers in one pass. Return them as entity_ids.
 
-    valid_domains = [
-        "person",
-        "device_tracker",
-        "binary_sensor",
-        "input_boolean"
+    Every entity must be a person.*, device_tracker.*, binary_sensor.*,
+    input_boolean.*, or input_number.*/counter.* for guest counts, and be
+    known to the entity registry or the state machine.
+    """
+    try:
+        entities = cv.entity_ids(entity_ids)
+    except vol.Invalid as err:
+        raise InvalidEntityID from err
+    if any(entity.split(".", 1)[0] not in TRACKER_KINDS for entity in entities):
+        raise InvalidEntityID
+    registry = er.async_get(hass)
+    unknown = [
+        entity for entity in entities
+        if registry.async_get(entity) is None and hass.states.get(entity) is None
     ]
+    if unknown:
+        raise UnknownEntities(unknown)
+    return entities
+
 
-    entity = cv.entity_id(data[PRESENCE_SENSOR])
-    entity_split = entity.split(".")
-    if entity_split[0] not in valid_domains:
+async def async_validate_input_entity_id(hass: HomeAssistant, data: dict) -> dict[str, Any]:
+    """Validate the user input is a list of valid, existing trackers."""
+    entities = async_validate_trackers(hass, data[CONF_TRACKERS])
+    if not entities:
         raise InvalidEntityID
 
-    return {"title": entity}
+    return {"title": ", ".join(entities)}
 
 
 async def async_validate_input_string(hass: HomeAssistant, data: dict) -> dict[str, Any]:
     """Validate the user input is a string."""
-
-    _LOGGER.error("async_validate_input_string")
-
     if data[CONF_NAME] is None:
         raise NoInputName
     else:
@@ -69,10 +158,88 @@ async def async_validate_input_string(hass: HomeAssistant, data: dict) -> dict[s
     return {"title": entity}
 
 
+def person_config(user_input: dict[str, Any]) -> dict[str, Any]:
+    """Return the ``sensor_N`` entry of a person from the person form."""
+    return {
+        CONF_NAME: str(user_input[CONF_NAME]),
+        CONF_TRACKERS: cv.entity_ids(user_input[CONF_TRACKERS]),
+        CONF_FUSION_POLICY: user_input.get(CONF_FUSION_POLICY, POLICY_ANY),
+        CONF_GUEST: user_input.get(CONF_GUEST, False),
+        CONF_ARRIVE_DELAY: user_input.get(CONF_ARRIVE_DELAY, 0),
+        CONF_LEAVE_DELAY: user_input.get(CONF_LEAVE_DELAY, 0),
+    }
+
+
+@callback
+def async_import_people(
+        hass: HomeAssistant, user_input: dict[str, Any], configured: Mapping[str, Any]
+) -> list[dict[str, Any]]:
+    """Return the ``sensor_N`` entries of the import form, one person per tracker.
+
+    The trackers are the selected entities, every person entity if asked
+    for, and the members of the selected groups. Trackers that already
+    belong to someone in ``configured`` are skipped, and the rest is
+    validated in one pass.
+    """
+    entity_ids = list(user_input.get(CONF_ENTITIES, []))
+    if user_input.get(CONF_IMPORT_PERSONS, False):
+        entity_ids.extend(hass.states.async_entity_ids(KIND_PERSON))
+    for group in user_input.get(CONF_GROUPS, []):
+        if (state := hass.states.get(group)) is not None:
+            entity_ids.extend(
+                member for member in state.attributes.get(ATTR_ENTITY_ID, ())
+                if member.split(".", 1)[0] in TRACKER_KINDS
+            )
+
+    taken: set[str] = set()
+    names: set[str] = set()
+    for key, value in configured.items():
+        if key.startswith(SENSOR_PREFIX) and isinstance(value, Mapping):
+            taken.update(tracker_entity_ids(value))
+            names.add(str(value[CONF_NAME]))
+    entity_ids = [entity_id for entity_id in dict.fromkeys(entity_ids) if entity_id not in taken]
+    if not entity_ids:
+        raise NothingToImport
+
+    registry = er.async_get(hass)
+    people = []
+    for entity_id in async_validate_trackers(hass, entity_ids):
+        name = None
+        if (state := hass.states.get(entity_id)) is not None:
+            name = state.name
+        elif (entry := registry.async_get(entity_id)) is not None:
+            name = entry.name or entry.original_name
+        name = name or entity_id.split(".", 1)[1]
+        # Names identify people in the attributes and history.
+        if name in names:
+            name = f"{name} ({entity_id})"
+        names.add(name)
+        people.append({
+            CONF_NAME: name,
+            CONF_TRACKERS: [entity_id],
+            CONF_FUSION_POLICY: POLICY_ANY,
+            CONF_GUEST: False,
+            CONF_ARRIVE_DELAY: user_input.get(CONF_ARRIVE_DELAY, 0),
+            CONF_LEAVE_DELAY: user_input.get(CONF_LEAVE_DELAY, 0),
+        })
+    return people
+
+
+def next_sensor_number(config: Mapping[str, Any]) -> int:
+    """Return the number of the next ``sensor_N`` entry."""
+    return max(
+        (
+            int(key[len(SENSOR_PREFIX):]) for key in config
+            if key.startswith(SENSOR_PREFIX) and key[len(SENSOR_PREFIX):].isdigit()
+        ),
+        default=0,
+    ) + 1
+
+
 class HomeOccupancyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for the Home Occupancy."""
 
-    VERSION = 1
+    VERSION = 3
     # Pick one of the available connection classes in homeassistant/config_entries.py
     # This tells HA if it should be asking for updates, or it'll be notified of updates
     # automatically. This example uses PUSH, as the dummy hub will notify HA of
@@ -85,35 +252,72 @@ class HomeOccupancyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self.number_of_sensors = 0
 
     async def async_step_user(self, user_input=None):
+        """Add people one by one, or import many at once."""
+        return self.async_show_menu(step_id="user", menu_options=["person", "bulk_import"])
+
+    async def async_step_person(self, user_input=None):
         errors: dict = {}
+        description_placeholders: dict[str, str] = {}
         if user_input is not None:
             try:
-                info_entity = await async_validate_input_entity_id(self.hass, user_input)
-                info_name = await async_validate_input_string(self.hass, user_input)
+                await async_validate_input_entity_id(self.hass, user_input)
+                await async_validate_input_string(self.hass, user_input)
             except InvalidEntityID:
                 errors["base"] = "invalid_entity_id"
+            except UnknownEntities as err:
+                errors["base"] = "unknown_entity"
+                description_placeholders["entities"] = ", ".join(err.entity_ids)
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
 
             if not errors:
                 self.number_of_sensors += 1
-                self.data[f"sensor_{self.number_of_sensors}"] = {
-                    PRESENCE_SENSOR: user_input[PRESENCE_SENSOR],
-                    CONF_NAME: str(user_input[CONF_NAME])
-                }
+                self.data[f"sensor_{self.number_of_sensors}"] = person_config(user_input)
 
                 self.data["number_of_sensors"] = self.number_of_sensors
 
                 # If user ticked the box show this form again to add more sensors.
                 if user_input.get(CONF_ADD_ANOTHER, False):
-                    return await self.async_step_user()
+                    return await self.async_step_person()
                 else:
                     return self.async_create_entry(title=CONF_HOME_OCCUPANCY, data=self.data)
 
         # If there is no user input or there were errors, show the form again, including any errors that were found with the input.
         return self.async_show_form(
-            step_id="user", data_schema=DATA_SCHEMA, errors=errors
+            step_id="person",
+            data_schema=DATA_SCHEMA,
+            errors=errors,
+            description_placeholders=description_placeholders,
+        )
+
+    async def async_step_bulk_import(self, user_input=None):
+        """Import many people at once and create the entry."""
+        errors: dict = {}
+        description_placeholders: dict[str, str] = {}
+        if user_input is not None:
+            try:
+                people = async_import_people(self.hass, user_input, self.data)
+            except InvalidEntityID:
+                errors["base"] = "invalid_entity_id"
+            except UnknownEntities as err:
+                errors["base"] = "unknown_entity"
+                description_placeholders["entities"] = ", ".join(err.entity_ids)
+            except NothingToImport:
+                errors["base"] = "nothing_to_import"
+
+            if not errors:
+                for person in people:
+                    self.number_of_sensors += 1
+                    self.data[f"sensor_{self.number_of_sensors}"] = person
+                self.data["number_of_sensors"] = self.number_of_sensors
+                return self.async_create_entry(title=CONF_HOME_OCCUPANCY, data=self.data)
+
+        return self.async_show_form(
+            step_id="bulk_import",
+            data_schema=IMPORT_SCHEMA,
+            errors=errors,
+            description_placeholders=description_placeholders,
         )
 
     @callback
@@ -136,6 +340,16 @@ class HomeOccupancyOptionsFlow(config_entries.OptionsFlow):
             elif user_input["reconfig_option"] == "add":
                 # Handle adding new entities here
                 return await self.async_step_add_entities()
+            elif user_input["reconfig_option"] == "bulk_import":
+                return await self.async_step_bulk_import()
+            elif user_input["reconfig_option"] == "settings":
+                return await self.async_step_settings()
+            elif user_input["reconfig_option"] == "areas":
+                return await self.async_step_areas()
+            elif user_input["reconfig_option"] == "stale":
+                return await self.async_step_stale()
+            elif user_input["reconfig_option"] == "reliability":
+                return await self.async_step_reliability()
 
         return self.async_show_form(
             step_id="init",
@@ -146,32 +360,207 @@ class HomeOccupancyOptionsFlow(config_entries.OptionsFlow):
 
     async def shared_step_logic(self, user_input):
         errors: dict = {}
+        description_placeholders: dict[str, str] = {}
         if user_input is not None:
             try:
-                info_entity = await async_validate_input_entity_id(self.hass, user_input)
-                info_name = await async_validate_input_string(self.hass, user_input)
+                await async_validate_input_entity_id(self.hass, user_input)
+                await async_validate_input_string(self.hass, user_input)
             except InvalidEntityID:
                 errors["base"] = "invalid_entity_id"
+            except UnknownEntities as err:
+                errors["base"] = "unknown_entity"
+                description_placeholders["entities"] = ", ".join(err.entity_ids)
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
 
             if not errors:
                 self.number_of_sensors += 1
-                self.data[f"sensor_{self.number_of_sensors}"] = {
-                    PRESENCE_SENSOR: user_input[PRESENCE_SENSOR],
-                    CONF_NAME: str(user_input[CONF_NAME])
-                }
+                self.data[f"sensor_{self.number_of_sensors}"] = person_config(user_input)
 
                 # If user ticked the box show this form again to add more sensors.
                 if user_input.get(CONF_ADD_ANOTHER, False):
                     return await self.async_step_add_entities()
                 else:
-                    return self.async_create_entry(title=None, data=self.data)
+                    return self.async_create_entry(title=None, data={**self.settings(), **self.data})
 
         # If there is no user input or there were errors, show the form again, including any errors that were found with the input.
         return self.async_show_form(
-            step_id="user", data_schema=DATA_SCHEMA, errors=errors
+            step_id="user",
+            data_schema=DATA_SCHEMA,
+            errors=errors,
+            description_placeholders=description_placeholders,
+        )
+
+    async def async_step_bulk_import(self, user_input=None):
+        """Import many people at once, next to the people already configured."""
+        errors: dict = {}
+        description_placeholders: dict[str, str] = {}
+        if user_input is not None:
+            configured = {**self.config_entry.data, **self.config_entry.options}
+            try:
+                people = async_import_people(self.hass, user_input, configured)
+            except InvalidEntityID:
+                errors["base"] = "invalid_entity_id"
+            except UnknownEntities as err:
+                errors["base"] = "unknown_entity"
+                description_placeholders["entities"] = ", ".join(err.entity_ids)
+            except NothingToImport:
+                errors["base"] = "nothing_to_import"
+
+            if not errors:
+                number = next_sensor_number(configured)
+                data = dict(self.config_entry.options)
+                for offset, person in enumerate(people):
+                    data[f"{SENSOR_PREFIX}{number + offset}"] = person
+                return self.async_create_entry(title=None, data=data)
+
+        return self.async_show_form(
+            step_id="bulk_import",
+            data_schema=IMPORT_SCHEMA,
+            errors=errors,
+            description_placeholders=description_placeholders,
+        )
+
+    def settings(self) -> dict[str, Any]:
+        """Return the current options that are not presence sensors."""
+        return {
+            key: value for key, value in self.config_entry.options.items()
+            if not key.startswith(SENSOR_PREFIX)
+        }
+
+    async def async_step_settings(self, user_input=None):
+        if user_input is not None:
+            return self.async_create_entry(
+                title=None, data={**self.config_entry.options, **user_input}
+            )
+
+        settings = self.settings()
+        return self.async_show_form(
+            step_id="settings",
+            data_schema=vol.Schema({
+                vol.Optional(
+                    CONF_DEBOUNCE, default=settings.get(CONF_DEBOUNCE, DEFAULT_DEBOUNCE)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=60)),
+                vol.Optional(
+                    CONF_RECONCILE_INTERVAL,
+                    default=settings.get(CONF_RECONCILE_INTERVAL, DEFAULT_RECONCILE_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1440)),
+                vol.Optional(
+                    CONF_DIAGNOSTIC_SENSORS,
+                    default=settings.get(CONF_DIAGNOSTIC_SENSORS, False),
+                ): bool,
+                vol.Optional(
+                    CONF_FIRE_EVENTS,
+                    default=settings.get(CONF_FIRE_EVENTS, False),
+                ): bool,
+                vol.Optional(
+                    CONF_HISTORY_SIZE,
+                    default=settings.get(CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=100000)),
+                vol.Optional(
+                    CONF_HISTORY_SENSORS,
+                    default=settings.get(CONF_HISTORY_SENSORS, False),
+                ): bool,
+                vol.Optional(
+                    CONF_FORECAST_SENSORS,
+                    default=settings.get(CONF_FORECAST_SENSORS, False),
+                ): bool,
+                vol.Optional(
+                    CONF_FORECAST_BOOTSTRAP,
+                    default=settings.get(CONF_FORECAST_BOOTSTRAP, False),
+                ): bool,
+                vol.Optional(
+                    CONF_AREA_SENSORS,
+                    default=settings.get(CONF_AREA_SENSORS, False),
+                ): bool,
+                vol.Optional(
+                    CONF_AREA_CLEAR_TIMEOUT,
+                    default=settings.get(CONF_AREA_CLEAR_TIMEOUT, DEFAULT_AREA_CLEAR_TIMEOUT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=86400)),
+                vol.Optional(
+                    CONF_CONFIDENCE_ON,
+                    default=settings.get(CONF_CONFIDENCE_ON, DEFAULT_CONFIDENCE_ON),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.5, max=0.99)),
+                vol.Optional(
+                    CONF_CONFIDENCE_OFF,
+                    default=settings.get(CONF_CONFIDENCE_OFF, DEFAULT_CONFIDENCE_OFF),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.01, max=0.5)),
+                vol.Optional(
+                    CONF_PROBABILITY_SENSOR,
+                    default=settings.get(CONF_PROBABILITY_SENSOR, False),
+                ): bool,
+            })
+        )
+
+    async def async_step_areas(self, user_input=None):
+        """Set the clear timeout of one area, overriding the default."""
+        if user_input is not None:
+            timeouts = {
+                **self.config_entry.options.get(CONF_AREA_TIMEOUTS, {}),
+                user_input[CONF_AREA]: user_input[CONF_AREA_CLEAR_TIMEOUT],
+            }
+            return self.async_create_entry(
+                title=None, data={**self.config_entry.options, CONF_AREA_TIMEOUTS: timeouts}
+            )
+
+        return self.async_show_form(
+            step_id="areas",
+            data_schema=vol.Schema({
+                vol.Required(CONF_AREA): selector.AreaSelector(),
+                vol.Required(
+                    CONF_AREA_CLEAR_TIMEOUT,
+                    default=self.settings().get(CONF_AREA_CLEAR_TIMEOUT, DEFAULT_AREA_CLEAR_TIMEOUT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=86400)),
+            })
+        )
+
+    async def async_step_stale(self, user_input=None):
+        """Set after how many minutes without a report trackers of each kind are stale."""
+        if user_input is not None:
+            timeouts = {kind: minutes for kind, minutes in user_input.items() if minutes}
+            return self.async_create_entry(
+                title=None, data={**self.config_entry.options, CONF_STALE_TIMEOUTS: timeouts}
+            )
+
+        timeouts = self.settings().get(CONF_STALE_TIMEOUTS, {})
+        return self.async_show_form(
+            step_id="stale",
+            data_schema=vol.Schema({
+                vol.Optional(kind, default=timeouts.get(kind, 0)): vol.All(
+                    vol.Coerce(float), vol.Range(min=0, max=10080)
+                )
+                for kind in TRACKER_KINDS
+            })
+        )
+
+    async def async_step_reliability(self, user_input=None):
+        """Set how often one tracker reports the right state, overriding the default of its kind."""
+        reliability = self.settings().get(CONF_TRACKER_RELIABILITY, {})
+        if user_input is not None:
+            reliability = {
+                **reliability, user_input[CONF_TRACKER]: user_input[CONF_RELIABILITY]
+            }
+            return self.async_create_entry(
+                title=None,
+                data={**self.config_entry.options, CONF_TRACKER_RELIABILITY: reliability},
+            )
+
+        return self.async_show_form(
+            step_id="reliability",
+            data_schema=vol.Schema({
+                vol.Required(CONF_TRACKER): selector.EntitySelector(
+                    selector.EntitySelectorConfig(domain=list(TRACKER_KINDS))
+                ),
+                vol.Required(CONF_RELIABILITY, default=0.8): vol.All(
+                    vol.Coerce(float), vol.Range(min=0.5, max=0.99)
+                ),
+            }),
+            description_placeholders={
+                "current": ", ".join(
+                    f"{entity_id}: {value}" for entity_id, value in reliability.items()
+                ) or "none",
+            },
         )
 
     async def async_step_add_entities(self, user_input=None):
@@ -192,3 +581,15 @@ class InvalidEntityID(exceptions.InvalidEntityFormatError):
 
 class NoInputName(exceptions.IntegrationError):
     """Error to indicate no input name."""
+
+
+class UnknownEntities(exceptions.HomeAssistantError):
+    """Error to indicate entities that are neither registered nor have a state."""
+
+    def __init__(self, entity_ids: list[str]) -> None:
+        super().__init__(f"Unknown entities: {', '.join(entity_ids)}")
+        self.entity_ids = entity_ids
+
+
+class NothingToImport(exceptions.HomeAssistantError):
+    """Error to indicate an import without any new tracker."""
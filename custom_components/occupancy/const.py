@@ -1,10 +1,110 @@
+from datetime import timedelta
+
 DOMAIN = "home_occupancy"
 PRESENCE_SENSOR = "presence_sensor"
 OCCUPANCY_SENSOR = "home_occupancy"
 CONF_NAME = "name"
 CONF_HOME_OCCUPANCY = "Home Occupancy"
 STATE_AWAY = "away"
+# Raw entity states, matching homeassistant.const, so that the engine can be
+# used without importing Home Assistant.
+HOME_STATES = frozenset({"on", "home"})
+AWAY_STATES = frozenset({"off", "not_home", STATE_AWAY})
+STATE_UNAVAILABLE = "unavailable"
+ZONE_DOMAIN = "zone"
+ZONE_HOME = "zone.home"
+
+# Presence classes a raw entity state is mapped to.
+PRESENCE_HOME = "home"
+PRESENCE_AWAY = "away"
+PRESENCE_UNKNOWN = "unknown"
+PRESENCE_UNAVAILABLE = "unavailable"
+
 CONF_ADD_ANOTHER = "add_another"
+CONF_TRACKERS = "trackers"
+CONF_FUSION_POLICY = "fusion_policy"
+CONF_ARRIVE_DELAY = "arrive_delay"
+CONF_LEAVE_DELAY = "leave_delay"
+CONF_DEBOUNCE = "debounce"
+CONF_RECONCILE_INTERVAL = "reconcile_interval"
+CONF_DIAGNOSTIC_SENSORS = "diagnostic_sensors"
+CONF_HISTORY_SIZE = "history_size"
+CONF_HISTORY_SENSORS = "history_sensors"
+CONF_FORECAST_SENSORS = "forecast_sensors"
+CONF_FORECAST_BOOTSTRAP = "forecast_bootstrap"
+CONF_FIRE_EVENTS = "fire_events"
+CONF_AREA_SENSORS = "area_sensors"
+CONF_AREA_CLEAR_TIMEOUT = "area_clear_timeout"
+CONF_AREA_TIMEOUTS = "area_timeouts"
+CONF_AREA = "area"
+CONF_GUEST = "guest"
+CONF_ENTITIES = "entities"
+CONF_IMPORT_PERSONS = "import_persons"
+CONF_GROUPS = "groups"
+CONF_STALE_TIMEOUTS = "stale_timeouts"
+CONF_TRACKER = "tracker"
+CONF_RELIABILITY = "reliability"
+CONF_TRACKER_RELIABILITY = "tracker_reliability"
+CONF_CONFIDENCE_ON = "confidence_on"
+CONF_CONFIDENCE_OFF = "confidence_off"
+CONF_PROBABILITY_SENSOR = "probability_sensor"
+SENSOR_PREFIX = "sensor_"
+# Version 2 entries were guests if their name contained this.
+GUEST_KEYWORD = "guest"
+
+KIND_PERSON = "person"
+KIND_DEVICE_TRACKER = "device_tracker"
+KIND_BINARY_SENSOR = "binary_sensor"
+KIND_INPUT_BOOLEAN = "input_boolean"
+KIND_INPUT_NUMBER = "input_number"
+KIND_COUNTER = "counter"
+KIND_GROUP = "group"  # only imported from, its members become people
+PERSON_KINDS = (KIND_PERSON, KIND_DEVICE_TRACKER)
+# Numeric trackers reporting how many guests are home.
+COUNT_KINDS = (KIND_INPUT_NUMBER, KIND_COUNTER)
+TRACKER_KINDS = (
+    KIND_PERSON,
+    KIND_DEVICE_TRACKER,
+    KIND_BINARY_SENSOR,
+    KIND_INPUT_BOOLEAN,
+    *COUNT_KINDS,
+)
+
+# Kinds of binary_sensor (by device class) that make an area occupied.
+AREA_KIND_MOTION = "motion"  # occupied while on, then for the clear timeout
+AREA_KIND_PRESENCE = "presence"  # mmWave and other presence/occupancy sensors, as motion
+AREA_KIND_DOOR = "door"  # every open/close is activity, occupied for the clear timeout
+AREA_DEVICE_CLASSES = {
+    "motion": AREA_KIND_MOTION,
+    "occupancy": AREA_KIND_PRESENCE,
+    "presence": AREA_KIND_PRESENCE,
+    "door": AREA_KIND_DOOR,
+}
+
+# How the trackers of one person are combined into a home/away state.
+POLICY_ANY = "any"  # home if any tracker is home
+POLICY_ALL = "all"  # home if all trackers are home
+POLICY_MAJORITY = "majority"  # home if more than half of the trackers are home
+POLICY_PRIORITY = "priority"  # the first tracker (in configured order) with a known state decides
+POLICY_WEIGHTED = "weighted"  # home by the confidence from the trackers' reliability, see below
+FUSION_POLICIES = (POLICY_ANY, POLICY_ALL, POLICY_MAJORITY, POLICY_PRIORITY, POLICY_WEIGHTED)
+
+# Chance that a tracker of a kind reports the right state, unless set per
+# tracker. Each home/away report moves the log-odds of its person being
+# home by log(r / (1 - r)).
+DEFAULT_RELIABILITY = {
+    KIND_PERSON: 0.9,
+    KIND_DEVICE_TRACKER: 0.8,
+    KIND_BINARY_SENSOR: 0.7,
+    KIND_INPUT_BOOLEAN: 0.95,
+    KIND_INPUT_NUMBER: 0.95,
+    KIND_COUNTER: 0.95,
+}
+# A weighted person arrives at this confidence and leaves at the other.
+DEFAULT_CONFIDENCE_ON = 0.7
+DEFAULT_CONFIDENCE_OFF = 0.3
+# Decimals of the confidence attribute; smaller changes do not write state.
+CONFIDENCE_PRECISION = 2
 
 ATTR_FRIENDLY_NAME = "friendly_name"
 ATTR_GUESTS = "guests"
@@ -12,6 +112,43 @@ ATTR_KNOWN_PEOPLE = "known_people"
 ATTR_LAST_TO_ARRIVE = "last_to_arrive"
 ATTR_LAST_TO_LEAVE = "last_to_leave"
 ATTR_WHO_IS_HOME = "who_is_home"
+ATTR_RECONCILIATIONS = "reconciliations"
+ATTR_STALE_TRACKERS = "stale_trackers"
+ATTR_CONFIDENCE = "confidence"
+
+DEFAULT_DEBOUNCE = 0.0
+# Minutes. Drift checks back off from MIN_RECONCILE_INTERVAL up to this value.
+DEFAULT_RECONCILE_INTERVAL = 60
+MIN_RECONCILE_INTERVAL = timedelta(minutes=1)
+# Seconds an area stays occupied after its last activity.
+DEFAULT_AREA_CLEAR_TIMEOUT = 300.0
+# Transitions kept in the on-entity history.
+DEFAULT_HISTORY_SIZE = 1000
+# Weeks of recorder history the forecast is seeded from.
+FORECAST_BOOTSTRAP_WEEKS = 8
+
+# Fired with the delta of every state write, if enabled.
+EVENT_OCCUPANCY_CHANGED = f"{DOMAIN}_changed"
+ATTR_ARRIVED = "arrived"
+ATTR_LEFT = "left"
+ATTR_OCCUPIED = "occupied"
+ATTR_OCCUPANCY_CHANGED = "occupancy_changed"
+
+SERVICE_GET_HISTORY = "get_history"
+ATTR_LIMIT = "limit"
+
+# Objects shared by all config entries, stored in hass.data[DOMAIN].
+DATA_ZONES = "zones"
+DATA_DISPATCHER = "dispatcher"
+DATA_SCHEDULER = "scheduler"
+DATA_AREAS = "areas"
+# Per config entry, stored next to its config in hass.data[DOMAIN][entry_id].
+DATA_ENTITY = "entity"
+DATA_STATS = "stats"
+DATA_HISTORY = "history"
+DATA_FORECAST = "forecast"
+# Sent with the entry_id whenever the occupancy binary_sensor writes its state.
+SIGNAL_OCCUPANCY_WRITTEN = f"{DOMAIN}_occupancy_written_{{}}"
 
 VERSION = "0.2.0"
 
@@ -0,0 +1,301 @@
+"""Occupancy model of the Home Occupancy binary_sensor, without Home Assistant."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from .const import AWAY_STATES, CONF_STALE_TIMEOUTS, CONFIDENCE_PRECISION, HOME_STATES
+from .engine import OccupancyEngine, StateClassifier, parse_count
+from .index import PresenceIndex
+
+
+class OccupancyCore:
+    """Occupancy of one home, fed with the raw states of its trackers.
+
+    Combines the tracker index, the state classification and the engine,
+    and keeps what the sensor reports on top of them: the last person to
+    arrive and to leave, and the arrivals and departures since the last
+    ``take_delta``. ``version`` is bumped on every change to any of it, so
+    readers can cache what they build from the model.
+
+    It neither imports Home Assistant nor keeps time. Grace periods are
+    scheduled by the caller: ``feed`` returns the person whose trackers
+    changed their mind, ``delay`` how long to wait, and ``commit`` lets the
+    person arrive or leave. Likewise the caller tracks how long ago each
+    tracker reported, against ``stale_after``, and calls ``set_stale``.
+
+    ``confidence``, the probability that anyone is home, is kept rounded to
+    CONFIDENCE_PRECISION so that small moves do not bump the version.
+    ``occupied``, the household state, follows it with hysteresis once
+    tracker reliabilities are set or anyone has the weighted policy, and
+    is ``anyone_home`` otherwise.
+    """
+
+    __slots__ = (
+        "index",
+        "engine",
+        "classifier",
+        "zones",
+        "states",
+        "version",
+        "last_to_arrive",
+        "last_to_leave",
+        "confidence",
+        "_occupied",
+        "track_delta",
+        "stale_timeouts",
+        "stale",
+        "arrived",
+        "left",
+        "_restored",
+    )
+
+    def __init__(
+            self,
+            index: PresenceIndex,
+            track_delta: bool = False,
+            stale_timeouts: Mapping[str, float] | None = None,
+    ) -> None:
+        self.index = index
+        self.engine = OccupancyEngine(
+            index.people, index.confidence_on, index.confidence_off, index.weighted
+        )
+        self.classifier = StateClassifier(HOME_STATES, AWAY_STATES)
+        # Zone names, which count as away states.
+        self.zones: frozenset[str] = frozenset()
+        # Last raw state fed in for each tracker.
+        self.states: dict[str, str | None] = {}
+        self.version = 0
+        self.last_to_arrive: str | None = None
+        self.last_to_leave: str | None = None
+        self.confidence = round(self.engine.household_confidence, CONFIDENCE_PRECISION)
+        self._occupied = self.engine.occupied
+        # Collect arrivals and departures for take_delta.
+        self.track_delta = track_delta
+        # Seconds without a report after which a tracker of a kind is stale,
+        # and the stale trackers (an ordered set).
+        self.stale_timeouts: dict[str, float] = {
+            kind: timeout for kind, timeout in (stale_timeouts or {}).items() if timeout
+        }
+        self.stale: dict[str, None] = {}
+        self.arrived: list[str] = []
+        self.left: list[str] = []
+        # Trackers restored from the last run, until the first resync.
+        self._restored: frozenset[str] = frozenset()
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], track_delta: bool = False) -> OccupancyCore:
+        """Build the model of config entry data (merged with options)."""
+        # The options store the stale timeouts in minutes.
+        stale_timeouts = {
+            kind: minutes * 60 for kind, minutes in config.get(CONF_STALE_TIMEOUTS, {}).items()
+        }
+        return cls(PresenceIndex.from_config(config), track_delta, stale_timeouts)
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self.index
+
+    @property
+    def anyone_home(self) -> bool:
+        """Return True if at least one person, guests included, is home."""
+        return self.engine.anyone_home
+
+    @property
+    def occupied(self) -> bool:
+        """Return True if the home is occupied, by the household confidence if it is weighted."""
+        return self.engine.occupied
+
+    @property
+    def who_is_home(self) -> tuple[str, ...]:
+        """Return the names of the people (not guests) at home, in order of arrival."""
+        return self.engine.who_is_home
+
+    @property
+    def guest_count(self) -> int | None:
+        """Return the number of guests home, or None if no guests are configured."""
+        return self.engine.guest_count if self.engine.has_guests else None
+
+    @property
+    def stale_trackers(self) -> tuple[str, ...] | None:
+        """Return the trackers left out for being stale, or None if staleness is off."""
+        return tuple(self.stale) if self.stale_timeouts else None
+
+    def stale_after(self, entity_id: str) -> float | None:
+        """Return the seconds without a report after which a tracker is stale, or None."""
+        return self.stale_timeouts.get(self.index[entity_id].kind)
+
+    def set_stale(self, entity_id: str, stale: bool) -> int | None:
+        """Leave a tracker out of fusion while it is stale, or bring it back.
+
+        Return the position of the person as ``feed`` does.
+        """
+        if stale == (entity_id in self.stale):
+            return None
+        if stale:
+            self.stale[entity_id] = None
+        else:
+            del self.stale[entity_id]
+        self.version += 1
+        person = self.engine.set_live(entity_id, not stale)
+        self._update_confidence()
+        return person
+
+    def set_zones(self, zones: Iterable[str]) -> list[int]:
+        """Include the names of all zones in the away states.
+
+        The last state of every tracker is classified again, so a zone that
+        was added, removed or renamed applies right away. Return the people
+        whose fused state changed; the caller commits them as after ``feed``.
+        """
+        zones = frozenset(zones)
+        if zones == self.zones:
+            return []
+        old_classifier = self.classifier
+        self.zones = zones
+        self.classifier = StateClassifier(HOME_STATES, AWAY_STATES | zones)
+        self.version += 1
+        people: dict[int, None] = {}
+        for entity_id, state in self.states.items():
+            if entity_id in self.index.count_entity_ids:
+                continue
+            presence = self.classifier.classify(state)
+            if presence == old_classifier.classify(state):
+                continue
+            if (person := self.engine.update(entity_id, presence)) is not None:
+                people[person] = None
+        self._update_confidence()
+        return list(people)
+
+    def feed(self, entity_id: str, state: str | None) -> int | None:
+        """Apply the raw state of a tracker.
+
+        Return the position of the person if the fused state of their
+        trackers changed; the caller commits it now or after ``delay``. A
+        change of the number of guests alone bumps the version and returns
+        None, as does a state that changes nothing.
+        """
+        old_state = self.states.get(entity_id)
+        self.states[entity_id] = state
+        if entity_id in self.index.count_entity_ids:
+            old_count = parse_count(old_state)
+            new_count = parse_count(state)
+            if old_count == new_count:
+                return None
+            guests = self.engine.guest_count
+            person = self.engine.update_count(entity_id, new_count)
+            if self.engine.guest_count != guests:
+                self.version += 1
+            self._update_confidence()
+            return person
+
+        # Attribute-only updates and e.g. zone -> not_home are not transitions.
+        if self.classifier.classify(old_state) == self.classifier.classify(state):
+            return None
+        # Only the person the tracker belongs to is re-evaluated.
+        person = self.engine.update(entity_id, self.classifier.classify(state))
+        self._update_confidence()
+        return person
+
+    def delay(self, person: int) -> float | None:
+        """Return the grace period of the pending transition of a person, or None if there is none."""
+        arriving = self.engine.is_fused_home(person)
+        if arriving == self.engine.is_home(person):
+            return None
+        config = self.index.people[person]
+        return config.arrive_delay if arriving else config.leave_delay
+
+    def commit(self, person: int) -> bool:
+        """Let a person arrive or leave. Return True if they did."""
+        if not self.engine.commit(person):
+            return False
+        self.version += 1
+        name = self.engine.names[person]
+        if self.engine.is_home(person):
+            self.last_to_arrive = name
+        else:
+            self.last_to_leave = name
+        self._record_delta(person)
+        self._update_confidence()
+        return True
+
+    def resync(self, states: Iterable[tuple[str, str | None]]) -> list[int]:
+        """Apply the raw state of every tracker and commit without grace periods.
+
+        Trackers still in the state they were restored with are skipped.
+        Return the people whose fused state changed.
+        """
+        restored, self._restored = self._restored, frozenset()
+        guests = self.engine.guest_count
+        people = []
+        committed = False
+        for entity_id, state in states:
+            if entity_id in restored and self.states.get(entity_id) == state:
+                continue
+            self.states[entity_id] = state
+            if entity_id in self.index.count_entity_ids:
+                person = self.engine.update_count(entity_id, parse_count(state))
+            else:
+                person = self.engine.update(entity_id, self.classifier.classify(state))
+            if person is not None:
+                people.append(person)
+                if self.engine.commit(person):
+                    committed = True
+                    self._record_delta(person)
+        if committed or self.engine.guest_count != guests:
+            self.version += 1
+        self._update_confidence()
+        return people
+
+    def take_delta(self) -> tuple[list[str], list[str]]:
+        """Return who arrived and who left since the last call."""
+        arrived, left = self.arrived, self.left
+        self.arrived, self.left = [], []
+        return arrived, left
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable copy of the model, for ``restore``."""
+        return {
+            "trackers": dict(self.states),
+            "who_is_home": list(self.engine.who_is_home),
+            "last_to_arrive": self.last_to_arrive,
+            "last_to_leave": self.last_to_leave,
+            "zones": sorted(self.zones),
+        }
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """Seed a new model with the tracker states and arrival order saved with as_dict.
+
+        Raise KeyError, TypeError or ValueError if the data is malformed.
+        """
+        self.set_zones(data["zones"])
+        for entity_id, state in data["trackers"].items():
+            if entity_id in self.index:
+                self.feed(entity_id, state)
+        # Committing in the stored order restores who_is_home as it was.
+        positions = {name: person for person, name in enumerate(self.engine.names)}
+        order = [positions[name] for name in data["who_is_home"] if name in positions]
+        for person in (*order, *range(len(self.engine.names))):
+            self.engine.commit(person)
+
+        self._restored = frozenset(self.states)
+        self.last_to_arrive = data["last_to_arrive"]
+        self.last_to_leave = data["last_to_leave"]
+        self.version += 1
+        self._update_confidence()
+
+    def _update_confidence(self) -> None:
+        """Bump the version if the rounded confidence or the household state changed."""
+        confidence = round(self.engine.household_confidence, CONFIDENCE_PRECISION)
+        if confidence != self.confidence or self.engine.occupied != self._occupied:
+            self.confidence = confidence
+            self._occupied = self.engine.occupied
+            self.version += 1
+
+    def _record_delta(self, person: int) -> None:
+        """Remember an arrival or departure for take_delta."""
+        if self.track_delta:
+            if self.engine.is_home(person):
+                self.arrived.append(self.engine.names[person])
+            else:
+                self.left.append(self.engine.names[person])
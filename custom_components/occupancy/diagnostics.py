@@ -0,0 +1,34 @@
+"""Diagnostics support for Home Occupancy."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_ENTITY, DATA_STATS, DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+        hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    config = hass.data[DOMAIN][entry.entry_id]
+    diagnostics: dict[str, Any] = {
+        "data": dict(entry.data),
+        "options": dict(entry.options),
+        "stats": config[DATA_STATS].as_dict(),
+    }
+    if (entity := config.get(DATA_ENTITY)) is not None:
+        diagnostics["entity"] = {
+            "entity_id": entity.entity_id,
+            "state": entity.is_on,
+            "tracked_entities": len(entity.presence_sensors),
+            "people": len(entity.core.index.people),
+            "people_home": entity.core.engine.home_count,
+            "pending_transitions": entity.pending_transitions,
+            "queued_changes": entity.queued_changes,
+            "stale_trackers": len(entity.core.stale),
+        }
+    return diagnostics
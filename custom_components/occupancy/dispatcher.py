@@ -0,0 +1,76 @@
+"""Presence dispatcher shared by all Home Occupancy entities."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .const import DATA_DISPATCHER, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+PresenceListener = Callable[[Event], None]
+
+
+@callback
+def async_get_dispatcher(hass: HomeAssistant) -> PresenceDispatcher:
+    """Return the presence dispatcher, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (dispatcher := domain_data.get(DATA_DISPATCHER)) is None:
+        dispatcher = domain_data[DATA_DISPATCHER] = PresenceDispatcher(hass)
+    return dispatcher
+
+
+class PresenceDispatcher:
+    """Own one state change subscription per tracked entity.
+
+    Several config entries often track the same person.* entities. Instead of
+    every occupancy entity subscribing on its own, listeners register here and
+    a reverse index (entity_id -> listeners) fans each change out to the
+    entities interested in it.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._listeners: dict[str, list[PresenceListener]] = {}
+        self._unsubs: dict[str, CALLBACK_TYPE] = {}
+
+    @property
+    def tracked_entity_ids(self) -> list[str]:
+        """Return the entity_ids with an active subscription."""
+        return list(self._unsubs)
+
+    @callback
+    def async_subscribe(self, entity_ids: Iterable[str], listener: PresenceListener) -> CALLBACK_TYPE:
+        """Send state changes of ``entity_ids`` to ``listener``. Return a function to unsubscribe."""
+        entity_ids = list(dict.fromkeys(entity_ids))
+        for entity_id in entity_ids:
+            if (listeners := self._listeners.get(entity_id)) is None:
+                listeners = self._listeners[entity_id] = []
+                self._unsubs[entity_id] = async_track_state_change_event(
+                    self.hass, entity_id, self._async_dispatch
+                )
+            listeners.append(listener)
+
+        @callback
+        def unsubscribe() -> None:
+            for entity_id in entity_ids:
+                listeners = self._listeners[entity_id]
+                listeners.remove(listener)
+                if not listeners:
+                    del self._listeners[entity_id]
+                    self._unsubs.pop(entity_id)()
+
+        return unsubscribe
+
+    @callback
+    def _async_dispatch(self, event: Event) -> None:
+        """Fan a state change out to the interested listeners."""
+        for listener in self._listeners.get(event.data["entity_id"], ()):
+            try:
+                listener(event)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error handling state change of %s", event.data["entity_id"])
@@ -0,0 +1,419 @@
+"""Incremental occupancy model used by the Home Occupancy binary_sensor."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+import math
+
+from .const import (
+    DEFAULT_CONFIDENCE_OFF,
+    DEFAULT_CONFIDENCE_ON,
+    POLICY_ALL,
+    POLICY_MAJORITY,
+    POLICY_PRIORITY,
+    POLICY_WEIGHTED,
+    PRESENCE_AWAY,
+    PRESENCE_HOME,
+    PRESENCE_UNAVAILABLE,
+    PRESENCE_UNKNOWN,
+    STATE_UNAVAILABLE,
+)
+from .index import Person, default_reliability
+
+
+class StateClassifier:
+    """Map raw entity states to a presence class using set lookups."""
+
+    __slots__ = ("home_states", "away_states")
+
+    def __init__(self, home_states: Iterable[str], away_states: Iterable[str]) -> None:
+        self.home_states: frozenset[str] = frozenset(home_states)
+        self.away_states: frozenset[str] = frozenset(away_states) - self.home_states
+
+    def classify(self, state: str | None) -> str:
+        """Return the presence class of a raw state.
+
+        A missing state (the entity was removed) counts as unavailable. States
+        that are neither home nor a known away state are unknown.
+        """
+        if state is None:
+            return PRESENCE_UNAVAILABLE
+        if state in self.home_states:
+            return PRESENCE_HOME
+        if state in self.away_states:
+            return PRESENCE_AWAY
+        if state == STATE_UNAVAILABLE:
+            return PRESENCE_UNAVAILABLE
+        return PRESENCE_UNKNOWN
+
+
+# Slack when comparing log-odds with the thresholds, as a sum kept up to date
+# by differences may miss a threshold it equals, e.g. 0.7 of a single tracker
+# with reliability 0.7, by a rounding error.
+LOG_ODDS_TOLERANCE = 1e-9
+
+
+def _sigmoid(logit: float) -> float:
+    """Return the probability of a log-odds value."""
+    if logit >= 0:
+        return 1 / (1 + math.exp(-logit))
+    odds = math.exp(logit)
+    return odds / (1 + odds)
+
+
+def logit(probability: float) -> float:
+    """Return the log-odds of a probability."""
+    return math.log(probability / (1 - probability))
+
+
+def tracker_weight(reliability: float) -> float:
+    """Return how far one report of a tracker moves the log-odds of its person being home."""
+    # Reliability below 0.5 would turn reports around, 1 would be certainty.
+    return logit(min(max(reliability, 0.5), 0.999))
+
+
+def parse_count(state: str | None) -> int | None:
+    """Return the number reported by a count tracker, or None if it is not a number."""
+    if state is None:
+        return None
+    try:
+        return max(int(float(state)), 0)
+    except (ValueError, OverflowError):
+        return None
+
+
+class OccupancyEngine:
+    """Keep track of who is home from single-tracker transitions.
+
+    Every tracker owns one bit in the ``home`` and ``known`` masks of its
+    person. A transition only touches that bit and re-applies the person's
+    fusion policy to the masks, so the cost of an update depends neither on
+    the number of people nor on the number of trackers.
+
+    The fused state of a person only becomes their home/away state once it
+    is committed, which lets the caller hold transitions back for a grace
+    period.
+
+    Guests are counted rather than named: a guest at home counts as the
+    number reported by their count trackers (input_number/counter), or as
+    one guest without them. The count is kept up to date on every
+    transition instead of being summed when read.
+
+    Trackers marked stale drop out of the ``live`` mask and are left out of
+    fusion, as if the person did not have them.
+
+    Alongside the masks, every live tracker adds evidence to the log-odds
+    of its person being home: plus its weight when home, minus it when away,
+    nothing while unknown. A transition adds the difference to the sum of
+    its person, so the confidence of a person is read, not summed. The
+    weighted policy turns it into home/away with hysteresis.
+
+    The household confidence is that of the most likely person home among
+    those with a live, known tracker; people without evidence are left
+    out rather than counted at even odds. While a person has a transition
+    pending, the household keeps their log-odds from before it, so grace
+    periods hold the household back as well. For a ``weighted`` household,
+    ``occupied`` turns the household confidence into the household state
+    with the same hysteresis, so the state never contradicts the
+    confidence. Otherwise the home is occupied while anyone is home, as
+    decided by the fusion policies.
+    """
+
+    __slots__ = (
+        "names",
+        "_guest",
+        "_policy",
+        "_home_mask",
+        "_known_mask",
+        "_live_mask",
+        "_weight",
+        "_evidence",
+        "_log_odds",
+        "_settled",
+        "_log_odds_on",
+        "_log_odds_off",
+        "_household_on",
+        "_household_off",
+        "household_log_odds",
+        "_household_person",
+        "weighted",
+        "_occupied",
+        "_fused",
+        "_home",
+        "_count",
+        "_guests",
+        "_tracker_count",
+        "_slots",
+        "has_guests",
+        "home_count",
+        "guest_count",
+        "_who_is_home",
+    )
+
+    def __init__(
+            self,
+            people: Iterable[Person],
+            confidence_on: float = DEFAULT_CONFIDENCE_ON,
+            confidence_off: float = DEFAULT_CONFIDENCE_OFF,
+            weighted: bool = False,
+    ) -> None:
+        self.names: list[str] = []
+        self._guest: list[bool] = []
+        self._policy: list[str] = []
+        self._home_mask: list[int] = []
+        self._known_mask: list[int] = []
+        self._live_mask: list[int] = []
+        # Log-odds weight and current evidence of each tracker, the log-odds
+        # of each person being home, and those the household goes by (minus
+        # infinity without evidence).
+        self._weight: dict[str, float] = {}
+        self._evidence: dict[str, float] = {}
+        self._log_odds: list[float] = []
+        self._settled: list[float] = []
+        # The confidence thresholds of each person and of the household, as log-odds.
+        self._log_odds_on: list[float] = []
+        self._log_odds_off: list[float] = []
+        self._household_on = logit(confidence_on) - LOG_ODDS_TOLERANCE
+        self._household_off = logit(confidence_off) + LOG_ODDS_TOLERANCE
+        # Result of the fusion policy, and the committed home/away state.
+        self._fused: list[bool] = []
+        self._home: list[bool] = []
+        # Sum of the count trackers of each person, and the guests they add
+        # to guest_count.
+        self._count: list[int] = []
+        self._guests: list[int] = []
+        # Last value of each count tracker.
+        self._tracker_count: dict[str, int] = {}
+        # entity_id -> (person, bit)
+        self._slots: dict[str, tuple[int, int]] = {}
+        for person in people:
+            position = len(self.names)
+            self.names.append(person.name)
+            self._guest.append(person.guest)
+            self._policy.append(person.policy)
+            self._home_mask.append(0)
+            self._known_mask.append(0)
+            self._live_mask.append((1 << len(person.entity_ids)) - 1)
+            self._log_odds.append(0.0)
+            self._settled.append(-math.inf)
+            self._log_odds_on.append(logit(person.confidence_on) - LOG_ODDS_TOLERANCE)
+            self._log_odds_off.append(logit(person.confidence_off) + LOG_ODDS_TOLERANCE)
+            self._fused.append(False)
+            self._home.append(False)
+            self._count.append(0)
+            self._guests.append(0)
+            for bit, entity_id in enumerate(person.entity_ids):
+                self._slots[entity_id] = (position, 1 << bit)
+                self._weight[entity_id] = tracker_weight(
+                    person.reliability[bit] if person.reliability
+                    else default_reliability(entity_id)
+                )
+                self._evidence[entity_id] = 0.0
+
+        self.has_guests = any(self._guest)
+        # The highest settled log-odds, the person they belong to, and the
+        # household state by them.
+        self.household_log_odds = -math.inf
+        self._household_person = -1
+        self.weighted = weighted
+        self._occupied = False
+        self.home_count = 0
+        # Number of guests home.
+        self.guest_count = 0
+        # Ordered set (dicts keep insertion order) of people at home.
+        self._who_is_home: dict[int, str] = {}
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self._slots
+
+    @property
+    def entity_ids(self) -> list[str]:
+        """Return the tracked entity_ids in configuration order."""
+        return list(self._slots)
+
+    @property
+    def anyone_home(self) -> bool:
+        """Return True if at least one person, guests included, is home."""
+        return self.home_count != 0
+
+    @property
+    def who_is_home(self) -> tuple[str, ...]:
+        """Return the names of the people (not guests) at home, in order of arrival."""
+        return tuple(self._who_is_home.values())
+
+    def is_home(self, person: int) -> bool:
+        """Return True if the person is currently home."""
+        return self._home[person]
+
+    def is_fused_home(self, person: int) -> bool:
+        """Return True if the trackers of the person say they are home."""
+        return self._fused[person]
+
+    def confidence(self, person: int) -> float:
+        """Return the probability that the person is home, from the evidence of their trackers."""
+        return _sigmoid(self._log_odds[person])
+
+    @property
+    def occupied(self) -> bool:
+        """Return True if the home is occupied: by the household confidence if weighted, else if anyone is home."""
+        return self._occupied if self.weighted else self.home_count != 0
+
+    @property
+    def household_confidence(self) -> float:
+        """Return the probability that anyone is home, or 0 if no tracker gives evidence."""
+        return _sigmoid(self.household_log_odds)
+
+    def update(self, entity_id: str, presence: str) -> int | None:
+        """Apply the presence class of one tracker.
+
+        Return the position of the person if the fused state of their
+        trackers changed. It still has to be committed.
+        """
+        if (slot := self._slots.get(entity_id)) is None:
+            return None
+        person, bit = slot
+
+        if presence == PRESENCE_HOME:
+            self._home_mask[person] |= bit
+        else:
+            self._home_mask[person] &= ~bit
+        if presence in (PRESENCE_HOME, PRESENCE_AWAY):
+            self._known_mask[person] |= bit
+        else:
+            self._known_mask[person] &= ~bit
+
+        self._weigh(entity_id, person, bit)
+        changed = self._refuse(person)
+        self._settle(person)
+        return changed
+
+    def set_live(self, entity_id: str, live: bool) -> int | None:
+        """Include a tracker in fusion, or leave it out while it is stale.
+
+        Return the position of the person as ``update`` does.
+        """
+        if (slot := self._slots.get(entity_id)) is None:
+            return None
+        person, bit = slot
+        if live:
+            self._live_mask[person] |= bit
+        else:
+            self._live_mask[person] &= ~bit
+        self._weigh(entity_id, person, bit)
+        changed = self._refuse(person)
+        self._settle(person)
+        return changed
+
+    def _weigh(self, entity_id: str, person: int, bit: int) -> None:
+        """Bring the evidence of one tracker in line with its bits, updating the log-odds sums."""
+        if not self._live_mask[person] & self._known_mask[person] & bit:
+            evidence = 0.0
+        elif self._home_mask[person] & bit:
+            evidence = self._weight[entity_id]
+        else:
+            evidence = -self._weight[entity_id]
+        if (old := self._evidence[entity_id]) == evidence:
+            return
+        self._evidence[entity_id] = evidence
+        self._log_odds[person] += evidence - old
+
+    def _settle(self, person: int) -> None:
+        """Pass the log-odds of a person on to the household, unless a transition of theirs is pending."""
+        if self._fused[person] != self._home[person]:
+            return
+        if self._live_mask[person] & self._known_mask[person]:
+            log_odds = self._log_odds[person]
+        else:
+            log_odds = -math.inf
+        if log_odds == self._settled[person]:
+            return
+        self._settled[person] = log_odds
+        if log_odds >= self.household_log_odds:
+            self.household_log_odds = log_odds
+            self._household_person = person
+        elif person == self._household_person:
+            # Only a drop of the most likely person needs a look at everyone.
+            self.household_log_odds, self._household_person = max(
+                zip(self._settled, range(len(self._settled)))
+            )
+        # Between the thresholds, the household stays as it is.
+        household = self.household_log_odds
+        self._occupied = household >= self._household_on or (
+            self._occupied and household > self._household_off
+        )
+
+    def _refuse(self, person: int) -> int | None:
+        """Re-apply the fusion policy of a person. Return them if the result changed."""
+        is_home = self._fuse(person)
+        if is_home == self._fused[person]:
+            return None
+        self._fused[person] = is_home
+        return person
+
+    def update_count(self, entity_id: str, count: int | None) -> int | None:
+        """Apply the number reported by a count tracker.
+
+        The tracker counts as home while the number is above zero. Return
+        the position of the person as ``update`` does; guest_count may
+        change either way.
+        """
+        if (slot := self._slots.get(entity_id)) is None:
+            return None
+        person = slot[0]
+        value = count or 0
+        self._count[person] += value - self._tracker_count.get(entity_id, 0)
+        self._tracker_count[entity_id] = value
+        self._update_guests(person)
+        if count is None:
+            presence = PRESENCE_UNKNOWN
+        else:
+            presence = PRESENCE_HOME if count else PRESENCE_AWAY
+        return self.update(entity_id, presence)
+
+    def commit(self, person: int) -> bool:
+        """Make the fused state of a person their home/away state.
+
+        Return True if the person arrived or left.
+        """
+        is_home = self._fused[person]
+        if is_home == self._home[person]:
+            return False
+
+        self._home[person] = is_home
+        delta = 1 if is_home else -1
+        self.home_count += delta
+        if self._guest[person]:
+            self._update_guests(person)
+        elif is_home:
+            self._who_is_home[person] = self.names[person]
+        else:
+            self._who_is_home.pop(person, None)
+        self._settle(person)
+        return True
+
+    def _update_guests(self, person: int) -> None:
+        """Bring guest_count in line with a guest's home state and count."""
+        guests = max(self._count[person], 1) if self._guest[person] and self._home[person] else 0
+        self.guest_count += guests - self._guests[person]
+        self._guests[person] = guests
+
+    def _fuse(self, person: int) -> bool:
+        """Combine the tracker bits of a person according to their policy."""
+        live = self._live_mask[person]
+        home = self._home_mask[person] & live
+        policy = self._policy[person]
+        if policy == POLICY_WEIGHTED:
+            # Between the thresholds, the person stays as they are.
+            log_odds = self._log_odds[person]
+            if log_odds >= self._log_odds_on[person]:
+                return True
+            return self._fused[person] and log_odds > self._log_odds_off[person]
+        if policy == POLICY_ALL:
+            return live != 0 and home == live
+        if policy == POLICY_MAJORITY:
+            return home.bit_count() * 2 > live.bit_count()
+        if policy == POLICY_PRIORITY:
+            known = self._known_mask[person] & live
+            # The lowest bit is the tracker listed first.
+            return bool(home & known & -known)
+        return home != 0
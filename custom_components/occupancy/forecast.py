@@ -0,0 +1,227 @@
+"""Per-person weekly arrival/departure histograms with precomputed next-transition estimates."""
+
+from __future__ import annotations
+
+from array import array
+from itertools import accumulate
+import math
+from typing import Any
+
+DAYS_PER_WEEK = 7
+BUCKET_SECONDS = 15 * 60
+BUCKETS_PER_DAY = 24 * 60 * 60 // BUCKET_SECONDS
+SLOTS_PER_WEEK = DAYS_PER_WEEK * BUCKETS_PER_DAY
+# Once a weekday has passed this often, its counts and days are halved, so
+# the histograms follow changes of routine.
+MAX_WEEKS = 12
+# Offset stored for people who have too few transitions for an estimate.
+NO_ESTIMATE = -1
+# The estimate is the median time until the next transition: when the
+# expected number of transitions since now reaches log(2).
+MEDIAN_RATE = math.log(2)
+
+ARRIVALS = 1
+DEPARTURES = 0
+
+
+def week_slot(day: int, seconds: float) -> int:
+    """Return the bucket of the week (Monday 00:00 is 0) of a date ordinal and the seconds since its midnight."""
+    bucket = min(max(int(seconds // BUCKET_SECONDS), 0), BUCKETS_PER_DAY - 1)
+    return (day - 1) % DAYS_PER_WEEK * BUCKETS_PER_DAY + bucket
+
+
+def _median_offsets(rates: list[float]) -> array:
+    """Return, for every slot, how many slots later the next transition is expected.
+
+    ``rates`` are the expected transitions per slot of a week. A two-pointer
+    walk over two weeks finds each offset, so this takes two passes over
+    the slots however many transitions were counted.
+    """
+    slots = len(rates)
+    if math.fsum(rates) < MEDIAN_RATE:
+        return array("h", [NO_ESTIMATE] * slots)
+    prefix = list(accumulate(rates * 2, initial=0.0))
+    offsets = array("h", bytes(2 * slots))
+    end = 0
+    for slot in range(slots):
+        # The current slot has partly passed, so counting starts with the next.
+        end = max(end, slot + 1)
+        while prefix[end + 1] - prefix[slot + 1] < MEDIAN_RATE and end < slot + slots:
+            end += 1
+        offsets[slot] = end - slot
+    return offsets
+
+
+class TransitionForecast:
+    """Weekly histograms of when each person arrives and leaves.
+
+    Every arrival and departure adds one to its 15-minute bucket of the week
+    (96 buckets x 7 days per person and direction, in preallocated arrays).
+    Divided by the number of such weekdays that passed since counting
+    started, with or without transitions, the buckets are the expected
+    transitions per bucket. From them, each person and direction keeps a
+    table with, for every bucket, how many buckets later the next
+    transition is expected, so an estimate is one lookup.
+
+    Recording a transition only adds to its bucket and marks the table of
+    its person and direction as outdated (all tables, once a day passed).
+    An outdated table is rebuilt from its buckets by the next estimate read
+    from it, which takes a fixed number of steps per bucket, so the
+    transitions themselves are never walked and the event path never
+    rebuilds.
+
+    As with TransitionHistory, days are passed in by the caller as ``day``
+    (a date ordinal) and ``seconds`` since local midnight.
+    """
+
+    __slots__ = (
+        "names",
+        "_numbers",
+        "_counts",
+        "_offsets",
+        "_outdated",
+        "_days",
+        "_last_day",
+        "started",
+        "bootstrapped",
+    )
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget everyone and all counts, as if nothing had been counted yet."""
+        self.names: list[str] = []
+        self._numbers: dict[str, int] = {}
+        # Per person and direction (person * 2 + ARRIVALS/DEPARTURES):
+        # transitions per slot of the week, and the offsets of the estimates.
+        self._counts: list[array] = []
+        self._offsets: list[array] = []
+        self._outdated: set[int] = set()
+        # Per weekday: how many passed. The date of the last day counted
+        # (0 before the first).
+        self._days = array("d", [0] * DAYS_PER_WEEK)
+        self._last_day = 0
+        # Timestamp from which transitions are counted as they happen, and
+        # whether those from before were seeded from the recorder.
+        self.started: float | None = None
+        self.bootstrapped = False
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def person(self, name: str) -> int:
+        """Return the number of a person, adding them if needed."""
+        if (number := self._numbers.get(name)) is None:
+            number = self._numbers[name] = len(self.names)
+            self.names.append(name)
+            for _direction in (DEPARTURES, ARRIVALS):
+                self._counts.append(array("d", bytes(8 * SLOTS_PER_WEEK)))
+                self._offsets.append(array("h", [NO_ESTIMATE] * SLOTS_PER_WEEK))
+        return number
+
+    def start(self, timestamp: float, day: int) -> None:
+        """Start counting transitions as they happen, from a timestamp on a date ordinal."""
+        self.started = timestamp
+        self._roll(day)
+
+    def record(self, name: str, arrived: bool, day: int, seconds: float) -> None:
+        """Count that a person arrived or left."""
+        self._roll(day)
+        table = self.person(name) * 2 + arrived
+        self._counts[table][week_slot(day, seconds)] += 1
+        self._outdated.add(table)
+
+    def count_days(self, first: int, last: int) -> None:
+        """Count the days from one date ordinal through another as passed."""
+        for day in range(first, last + 1):
+            weekday = (day - 1) % DAYS_PER_WEEK
+            self._days[weekday] += 1
+            self._age(weekday)
+        self._last_day = max(self._last_day, last)
+        self._outdated.update(range(len(self._counts)))
+
+    def _age(self, weekday: int) -> None:
+        """Halve the counts and days of a weekday for as long as it has passed too often."""
+        while self._days[weekday] > MAX_WEEKS:
+            self._days[weekday] /= 2
+            start = weekday * BUCKETS_PER_DAY
+            for counts in self._counts:
+                for slot in range(start, start + BUCKETS_PER_DAY):
+                    counts[slot] /= 2
+
+    def _roll(self, day: int) -> None:
+        """Count the days up to and including ``day`` that were not counted yet."""
+        if day > self._last_day:
+            # Days without any transition count all the same.
+            self.count_days(self._last_day + 1 if self._last_day else day, day)
+
+    def _rebuild(self, table: int) -> None:
+        """Recompute the estimates of a person and direction from their buckets."""
+        self._outdated.discard(table)
+        counts = self._counts[table]
+        rates = [
+            counts[slot] / days if (days := self._days[slot // BUCKETS_PER_DAY]) else 0.0
+            for slot in range(SLOTS_PER_WEEK)
+        ]
+        self._offsets[table] = _median_offsets(rates)
+
+    def next_transition(self, name: str, arrived: bool, day: int, seconds: float) -> int | None:
+        """Return in how many buckets, from the start of the current one, a person is expected to arrive or leave.
+
+        Return None if there are too few transitions for an estimate.
+        """
+        if (number := self._numbers.get(name)) is None:
+            return None
+        self._roll(day)
+        table = number * 2 + arrived
+        if table in self._outdated:
+            self._rebuild(table)
+        offset = self._offsets[table][week_slot(day, seconds)]
+        return None if offset == NO_ESTIMATE else offset
+
+    def merge(self, other: TransitionForecast) -> None:
+        """Add the counts of a forecast of an earlier period, e.g. one seeded from the recorder."""
+        for name, number in other._numbers.items():
+            person = self.person(name)
+            for direction in (DEPARTURES, ARRIVALS):
+                counts = self._counts[person * 2 + direction]
+                for slot, count in enumerate(other._counts[number * 2 + direction]):
+                    counts[slot] += count
+        for weekday in range(DAYS_PER_WEEK):
+            self._days[weekday] += other._days[weekday]
+            self._age(weekday)
+        self._outdated.update(range(len(self._counts)))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable copy of the histograms, keeping only the counted slots."""
+        return {
+            "names": list(self.names),
+            "counts": [
+                {slot: count for slot, count in enumerate(counts) if count}
+                for counts in self._counts
+            ],
+            "days": list(self._days),
+            "last_day": self._last_day,
+            "started": self.started,
+            "bootstrapped": self.bootstrapped,
+        }
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Load histograms saved with as_dict and recompute the estimates.
+
+        Raise KeyError, TypeError or ValueError if the data is malformed.
+        """
+        if len(data["days"]) != DAYS_PER_WEEK:
+            raise ValueError("Expected one entry per weekday")
+        self.clear()
+        for name in data["names"]:
+            self.person(name)
+        for table, counts in enumerate(data["counts"][:len(self._counts)]):
+            for slot, count in counts.items():
+                self._counts[table][int(slot)] = count
+        self._days = array("d", data["days"])
+        self._last_day = int(data["last_day"])
+        self.started = data["started"]
+        self.bootstrapped = data["bootstrapped"]
+        self._outdated.update(range(len(self._counts)))
@@ -0,0 +1,198 @@
+"""Bounded arrive/leave history with running dwell-time statistics."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterator
+from typing import Any
+
+DAYS_PER_WEEK = 7
+
+
+class TransitionHistory:
+    """Array-backed ring buffer of arrive/leave transitions.
+
+    Each transition is stored as a timestamp, a person number and a
+    direction in three preallocated arrays. Dwell time and transition counts
+    per person are kept up to date as transitions are recorded, so reading
+    them never walks the buffer (or the recorder database).
+
+    Days are passed in by the caller as ``day`` (a date ordinal) and
+    ``day_start`` (the timestamp of local midnight), which keeps this module
+    free of time zone handling.
+    """
+
+    __slots__ = (
+        "capacity",
+        "_timestamps",
+        "_people",
+        "_arrived",
+        "_start",
+        "_length",
+        "names",
+        "_numbers",
+        "_home_since",
+        "_dwell_today",
+        "_arrivals_today",
+        "_departures_today",
+        "_week_counts",
+        "_week_days",
+        "_day",
+        "_day_start",
+    )
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget all transitions and statistics, keeping the capacity."""
+        capacity = self.capacity
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._people = array("H", bytes(2 * capacity))
+        self._arrived = array("b", bytes(capacity))
+        self._start = 0
+        self._length = 0
+        self.names: list[str] = []
+        self._numbers: dict[str, int] = {}
+        # Per person: arrival time if home, seconds home and transitions today.
+        self._home_since: list[float | None] = []
+        self._dwell_today = array("d")
+        self._arrivals_today = array("L")
+        self._departures_today = array("L")
+        # Per person and weekday slot: transitions, and the day the slot is for.
+        self._week_counts = array("L")
+        self._week_days = array("l", [0] * DAYS_PER_WEEK)
+        self._day = 0
+        self._day_start = 0.0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def person(self, name: str) -> int:
+        """Return the number of a person, adding them if needed."""
+        if (number := self._numbers.get(name)) is None:
+            number = self._numbers[name] = len(self.names)
+            self.names.append(name)
+            self._home_since.append(None)
+            self._dwell_today.append(0)
+            self._arrivals_today.append(0)
+            self._departures_today.append(0)
+            self._week_counts.extend([0] * DAYS_PER_WEEK)
+        return number
+
+    def is_home(self, name: str) -> bool:
+        """Return True if the last transition of a person was an arrival."""
+        number = self._numbers.get(name)
+        return number is not None and self._home_since[number] is not None
+
+    def record(self, timestamp: float, name: str, arrived: bool, day: int, day_start: float) -> None:
+        """Record that a person arrived or left."""
+        self._roll(day, day_start)
+        person = self.person(name)
+
+        end = (self._start + self._length) % self.capacity
+        self._timestamps[end] = timestamp
+        self._people[end] = person
+        self._arrived[end] = arrived
+        if self._length < self.capacity:
+            self._length += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+        if arrived:
+            self._arrivals_today[person] += 1
+            if self._home_since[person] is None:
+                self._home_since[person] = timestamp
+        else:
+            self._departures_today[person] += 1
+            if (since := self._home_since[person]) is not None:
+                self._dwell_today[person] += max(timestamp - max(since, day_start), 0)
+                self._home_since[person] = None
+        self._week_counts[person * DAYS_PER_WEEK + day % DAYS_PER_WEEK] += 1
+
+    def _roll(self, day: int, day_start: float) -> None:
+        """Start a new day if needed."""
+        if day == self._day:
+            return
+        self._day = day
+        self._day_start = day_start
+        for person in range(len(self.names)):
+            self._dwell_today[person] = 0
+            self._arrivals_today[person] = 0
+            self._departures_today[person] = 0
+        slot = day % DAYS_PER_WEEK
+        if self._week_days[slot] != day:
+            self._week_days[slot] = day
+            for person in range(len(self.names)):
+                self._week_counts[person * DAYS_PER_WEEK + slot] = 0
+
+    def transitions(self, limit: int | None = None) -> Iterator[tuple[float, str, bool]]:
+        """Yield (timestamp, name, arrived) of the most recent transitions, newest first."""
+        count = self._length if limit is None else min(limit, self._length)
+        for offset in range(count):
+            position = (self._start + self._length - 1 - offset) % self.capacity
+            yield (
+                self._timestamps[position],
+                self.names[self._people[position]],
+                bool(self._arrived[position]),
+            )
+
+    def summary(self, name: str, now: float, day: int, day_start: float) -> dict[str, Any]:
+        """Return the statistics of one person for today and the last seven days."""
+        self._roll(day, day_start)
+        person = self.person(name)
+        dwell = self._dwell_today[person]
+        if (since := self._home_since[person]) is not None:
+            dwell += max(now - max(since, day_start), 0)
+        week = sum(
+            self._week_counts[person * DAYS_PER_WEEK + slot]
+            for slot in range(DAYS_PER_WEEK)
+            if day - DAYS_PER_WEEK < self._week_days[slot] <= day
+        )
+        return {
+            "home": since is not None,
+            "home_since": since,
+            "dwell_today": dwell,
+            "arrivals_today": self._arrivals_today[person],
+            "departures_today": self._departures_today[person],
+            "transitions_week": week,
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON serializable copy of the history and statistics."""
+        return {
+            "capacity": self.capacity,
+            "names": list(self.names),
+            "transitions": [
+                [timestamp, self._numbers[name], arrived]
+                for timestamp, name, arrived in reversed(list(self.transitions()))
+            ],
+            "home_since": list(self._home_since),
+            "dwell_today": list(self._dwell_today),
+            "arrivals_today": list(self._arrivals_today),
+            "departures_today": list(self._departures_today),
+            "week_counts": list(self._week_counts),
+            "week_days": list(self._week_days),
+            "day": self._day,
+            "day_start": self._day_start,
+        }
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Load a history saved with as_dict, keeping the newest transitions that fit."""
+        self.clear()
+        for name in data["names"]:
+            self.person(name)
+        for timestamp, person, arrived in data["transitions"][-self.capacity:]:
+            self._timestamps[self._length] = timestamp
+            self._people[self._length] = person
+            self._arrived[self._length] = arrived
+            self._length += 1
+        self._home_since = list(data["home_since"])
+        self._dwell_today = array("d", data["dwell_today"])
+        self._arrivals_today = array("L", data["arrivals_today"])
+        self._departures_today = array("L", data["departures_today"])
+        self._week_counts = array("L", data["week_counts"])
+        self._week_days = array("l", data["week_days"])
+        self._day = data["day"]
+        self._day_start = data["day_start"]
@@ -0,0 +1,238 @@
+"""Lookup structures compiled from a Home Occupancy config entry."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+
+from .const import (
+    CONF_ARRIVE_DELAY,
+    CONF_CONFIDENCE_OFF,
+    CONF_CONFIDENCE_ON,
+    CONF_FUSION_POLICY,
+    CONF_GUEST,
+    CONF_LEAVE_DELAY,
+    CONF_NAME,
+    CONF_TRACKER_RELIABILITY,
+    CONF_TRACKERS,
+    COUNT_KINDS,
+    DEFAULT_CONFIDENCE_OFF,
+    DEFAULT_CONFIDENCE_ON,
+    DEFAULT_RELIABILITY,
+    GUEST_KEYWORD,
+    PERSON_KINDS,
+    POLICY_ANY,
+    POLICY_WEIGHTED,
+    PRESENCE_SENSOR,
+    SENSOR_PREFIX,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Person:
+    """A configured person and the trackers that belong to them."""
+
+    name: str
+    entity_ids: tuple[str, ...]
+    policy: str
+    guest: bool
+    # Seconds the trackers have to agree before the person arrives/leaves.
+    arrive_delay: float = 0
+    leave_delay: float = 0
+    # Reliability of each tracker, and the confidence at which a person with
+    # the weighted policy arrives and leaves.
+    reliability: tuple[float, ...] = ()
+    confidence_on: float = DEFAULT_CONFIDENCE_ON
+    confidence_off: float = DEFAULT_CONFIDENCE_OFF
+
+
+@dataclass(frozen=True, slots=True)
+class Tracker:
+    """A configured presence sensor."""
+
+    entity_id: str
+    name: str
+    guest: bool
+    kind: str
+    # Position of the person in PresenceIndex.people
+    person: int
+
+    @property
+    def is_person(self) -> bool:
+        """Return True if the tracker reports home/not_home for a person."""
+        return self.kind in PERSON_KINDS
+
+    @property
+    def is_count(self) -> bool:
+        """Return True if the tracker reports a number of guests."""
+        return self.kind in COUNT_KINDS
+
+
+class PresenceIndex(Mapping[str, Tracker]):
+    """Immutable entity_id -> Tracker index.
+
+    Built once from the ``sensor_N`` entries of a config entry, so that the
+    hot paths only need dict lookups.
+    """
+
+    __slots__ = (
+        "_trackers",
+        "people",
+        "guest_entity_ids",
+        "count_entity_ids",
+        "confidence_on",
+        "confidence_off",
+        "weighted",
+    )
+
+    def __init__(
+            self,
+            people: tuple[Person, ...],
+            confidence_on: float = DEFAULT_CONFIDENCE_ON,
+            confidence_off: float = DEFAULT_CONFIDENCE_OFF,
+            weighted: bool = False,
+    ) -> None:
+        self.people = people
+        # The confidence at which the household turns occupied and vacant,
+        # and whether it does (else it is occupied while anyone is home).
+        self.confidence_on = confidence_on
+        self.confidence_off = confidence_off
+        self.weighted = weighted
+        trackers: dict[str, Tracker] = {}
+        for position, person in enumerate(people):
+            for entity_id in person.entity_ids:
+                trackers[entity_id] = Tracker(
+                    entity_id=entity_id,
+                    name=person.name,
+                    guest=person.guest,
+                    kind=entity_id.split(".", 1)[0],
+                    person=position,
+                )
+        self._trackers: Mapping[str, Tracker] = MappingProxyType(trackers)
+        self.guest_entity_ids: frozenset[str] = frozenset(
+            entity_id for entity_id, tracker in self._trackers.items() if tracker.guest
+        )
+        self.count_entity_ids: frozenset[str] = frozenset(
+            entity_id for entity_id, tracker in self._trackers.items() if tracker.is_count
+        )
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> PresenceIndex:
+        """Compile the index from config entry data (merged with options).
+
+        A tracker can only belong to one person; later duplicates are ignored.
+        Tracker reliability and the confidence thresholds are global options
+        that are copied into every person. The thresholds also apply to the
+        household, once reliabilities are set or anyone has the weighted
+        policy; until then the reliabilities are only the defaults.
+        """
+        people: list[Person] = []
+        seen: set[str] = set()
+        reliability = config.get(CONF_TRACKER_RELIABILITY, {})
+        confidence_on = config.get(CONF_CONFIDENCE_ON, DEFAULT_CONFIDENCE_ON)
+        confidence_off = min(config.get(CONF_CONFIDENCE_OFF, DEFAULT_CONFIDENCE_OFF), confidence_on)
+        for key, value in config.items():
+            if not key.startswith(SENSOR_PREFIX) or not isinstance(value, Mapping):
+                continue
+            entity_ids = tuple(
+                entity_id for entity_id in dict.fromkeys(tracker_entity_ids(value))
+                if entity_id not in seen
+            )
+            if not entity_ids:
+                continue
+            seen.update(entity_ids)
+            name = str(value[CONF_NAME])
+            people.append(
+                Person(
+                    name=name,
+                    entity_ids=entity_ids,
+                    policy=value.get(CONF_FUSION_POLICY, POLICY_ANY),
+                    guest=is_guest(value),
+                    arrive_delay=value.get(CONF_ARRIVE_DELAY, 0),
+                    leave_delay=value.get(CONF_LEAVE_DELAY, 0),
+                    reliability=tuple(
+                        reliability.get(entity_id, default_reliability(entity_id))
+                        for entity_id in entity_ids
+                    ),
+                    confidence_on=confidence_on,
+                    confidence_off=confidence_off,
+                )
+            )
+        weighted = bool(reliability) or any(person.policy == POLICY_WEIGHTED for person in people)
+        return cls(tuple(people), confidence_on, confidence_off, weighted)
+
+    def __getitem__(self, entity_id: str) -> Tracker:
+        return self._trackers[entity_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._trackers)
+
+    def __len__(self) -> int:
+        return len(self._trackers)
+
+
+def tracker_entity_ids(person_config: Mapping[str, Any]) -> list[str]:
+    """Return the trackers of a ``sensor_N`` entry, in priority order."""
+    if CONF_TRACKERS in person_config:
+        return list(person_config[CONF_TRACKERS])
+    # Version 1 entries had a single presence sensor.
+    return [person_config[PRESENCE_SENSOR]]
+
+
+def default_reliability(entity_id: str) -> float:
+    """Return the reliability of a tracker that has none set, by its kind."""
+    # Kinds from before the current ones count as the least reliable.
+    return DEFAULT_RELIABILITY.get(
+        entity_id.split(".", 1)[0], min(DEFAULT_RELIABILITY.values())
+    )
+
+
+def is_guest(person_config: Mapping[str, Any]) -> bool:
+    """Return True if a ``sensor_N`` entry is a guest."""
+    if CONF_GUEST in person_config:
+        return bool(person_config[CONF_GUEST])
+    # Version 2 and older entries were guests by name.
+    return GUEST_KEYWORD in str(person_config[CONF_NAME]).lower()
+
+
+def migrate_people_v1(config: Mapping[str, Any]) -> dict[str, Any]:
+    """Convert version 1 config (one entry per tracker) to version 2 (one per person).
+
+    Version 1 ``sensor_N`` entries that share a name are merged into one person
+    with the "any" fusion policy. Other keys are kept as they are.
+    """
+    migrated: dict[str, Any] = {
+        key: value for key, value in config.items() if not key.startswith(SENSOR_PREFIX)
+    }
+    people: dict[str, dict[str, Any]] = {}
+    for key, value in config.items():
+        if not key.startswith(SENSOR_PREFIX) or not isinstance(value, Mapping):
+            continue
+        name = str(value[CONF_NAME])
+        person = people.setdefault(
+            name, {CONF_NAME: name, CONF_TRACKERS: [], CONF_FUSION_POLICY: POLICY_ANY}
+        )
+        for entity_id in tracker_entity_ids(value):
+            if entity_id not in person[CONF_TRACKERS]:
+                person[CONF_TRACKERS].append(entity_id)
+
+    for number, person in enumerate(people.values(), start=1):
+        migrated[f"{SENSOR_PREFIX}{number}"] = person
+    if "number_of_sensors" in config:
+        migrated["number_of_sensors"] = len(people)
+    return migrated
+
+
+def migrate_people_v2(config: Mapping[str, Any]) -> dict[str, Any]:
+    """Convert version 2 config to version 3, where guests are marked explicitly.
+
+    People with "guest" in their name, which version 2 treated as guests,
+    get the guest flag set. Other keys are kept as they are.
+    """
+    return {
+        key: {**value, CONF_GUEST: is_guest(value)}
+        if key.startswith(SENSOR_PREFIX) and isinstance(value, Mapping) else value
+        for key, value in config.items()
+    }
@@ -0,0 +1,500 @@
+"""Offline occupancy timelines from recorder exports.
+
+Replays the tracker history of a recorder export against a Home Occupancy
+config entry, without Home Assistant, and computes who was home when, the
+arrive/leave transitions and when the home was occupied. States are
+classified as by the binary_sensor (zone names count as away), trackers are
+combined with the fusion policy of their person and the arrive/leave delays
+are applied.
+
+The export is read in chunks and only the rows of configured trackers are
+kept, encoded in 13 bytes each. Every one of them is kept until the end,
+so memory grows linearly with the number of tracker state changes (not
+with the size of the export): sorting and fusing them peaks at about 60
+bytes per change, some 60 MB for a million changes. Fusion and interval
+merging are vectorized with NumPy, which must be installed to use this
+module; the integration itself does not need it. Run from the repository
+root::
+
+    python -m custom_components.occupancy.replay config.json home-assistant_v2.db
+    python -m custom_components.occupancy.replay config.json history.csv --zone Work --json
+
+``config.json`` can be the diagnostics download of the config entry, or a
+JSON object with its ``sensor_N`` entries.
+"""
+
+from __future__ import annotations
+
+import argparse
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
+import csv
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import json
+import sqlite3
+import sys
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .const import (
+    AWAY_STATES,
+    HOME_STATES,
+    POLICY_ALL,
+    POLICY_MAJORITY,
+    POLICY_PRIORITY,
+    POLICY_WEIGHTED,
+    PRESENCE_AWAY,
+    PRESENCE_HOME,
+    ZONE_DOMAIN,
+    ZONE_HOME,
+)
+from .engine import LOG_ODDS_TOLERANCE, StateClassifier, logit, parse_count, tracker_weight
+from .index import Person, PresenceIndex, default_reliability
+
+DEFAULT_CHUNK_SIZE = 100_000
+# Presence codes of the encoded rows.
+CODE_HOME = 1
+CODE_AWAY = 0
+CODE_UNKNOWN = -1
+PRESENCE_CODES = {PRESENCE_HOME: CODE_HOME, PRESENCE_AWAY: CODE_AWAY}
+
+Row = tuple[str, str | None, float]
+
+
+@dataclass(frozen=True, slots=True)
+class Timeline:
+    """Result of a replay. Times are UTC timestamps, intervals are (start, end) rows."""
+
+    start: float
+    end: float
+    people: tuple[Person, ...]
+    # Committed home intervals of each person, in the order of ``people``.
+    # The interval of a person still home at the end ends at ``end``.
+    home: tuple[Any, ...]
+    still_home: tuple[bool, ...]
+    # Intervals during which anyone, guests included, was home.
+    occupied: Any
+    # Who arrived first at the start, and who left last at the end of each
+    # occupied interval (None if it was still occupied at the end).
+    opened_by: tuple[str, ...]
+    closed_by: tuple[str | None, ...]
+
+    def transitions(self) -> list[tuple[float, str, bool]]:
+        """Return all (timestamp, name, arrived) transitions in order."""
+        transitions = []
+        for person, intervals, still_home in zip(self.people, self.home, self.still_home):
+            for arrived, left in intervals.tolist():
+                transitions.append((arrived, person.name, True))
+                transitions.append((left, person.name, False))
+            if still_home:
+                transitions.pop()
+        # Stable, so that an arrival and departure at the same time stay in order.
+        transitions.sort(key=lambda transition: transition[0])
+        return transitions
+
+
+def parse_time(value: str | float) -> float:
+    """Return a timestamp from an epoch number or an ISO 8601 string (UTC if naive)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _chunked(rows: Iterable[Row], chunk_size: int) -> Iterator[list[Row]]:
+    chunk: list[Row] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _time_key(row: Mapping[str, Any]) -> Any:
+    for key in ("last_changed", "last_changed_ts", "last_updated", "last_updated_ts"):
+        if row.get(key) not in (None, ""):
+            return row[key]
+    raise ValueError(f"No timestamp in row {row}")
+
+
+def read_csv(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[list[Row]]:
+    """Read a CSV export with entity_id, state and last_changed columns."""
+    with open(path, newline="", encoding="utf-8") as file:
+        rows = (
+            (row["entity_id"], row["state"], parse_time(_time_key(row)))
+            for row in csv.DictReader(file)
+        )
+        yield from _chunked(rows, chunk_size)
+
+
+def read_jsonl(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[list[Row]]:
+    """Read a JSON lines export with one state object per line."""
+    with open(path, encoding="utf-8") as file:
+        rows = (
+            (row["entity_id"], row["state"], parse_time(_time_key(row)))
+            for row in map(json.loads, filter(str.strip, file))
+        )
+        yield from _chunked(rows, chunk_size)
+
+
+def read_sqlite(
+        path: str, entity_ids: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[list[Row]]:
+    """Read the states of ``entity_ids`` from a recorder SQLite database."""
+    entity_ids = list(entity_ids)
+    placeholders = ", ".join("?" * len(entity_ids))
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        cursor = connection.execute(
+            "SELECT states_meta.entity_id, states.state,"
+            " COALESCE(states.last_changed_ts, states.last_updated_ts)"
+            " FROM states JOIN states_meta ON states.metadata_id = states_meta.metadata_id"
+            f" WHERE states_meta.entity_id IN ({placeholders})"
+            " ORDER BY states.last_updated_ts",
+            entity_ids,
+        )
+        while chunk := cursor.fetchmany(chunk_size):
+            yield chunk
+    finally:
+        connection.close()
+
+
+def sqlite_zone_names(path: str) -> set[str]:
+    """Return the names of all zones found in a recorder SQLite database."""
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = connection.execute(
+            "SELECT DISTINCT json_extract(state_attributes.shared_attrs, '$.friendly_name')"
+            " FROM states"
+            " JOIN states_meta ON states.metadata_id = states_meta.metadata_id"
+            " JOIN state_attributes ON states.attributes_id = state_attributes.attributes_id"
+            " WHERE states_meta.entity_id LIKE ? AND states_meta.entity_id != ?",
+            (f"{ZONE_DOMAIN}.%", ZONE_HOME),
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return set()
+    finally:
+        connection.close()
+    return {name for name, in rows if name}
+
+
+class _Rows:
+    """Compact, append-only store of the tracker rows of an export, 13 bytes per row."""
+
+    __slots__ = ("trackers", "times", "codes", "_classifier", "_counters", "_codes")
+
+    def __init__(self, classifier: StateClassifier, counters: frozenset[int]) -> None:
+        self.trackers = array("i")
+        self.times = array("d")
+        self.codes = array("b")
+        self._classifier = classifier
+        # Numbers of the guest count trackers, which are home above zero.
+        self._counters = counters
+        # Raw state -> presence code, as the same few states repeat.
+        self._codes: dict[str | None, int] = {}
+
+    def _code(self, number: int, state: str | None) -> int:
+        if number in self._counters:
+            count = parse_count(state)
+            return CODE_UNKNOWN if count is None else CODE_HOME if count else CODE_AWAY
+        if (code := self._codes.get(state)) is None:
+            code = self._codes[state] = PRESENCE_CODES.get(
+                self._classifier.classify(state), CODE_UNKNOWN
+            )
+        return code
+
+    def extend(self, chunk: list[Row], numbers: Mapping[str, int]) -> None:
+        for entity_id, state, time in chunk:
+            if (number := numbers.get(entity_id)) is None:
+                continue
+            code = self._code(number, state)
+            self.trackers.append(number)
+            self.times.append(time)
+            self.codes.append(code)
+
+
+def _fuse(person: Person, bits: Any, codes: Any) -> Any:
+    """Return the fused home state after each row of a person's trackers."""
+    rows = len(bits)
+    # State of every tracker after each row, forward filled; unknown before its first row.
+    positions = np.arange(rows)
+    states = np.full((len(person.entity_ids), rows), CODE_UNKNOWN, dtype=np.int8)
+    for bit in range(len(person.entity_ids)):
+        last = np.maximum.accumulate(np.where(bits == bit, positions, -1))
+        states[bit] = np.where(last >= 0, codes[np.maximum(last, 0)], CODE_UNKNOWN)
+    home = states == CODE_HOME
+    if person.policy == POLICY_ALL:
+        return home.all(axis=0)
+    if person.policy == POLICY_MAJORITY:
+        return home.sum(axis=0) * 2 > len(person.entity_ids)
+    if person.policy == POLICY_PRIORITY:
+        known = states != CODE_UNKNOWN
+        # The first tracker (in configured order) with a known state decides.
+        first = known.argmax(axis=0)
+        return known.any(axis=0) & home[first, positions]
+    if person.policy == POLICY_WEIGHTED:
+        return _hysteresis(person, _log_odds(person, states))
+    return home.any(axis=0)
+
+
+def _log_odds(person: Person, states: Any) -> Any:
+    """Return the log-odds of the person being home after each row, as the engine weighs them."""
+    reliability = person.reliability or tuple(map(default_reliability, person.entity_ids))
+    weights = np.array([tracker_weight(value) for value in reliability])[:, np.newaxis]
+    # Home adds the weight of a tracker, away subtracts it, unknown adds nothing.
+    return (np.where(states == CODE_HOME, weights, 0.0)
+            - np.where(states == CODE_AWAY, weights, 0.0)).sum(axis=0)
+
+
+def _hysteresis(person: Person, log_odds: Any) -> Any:
+    """Arrive at confidence_on, leave at confidence_off and otherwise keep the last state."""
+    positions = np.arange(len(log_odds))
+    arrive = log_odds >= logit(person.confidence_on) - LOG_ODDS_TOLERANCE
+    decided = arrive | (log_odds <= logit(person.confidence_off) + LOG_ODDS_TOLERANCE)
+    # The last row that decided, or -1 before the first (away).
+    last = np.maximum.accumulate(np.where(decided, positions, -1))
+    return (last >= 0) & arrive[np.maximum(last, 0)]
+
+
+def _commit(person: Person, times: Any, fused: Any, end: float) -> tuple[Any, bool]:
+    """Apply the arrive/leave delays to the fused states.
+
+    Return the (arrived, left) rows and whether the person is still home.
+
+    A fused run arrives (leaves) once it has lasted ``arrive_delay``
+    (``leave_delay``); shorter runs are flaps that are ignored. Of the runs
+    that last long enough, only those that change the committed state count.
+    """
+    # Last row per timestamp, then only the rows that change the fused state.
+    last = np.append(times[1:] != times[:-1], True)
+    times, fused = times[last], fused[last]
+    change = fused != np.append(False, fused[:-1])
+    starts, values = times[change], fused[change]
+
+    lengths = np.append(starts[1:], end) - starts
+    delays = np.where(values, person.arrive_delay, person.leave_delay)
+    # An unfinished run at the end only counts if its delay has passed.
+    lasting = lengths >= delays
+    commits, values = (starts + delays)[lasting], values[lasting]
+    toggles = values != np.append(False, values[:-1])
+    commits, values = commits[toggles], values[toggles]
+
+    arrived = commits[values]
+    left = commits[~values]
+    still_home = len(left) < len(arrived)
+    if still_home:
+        left = np.append(left, end)
+    return np.column_stack((arrived, left)), still_home
+
+
+def _merge(home: tuple[Any, ...]) -> tuple[Any, list[int], list[int]]:
+    """Merge the home intervals of everyone into occupied intervals.
+
+    Return the intervals and, for each, the person who opened and closed it.
+    """
+    if not home:
+        return np.empty((0, 2)), [], []
+    times = np.concatenate([intervals.ravel() for intervals in home])
+    owners = np.concatenate([np.full(intervals.size, number) for number, intervals in enumerate(home)])
+    steps = np.tile(np.array([1, -1]), len(times) // 2)
+    # Arrivals sort before departures at the same time, so handovers do not
+    # split an occupied interval.
+    order = np.lexsort((-steps, times))
+    times, owners, steps = times[order], owners[order], steps[order]
+    count = np.cumsum(steps)
+    opened = np.flatnonzero((steps == 1) & (count == 1))
+    closed = np.flatnonzero((steps == -1) & (count == 0))
+    intervals = np.column_stack((times[opened], times[closed]))
+    return intervals, owners[opened].tolist(), owners[closed].tolist()
+
+
+def replay(
+        config: Mapping[str, Any],
+        chunks: Iterable[list[Row]],
+        zones: Iterable[str] = (),
+        end: float | None = None,
+) -> Timeline:
+    """Compute the occupancy timeline of a config entry from chunks of state rows.
+
+    ``end`` closes intervals that are still open at the end of the export;
+    it defaults to the last row.
+    """
+    if np is None:
+        raise RuntimeError("The occupancy replay requires NumPy (pip install numpy)")
+
+    index = PresenceIndex.from_config(config)
+    classifier = StateClassifier(HOME_STATES, AWAY_STATES | frozenset(zones))
+    numbers = {entity_id: number for number, entity_id in enumerate(index)}
+    rows = _Rows(
+        classifier, frozenset(numbers[entity_id] for entity_id in index.count_entity_ids)
+    )
+    for chunk in chunks:
+        rows.extend(chunk, numbers)
+
+    trackers = np.frombuffer(rows.trackers, dtype=np.int32)
+    times = np.frombuffer(rows.times, dtype=np.float64)
+    codes = np.frombuffer(rows.codes, dtype=np.int8)
+    if end is None:
+        end = float(times.max()) if len(times) else 0.0
+    else:
+        before_end = times <= end
+        trackers, times, codes = trackers[before_end], times[before_end], codes[before_end]
+    start = float(times.min()) if len(times) else end
+
+    # Group the rows by person, in time order (exports are not always sorted).
+    owner = np.array([index[entity_id].person for entity_id in index], dtype=np.int32)
+    bit_of = np.array(
+        [index.people[index[entity_id].person].entity_ids.index(entity_id) for entity_id in index],
+        dtype=np.int32,
+    )
+    people_of_rows = owner[trackers] if len(trackers) else trackers
+    order = np.lexsort((times, people_of_rows))
+    trackers, times, codes, people_of_rows = (
+        trackers[order], times[order], codes[order], people_of_rows[order]
+    )
+    bounds = np.searchsorted(people_of_rows, np.arange(len(index.people) + 1))
+
+    home = []
+    still_home = []
+    for number, person in enumerate(index.people):
+        rows_of_person = slice(bounds[number], bounds[number + 1])
+        if bounds[number] == bounds[number + 1]:
+            home.append(np.empty((0, 2)))
+            still_home.append(False)
+            continue
+        fused = _fuse(person, bit_of[trackers[rows_of_person]], codes[rows_of_person])
+        intervals, is_home = _commit(person, times[rows_of_person], fused, end)
+        home.append(intervals)
+        still_home.append(is_home)
+
+    occupied, opened_by, closed_by = _merge(tuple(home))
+    names = [person.name for person in index.people]
+    return Timeline(
+        start=start,
+        end=end,
+        people=index.people,
+        home=tuple(home),
+        still_home=tuple(still_home),
+        occupied=occupied,
+        opened_by=tuple(names[number] for number in opened_by),
+        closed_by=tuple(
+            None if interval[1] >= end and any(still_home) else names[number]
+            for number, interval in zip(closed_by, occupied)
+        ),
+    )
+
+
+def load_config(path: str) -> dict[str, Any]:
+    """Load config entry data from a diagnostics download or a plain JSON object."""
+    with open(path, encoding="utf-8") as file:
+        config = json.load(file)
+    # Diagnostics downloads wrap the entry in "data" and "options".
+    if "data" in config and isinstance(config["data"], Mapping):
+        if "options" in config["data"]:
+            config = config["data"]
+        return {**config["data"], **config.get("options", {})}
+    return config
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def as_dict(timeline: Timeline) -> dict[str, Any]:
+    """Return a JSON serializable copy of a timeline."""
+    return {
+        "start": _isoformat(timeline.start),
+        "end": _isoformat(timeline.end),
+        "occupied": [
+            {
+                "start": _isoformat(start),
+                "end": _isoformat(end),
+                "opened_by": opened_by,
+                "closed_by": closed_by,
+            }
+            for (start, end), opened_by, closed_by in zip(
+                timeline.occupied.tolist(), timeline.opened_by, timeline.closed_by
+            )
+        ],
+        "people": {
+            person.name: {
+                "guest": person.guest,
+                "still_home": still_home,
+                "home": [[_isoformat(start), _isoformat(end)] for start, end in intervals.tolist()],
+            }
+            for person, intervals, still_home in zip(
+                timeline.people, timeline.home, timeline.still_home
+            )
+        },
+        "transitions": [
+            {"time": _isoformat(time), "name": name, "arrived": arrived}
+            for time, name, arrived in timeline.transitions()
+        ],
+    }
+
+
+def print_report(timeline: Timeline) -> None:
+    """Print a human readable summary."""
+    span = max(timeline.end - timeline.start, 1e-9)
+    occupied = float((timeline.occupied[:, 1] - timeline.occupied[:, 0]).sum())
+    print(f"{_isoformat(timeline.start)} - {_isoformat(timeline.end)}")
+    print(f"occupied {occupied / 3600:.1f} h ({occupied / span:.1%}) in {len(timeline.occupied)} intervals")
+    print(f"{'person':<24} {'hours home':>10} {'share':>7} {'arrivals':>8}")
+    for person, intervals in zip(timeline.people, timeline.home):
+        home = float((intervals[:, 1] - intervals[:, 0]).sum())
+        print(f"{person.name:<24} {home / 3600:>10.1f} {home / span:>7.1%} {len(intervals):>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("config", help="config entry JSON (diagnostics download or sensor_N object)")
+    parser.add_argument("export", help="recorder export: .csv, .jsonl or a SQLite database")
+    parser.add_argument("--format", choices=("csv", "jsonl", "sqlite"),
+                        help="export format, by default from the file extension")
+    parser.add_argument("--zone", action="append", default=[],
+                        help="name of a zone (an away state); read from SQLite databases")
+    parser.add_argument("--end", help="end of the timeline (ISO 8601), by default the last row")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--json", action="store_true", help="print the full timeline as JSON")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    export_format = args.format or {
+        "csv": "csv", "jsonl": "jsonl", "json": "jsonl"
+    }.get(args.export.rsplit(".", 1)[-1].lower(), "sqlite")
+    zones = set(args.zone)
+    if export_format == "sqlite":
+        chunks = read_sqlite(args.export, PresenceIndex.from_config(config), args.chunk_size)
+        zones |= sqlite_zone_names(args.export)
+    elif export_format == "csv":
+        chunks = read_csv(args.export, args.chunk_size)
+    else:
+        chunks = read_jsonl(args.export, args.chunk_size)
+
+    try:
+        timeline = replay(
+            config, chunks, zones, parse_time(args.end) if args.end else None
+        )
+    except RuntimeError as err:
+        sys.exit(str(err))
+    if args.json:
+        print(json.dumps(as_dict(timeline), indent=2))
+    else:
+        print_report(timeline)
+
+
+if __name__ == "__main__":
+    main()
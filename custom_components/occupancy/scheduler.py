@@ -0,0 +1,126 @@
+"""Timer heap shared by all Home Occupancy entities."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import heapq
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DATA_SCHEDULER, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> TimerHeap:
+    """Return the shared timer heap, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (scheduler := domain_data.get(DATA_SCHEDULER)) is None:
+        scheduler = domain_data[DATA_SCHEDULER] = TimerHeap(hass)
+    return scheduler
+
+
+class Timer:
+    """A pending action in the timer heap."""
+
+    __slots__ = ("when", "action", "cancelled", "_heap")
+
+    def __init__(self, heap: TimerHeap, when: float, action: Callable[[], None]) -> None:
+        self.when = when
+        self.action = action
+        self.cancelled = False
+        self._heap = heap
+
+    def cancel(self) -> None:
+        """Cancel the timer. It is dropped when it reaches the top of the heap."""
+        if not self.cancelled:
+            self.cancelled = True
+            self._heap._async_timer_cancelled()
+
+
+class TimerHeap:
+    """Run many delayed actions from a single min-heap and one HA timer.
+
+    Only the earliest deadline is scheduled with ``async_call_later``, so the
+    number of pending actions does not affect the number of timers. Cancelled
+    timers are removed lazily: each costs one O(log n) pop when it reaches the
+    top, and the heap is rebuilt once most of it has been cancelled.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._heap: list[tuple[float, int, Timer]] = []
+        self._sequence = 0
+        self._cancelled = 0
+        self._unsub: CALLBACK_TYPE | None = None
+        self._scheduled_at: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._heap) - self._cancelled
+
+    @callback
+    def async_call_later(self, delay: float, action: Callable[[], None]) -> Timer:
+        """Run ``action`` after ``delay`` seconds. Return the timer to cancel it."""
+        timer = Timer(self, self.hass.loop.time() + delay, action)
+        self._sequence += 1
+        heapq.heappush(self._heap, (timer.when, self._sequence, timer))
+        if self._scheduled_at is None or timer.when < self._scheduled_at:
+            self._async_schedule()
+        return timer
+
+    @callback
+    def _async_timer_cancelled(self) -> None:
+        self._cancelled += 1
+        if self._cancelled == len(self._heap):
+            # Nothing left to run, so no HA timer outlives the last entity.
+            self._heap.clear()
+            self._cancelled = 0
+            self._async_schedule()
+        elif self._cancelled > 32 and self._cancelled * 2 > len(self._heap):
+            self._heap = [item for item in self._heap if not item[2].cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    @callback
+    def _async_schedule(self) -> None:
+        """(Re)schedule the HA timer for the earliest live deadline."""
+        self._async_drop_cancelled()
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        if not self._heap:
+            self._scheduled_at = None
+            return
+        self._scheduled_at = self._heap[0][0]
+        self._unsub = async_call_later(
+            self.hass, max(self._scheduled_at - self.hass.loop.time(), 0), self._async_fire
+        )
+
+    @callback
+    def _async_drop_cancelled(self) -> None:
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+
+    @callback
+    def _async_fire(self, _now=None) -> None:
+        """Run every action that is due, then wait for the next deadline."""
+        self._unsub = None
+        self._scheduled_at = None
+        now = self.hass.loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, timer = heapq.heappop(self._heap)
+            if timer.cancelled:
+                self._cancelled -= 1
+                continue
+            # Mark as done so that a late cancel() is a no-op.
+            timer.cancelled = True
+            try:
+                timer.action()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error running scheduled action")
+        self._async_schedule()
+
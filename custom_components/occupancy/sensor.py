@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import logging
+
+from homeassistant import config_entries, core
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfTime
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_FORECAST_SENSORS,
+    CONF_HISTORY_SENSORS,
+    CONF_PROBABILITY_SENSOR,
+    DATA_ENTITY,
+    DATA_FORECAST,
+    DATA_HISTORY,
+    DATA_STATS,
+    DOMAIN,
+    SIGNAL_OCCUPANCY_WRITTEN,
+)
+from .forecast import BUCKET_SECONDS, TransitionForecast
+from .history import TransitionHistory
+from .index import PresenceIndex
+from .stats import OccupancyStats
+
+_LOGGER = logging.getLogger(__name__)
+
+# The counters, history statistics and forecasts are read from memory, so polling them is cheap.
+SCAN_INTERVAL = timedelta(minutes=1)
+
+
+@dataclass(frozen=True, kw_only=True)
+class OccupancyStatsSensorEntityDescription(SensorEntityDescription):
+    """Describes a diagnostic sensor of the Home Occupancy runtime counters."""
+
+    value_fn: Callable[[OccupancyStats], float | int | None]
+
+
+STATS_SENSORS: tuple[OccupancyStatsSensorEntityDescription, ...] = (
+    OccupancyStatsSensorEntityDescription(
+        key="events_received",
+        name="Events received",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.events_received,
+    ),
+    OccupancyStatsSensorEntityDescription(
+        key="events_ignored",
+        name="Events ignored",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.events_ignored,
+    ),
+    OccupancyStatsSensorEntityDescription(
+        key="state_writes",
+        name="State writes",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.state_writes,
+    ),
+    OccupancyStatsSensorEntityDescription(
+        key="writes_suppressed",
+        name="Writes suppressed",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.writes_suppressed,
+    ),
+    OccupancyStatsSensorEntityDescription(
+        key="reconciliations",
+        name="Reconciliations",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.reconciliations,
+    ),
+    OccupancyStatsSensorEntityDescription(
+        key="track_home_p99",
+        name="Event handling p99",
+        native_unit_of_measurement=UnitOfTime.MICROSECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: stats.track_home_latency.percentile(99),
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class OccupancyHistorySensorEntityDescription(SensorEntityDescription):
+    """Describes a per-person sensor of the Home Occupancy transition history."""
+
+    value_fn: Callable[[dict], float | int | None]
+
+
+HISTORY_SENSORS: tuple[OccupancyHistorySensorEntityDescription, ...] = (
+    OccupancyHistorySensorEntityDescription(
+        key="time_home_today",
+        name="Time home today",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        suggested_display_precision=0,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda summary: summary["dwell_today"] / 60,
+    ),
+    OccupancyHistorySensorEntityDescription(
+        key="arrivals_today",
+        name="Arrivals today",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda summary: summary["arrivals_today"],
+    ),
+    OccupancyHistorySensorEntityDescription(
+        key="departures_today",
+        name="Departures today",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda summary: summary["departures_today"],
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class OccupancyForecastSensorEntityDescription(SensorEntityDescription):
+    """Describes a per-person sensor of the expected next arrival or departure."""
+
+    arrived: bool
+
+
+FORECAST_SENSORS: tuple[OccupancyForecastSensorEntityDescription, ...] = (
+    OccupancyForecastSensorEntityDescription(
+        key="next_arrival",
+        name="Next arrival",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        arrived=True,
+    ),
+    OccupancyForecastSensorEntityDescription(
+        key="next_departure",
+        name="Next departure",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        arrived=False,
+    ),
+)
+
+
+async def async_setup_entry(
+        hass: core.HomeAssistant,
+        config_entry: config_entries.ConfigEntry,
+        async_add_entities,
+) -> None:
+    """Add the optional diagnostic, history, forecast and probability sensors for passed config_entry in HA."""
+    config = hass.data[DOMAIN][config_entry.entry_id]
+    sensors: list[SensorEntity] = []
+    if config.get(CONF_DIAGNOSTIC_SENSORS, False):
+        _LOGGER.debug("Setting up diagnostic sensors for Home Occupancy.")
+        stats: OccupancyStats = config[DATA_STATS]
+        sensors.extend(
+            OccupancyStatsSensor(config_entry, stats, description) for description in STATS_SENSORS
+        )
+    if config.get(CONF_HISTORY_SENSORS, False):
+        _LOGGER.debug("Setting up history sensors for Home Occupancy.")
+        history: TransitionHistory = config[DATA_HISTORY]
+        sensors.extend(
+            OccupancyHistorySensor(config_entry, history, person.name, description)
+            for person in PresenceIndex.from_config(config).people
+            for description in HISTORY_SENSORS
+        )
+    if config.get(CONF_FORECAST_SENSORS, False):
+        _LOGGER.debug("Setting up forecast sensors for Home Occupancy.")
+        forecast: TransitionForecast = config[DATA_FORECAST]
+        sensors.extend(
+            OccupancyForecastSensor(
+                config_entry, forecast, config[DATA_HISTORY], person.name, description
+            )
+            for person in PresenceIndex.from_config(config).people
+            for description in FORECAST_SENSORS
+        )
+    if config.get(CONF_PROBABILITY_SENSOR, False):
+        _LOGGER.debug("Setting up the probability sensor for Home Occupancy.")
+        sensors.append(OccupancyProbabilitySensor(config_entry, config))
+    async_add_entities(sensors)
+
+
+class OccupancyStatsSensor(SensorEntity):
+    """Diagnostic sensor exposing one of the runtime counters."""
+
+    entity_description: OccupancyStatsSensorEntityDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+            self,
+            config_entry: config_entries.ConfigEntry,
+            stats: OccupancyStats,
+            description: OccupancyStatsSensorEntityDescription,
+    ) -> None:
+        self.entity_description = description
+        self._stats = stats
+        self._attr_name = f"{config_entry.title} {description.name}"
+        self._attr_unique_id = f"{config_entry.entry_id}_{description.key}"
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the current value of the counter."""
+        return self.entity_description.value_fn(self._stats)
+
+
+class OccupancyHistorySensor(SensorEntity):
+    """Sensor exposing one statistic of a person from the transition history."""
+
+    entity_description: OccupancyHistorySensorEntityDescription
+
+    def __init__(
+            self,
+            config_entry: config_entries.ConfigEntry,
+            history: TransitionHistory,
+            person: str,
+            description: OccupancyHistorySensorEntityDescription,
+    ) -> None:
+        self.entity_description = description
+        self._history = history
+        self._person = person
+        self._attr_name = f"{person} {description.name}"
+        self._attr_unique_id = f"{config_entry.entry_id}_{person}_{description.key}"
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the current value of the statistic."""
+        now = dt_util.now()
+        summary = self._history.summary(
+            self._person,
+            now.timestamp(),
+            now.date().toordinal(),
+            dt_util.start_of_local_day(now).timestamp(),
+        )
+        return self.entity_description.value_fn(summary)
+
+
+class OccupancyForecastSensor(SensorEntity):
+    """Sensor exposing when a person is expected to arrive (while away) or leave (while home)."""
+
+    entity_description: OccupancyForecastSensorEntityDescription
+
+    def __init__(
+            self,
+            config_entry: config_entries.ConfigEntry,
+            forecast: TransitionForecast,
+            history: TransitionHistory,
+            person: str,
+            description: OccupancyForecastSensorEntityDescription,
+    ) -> None:
+        self.entity_description = description
+        self._forecast = forecast
+        self._history = history
+        self._person = person
+        self._attr_name = f"{person} {description.name}"
+        self._attr_unique_id = f"{config_entry.entry_id}_{person}_{description.key}"
+
+    @property
+    def native_value(self) -> datetime | None:
+        """Return the expected time, or None if it does not apply now or cannot be estimated yet."""
+        arrived = self.entity_description.arrived
+        if self._history.is_home(self._person) == arrived:
+            return None
+        now = dt_util.now()
+        day_start = dt_util.start_of_local_day(now).timestamp()
+        seconds = now.timestamp() - day_start
+        offset = self._forecast.next_transition(
+            self._person, arrived, now.date().toordinal(), seconds
+        )
+        if offset is None:
+            return None
+        return dt_util.utc_from_timestamp(
+            day_start + (seconds // BUCKET_SECONDS + offset) * BUCKET_SECONDS
+        )
+
+
+class OccupancyProbabilitySensor(SensorEntity):
+    """Sensor exposing the probability that anyone is home, and that of each person.
+
+    Rather than polled, it is written along with the occupancy binary_sensor,
+    which writes whenever the model version changes.
+    """
+
+    _attr_should_poll = False
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_suggested_display_precision = 0
+
+    def __init__(self, config_entry: config_entries.ConfigEntry, config: Mapping) -> None:
+        # The occupancy model is looked up on every read, as the binary_sensor
+        # may not be set up yet and rebuilds it when the trackers change.
+        self._config = config
+        self._entry_id = config_entry.entry_id
+        self._attr_name = f"{config_entry.title} Probability"
+        self._attr_unique_id = f"{config_entry.entry_id}_probability"
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the state writes of the occupancy binary_sensor of this entry."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_OCCUPANCY_WRITTEN.format(self._entry_id),
+                self.async_write_ha_state,
+            )
+        )
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the probability that anyone is home, in percent."""
+        if (entity := self._config.get(DATA_ENTITY)) is None:
+            return None
+        return round(entity.core.engine.household_confidence * 100, 1)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, float] | None:
+        """Return the probability that each person is home, in percent."""
+        if (entity := self._config.get(DATA_ENTITY)) is None:
+            return None
+        engine = entity.core.engine
+        return {
+            name: round(engine.confidence(person) * 100, 1)
+            for person, name in enumerate(engine.names)
+        }
@@ -0,0 +1,121 @@
+"""Runtime counters for the Home Occupancy hot path."""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from typing import Any
+
+# Upper bounds of the latency buckets in nanoseconds; the last bucket is open.
+LATENCY_BUCKETS_NS = (
+    5_000,
+    10_000,
+    25_000,
+    50_000,
+    100_000,
+    250_000,
+    500_000,
+    1_000_000,
+    5_000_000,
+    25_000_000,
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram.
+
+    The buckets are allocated up front and recording is a bisect plus an
+    in-place increment, so it is cheap enough to leave enabled.
+    """
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self) -> None:
+        self.counts = array("Q", bytes(8 * (len(LATENCY_BUCKETS_NS) + 1)))
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, duration_ns: int) -> None:
+        """Record one duration."""
+        self.counts[bisect_left(LATENCY_BUCKETS_NS, duration_ns)] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the upper bound (in microseconds) of the bucket holding the percentile."""
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                if bucket < len(LATENCY_BUCKETS_NS):
+                    return LATENCY_BUCKETS_NS[bucket] / 1000
+                break
+        return self.max_ns / 1000
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram as a dict, latencies in microseconds."""
+        return {
+            "count": self.count,
+            "mean_us": self.total_ns / self.count / 1000 if self.count else None,
+            "max_us": self.max_ns / 1000,
+            "p50_us": self.percentile(50),
+            "p99_us": self.percentile(99),
+            "buckets_us": {
+                f"<={bound / 1000:g}": count
+                for bound, count in zip(LATENCY_BUCKETS_NS, self.counts)
+            } | {f">{LATENCY_BUCKETS_NS[-1] / 1000:g}": self.counts[-1]},
+        }
+
+
+class OccupancyStats:
+    """Counters of one occupancy entity."""
+
+    __slots__ = (
+        "events_received",
+        "events_ignored",
+        "state_writes",
+        "writes_suppressed",
+        "reconciliation_checks",
+        "reconciliations",
+        "drains",
+        "track_home_latency",
+        "drain_latency",
+        "update_latency",
+    )
+
+    def __init__(self) -> None:
+        # Presence events handled, and those that did not change anything.
+        self.events_received = 0
+        self.events_ignored = 0
+        # State writes issued, and changes merged into a pending write.
+        self.state_writes = 0
+        self.writes_suppressed = 0
+        # Drift checks run, and those that found a missed change.
+        self.reconciliation_checks = 0
+        self.reconciliations = 0
+        # Passes over the update queue, each ending in at most one state write.
+        self.drains = 0
+        self.track_home_latency = LatencyHistogram()
+        self.drain_latency = LatencyHistogram()
+        self.update_latency = LatencyHistogram()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all counters as a dict."""
+        return {
+            "events_received": self.events_received,
+            "events_ignored": self.events_ignored,
+            "state_writes": self.state_writes,
+            "writes_suppressed": self.writes_suppressed,
+            "reconciliation_checks": self.reconciliation_checks,
+            "reconciliations": self.reconciliations,
+            "drains": self.drains,
+            "async_track_home": self.track_home_latency.as_dict(),
+            "drain": self.drain_latency.as_dict(),
+            "async_update": self.update_latency.as_dict(),
+        }
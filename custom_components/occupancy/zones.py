@@ -0,0 +1,101 @@
+"""Zone catalogue shared by all Home Occupancy entities."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import TrackStates, async_track_state_change_filtered
+
+from .const import DATA_ZONES, DOMAIN, HOME_STATES, ZONE_DOMAIN, ZONE_HOME
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_get_zone_catalogue(hass: HomeAssistant) -> ZoneCatalogue:
+    """Return the zone catalogue, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (catalogue := domain_data.get(DATA_ZONES)) is None:
+        catalogue = domain_data[DATA_ZONES] = ZoneCatalogue(hass)
+    return catalogue
+
+
+class ZoneCatalogue:
+    """Keep the names of all zones, which are away states for trackers.
+
+    A person or device_tracker in a zone reports the zone's name as its state.
+    The catalogue only reads the ``zone`` domain and is then kept up to date
+    from zone state changes, so zones added, removed or renamed later are
+    picked up without rescanning the state machine.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.away_states: frozenset[str] = frozenset()
+        self._zones: dict[str, str] = {}
+        self._listeners: list[Callable[[], None]] = []
+        self._tracker = None
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Listen for changes to the away states. Return a function to stop listening.
+
+        The catalogue only follows zone changes while it has listeners.
+        """
+        if not self._listeners:
+            self._async_start()
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+            if not self._listeners:
+                self._async_stop()
+
+        return remove_listener
+
+    @callback
+    def _async_start(self) -> None:
+        self._zones = {
+            state.entity_id: state.name
+            for state in self.hass.states.async_all(ZONE_DOMAIN)
+            if state.entity_id != ZONE_HOME
+        }
+        self._async_update_away_states()
+        self._tracker = async_track_state_change_filtered(
+            self.hass, TrackStates(False, set(), {ZONE_DOMAIN}), self._async_zone_changed
+        )
+
+    @callback
+    def _async_stop(self) -> None:
+        if self._tracker is not None:
+            self._tracker.async_remove()
+            self._tracker = None
+
+    @callback
+    def _async_zone_changed(self, event: Event) -> None:
+        """Handle a zone being added, removed or renamed."""
+        entity_id = event.data["entity_id"]
+        if entity_id == ZONE_HOME:
+            return
+        new_state = event.data["new_state"]
+        name = new_state.name if new_state is not None else None
+        # Zone states change whenever someone enters or leaves; only names matter.
+        if self._zones.get(entity_id) == name:
+            return
+
+        if name is None:
+            self._zones.pop(entity_id, None)
+        else:
+            self._zones[entity_id] = name
+        _LOGGER.debug("Zone %s is now %s", entity_id, name)
+        self._async_update_away_states()
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    @callback
+    def _async_update_away_states(self) -> None:
+        # Filter out any zone names that are considered home states
+        self.away_states = frozenset(self._zones.values()) - HOME_STATES
@@ -0,0 +1 @@
+"""Tests for the Home Occupancy integration."""
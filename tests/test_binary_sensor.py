@@ -0,0 +1,162 @@
+"""Tests for the occupancy binary_sensor in Home Assistant."""
+
+import asyncio
+
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from custom_components.occupancy.const import DATA_ENTITY, DOMAIN
+from custom_components.occupancy.diagnostics import async_get_config_entry_diagnostics
+from custom_components.occupancy.dispatcher import async_get_dispatcher
+
+ALICE = {"name": "Alice", "trackers": ["person.alice"], "fusion_policy": "any", "guest": False}
+
+
+def make_entry(hass, data=None, options=None, title="Home Occupancy"):
+    entry = MockConfigEntry(
+        domain=DOMAIN, title=title, version=3, data=data or {"sensor_1": ALICE}, options=options or {}
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+async def setup_entries(hass, *entries):
+    """Set up the integration, with all its entries. Return the entity_id of each entry's sensor."""
+    assert await hass.config_entries.async_setup(entries[0].entry_id)
+    await hass.async_block_till_done()
+    return [hass.data[DOMAIN][entry.entry_id][DATA_ENTITY].entity_id for entry in entries]
+
+
+async def drain(hass):
+    """Let the entities apply their queued changes, which they do in the next pass of the loop."""
+    await asyncio.sleep(0)
+    await hass.async_block_till_done()
+
+
+async def test_entries_get_their_own_sensor_and_share_subscriptions(hass):
+    hass.states.async_set("person.alice", "not_home")
+    first = make_entry(hass)
+    second = make_entry(
+        hass,
+        {"sensor_1": ALICE, "sensor_2": {**ALICE, "name": "Bob", "trackers": ["person.bob"]}},
+        title="Family",
+    )
+    first_id, second_id = await setup_entries(hass, first, second)
+    assert first_id != second_id
+
+    registry = er.async_get(hass)
+    assert registry.async_get(first_id).unique_id == f"{first.entry_id}_home_occupancy"
+    assert registry.async_get(second_id).unique_id == f"{second.entry_id}_home_occupancy"
+
+    # One subscription per tracker, fanned out to both entities.
+    dispatcher = async_get_dispatcher(hass)
+    assert sorted(dispatcher.tracked_entity_ids) == ["person.alice", "person.bob"]
+    assert len(dispatcher._listeners["person.alice"]) == 2
+
+    hass.states.async_set("person.alice", "home")
+    await drain(hass)
+    assert hass.states.get(first_id).state == STATE_ON
+    assert hass.states.get(second_id).state == STATE_ON
+
+
+async def test_legacy_unique_id_is_migrated(hass):
+    registry = er.async_get(hass)
+    legacy = registry.async_get_or_create(
+        "binary_sensor",
+        DOMAIN,
+        "combined_home_occupancy",
+        suggested_object_id="home_occupancy_home_occupancy",
+    )
+    entry = make_entry(hass)
+    (entity_id,) = await setup_entries(hass, entry)
+    assert entity_id == legacy.entity_id == "binary_sensor.home_occupancy_home_occupancy"
+    assert registry.async_get(entity_id).unique_id == f"{entry.entry_id}_home_occupancy"
+    assert registry.async_get(entity_id).config_entry_id == entry.entry_id
+    assert hass.states.get(entity_id).state == STATE_OFF
+
+
+async def test_stale_tracker_comes_back_when_it_reports(hass, freezer):
+    phone = "device_tracker.alice_phone"
+    hass.states.async_set(phone, "home")
+    entry = make_entry(
+        hass,
+        {"sensor_1": {**ALICE, "trackers": [phone]}},
+        {"stale_timeouts": {"device_tracker": 1}},
+    )
+    (entity_id,) = await setup_entries(hass, entry)
+    assert hass.states.get(entity_id).state == STATE_ON
+
+    freezer.tick(120)
+    async_fire_time_changed(hass)
+    await drain(hass)
+    assert hass.states.get(entity_id).attributes["stale_trackers"] == (phone,)
+    assert hass.states.get(entity_id).state == STATE_OFF
+
+    # The same state again is only reported, not changed.
+    hass.states.async_set(phone, "home")
+    await drain(hass)
+    assert hass.states.get(entity_id).state == STATE_ON
+
+
+async def test_probability_sensor_follows_the_sensor_of_its_entry(hass):
+    hass.states.async_set("person.alice", "not_home")
+    hass.states.async_set("person.bob", "not_home")
+    first = make_entry(hass, options={"probability_sensor": True})
+    second = make_entry(
+        hass,
+        {"sensor_1": {**ALICE, "name": "Bob", "trackers": ["person.bob"]}},
+        {"probability_sensor": True},
+        title="Family",
+    )
+    await setup_entries(hass, first, second)
+    assert hass.states.get("sensor.home_occupancy_probability").state == "10.0"
+    assert hass.states.get("sensor.family_probability").state == "10.0"
+
+    hass.states.async_set("person.bob", "home")
+    await drain(hass)
+    assert hass.states.get("sensor.home_occupancy_probability").state == "10.0"
+    assert hass.states.get("sensor.family_probability").state == "90.0"
+
+
+async def test_resync_keeps_queued_zone_changes(hass):
+    hass.states.async_set("person.alice", "Gym")
+    hass.states.async_set("device_tracker.alice_phone", "home")
+    entry = make_entry(
+        hass,
+        {
+            "sensor_1": {
+                **ALICE,
+                "trackers": ["person.alice", "device_tracker.alice_phone"],
+                "fusion_policy": "priority",
+            },
+        },
+    )
+    (entity_id,) = await setup_entries(hass, entry)
+    entity = hass.data[DOMAIN][entry.entry_id][DATA_ENTITY]
+    # Gym is not a zone, so the phone decides.
+    assert hass.states.get(entity_id).state == STATE_ON
+
+    # A new zone and a resync in the same pass of the loop.
+    hass.states.async_set("zone.gym", "0", {"friendly_name": "Gym"})
+    await asyncio.sleep(0)
+    assert entity._queue
+    await entity.async_update()
+    await drain(hass)
+    assert entity.core.zones == frozenset({"Gym"})
+    assert hass.states.get(entity_id).state == STATE_OFF
+
+
+async def test_diagnostics(hass):
+    hass.states.async_set("person.alice", "home")
+    entry = make_entry(
+        hass, {"sensor_1": {**ALICE, "trackers": ["person.alice", "person.bob"], "leave_delay": 60}}
+    )
+    await setup_entries(hass, entry)
+    hass.states.async_set("person.alice", "not_home")
+    await drain(hass)
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["entity"]["state"] is True
+    assert diagnostics["entity"]["people_home"] == 1
+    assert diagnostics["entity"]["pending_transitions"] == 1
+    assert diagnostics["entity"]["queued_changes"] == 0
@@ -0,0 +1,40 @@
+"""Tests for the config and options flows."""
+
+from homeassistant import config_entries
+from homeassistant.data_entry_flow import FlowResultType
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.occupancy.const import DOMAIN
+
+# A group whose member is not a valid entity_id, which the selectors cannot catch.
+BAD_GROUP = "group.family"
+
+
+async def test_bulk_import_rejects_invalid_group_members(hass):
+    hass.states.async_set(BAD_GROUP, "home", {"entity_id": ["person.Not Valid"]})
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"next_step_id": "bulk_import"}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"groups": [BAD_GROUP]}
+    )
+    assert result["type"] == FlowResultType.FORM
+    assert result["errors"] == {"base": "invalid_entity_id"}
+
+
+async def test_options_bulk_import_rejects_invalid_group_members(hass):
+    hass.states.async_set(BAD_GROUP, "home", {"entity_id": ["person.Not Valid"]})
+    entry = MockConfigEntry(domain=DOMAIN, version=3, data={})
+    entry.add_to_hass(hass)
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"reconfig_option": "bulk_import"}
+    )
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"groups": [BAD_GROUP]}
+    )
+    assert result["type"] == FlowResultType.FORM
+    assert result["errors"] == {"base": "invalid_entity_id"}
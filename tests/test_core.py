@@ -0,0 +1,139 @@
+"""Tests for the Home Assistant independent occupancy model."""
+
+from custom_components.occupancy.core import OccupancyCore
+
+CONFIG = {
+    "sensor_1": {
+        "name": "Alice",
+        "trackers": ["person.alice", "device_tracker.alice_phone"],
+        "fusion_policy": "any",
+        "arrive_delay": 0,
+        "leave_delay": 300,
+    },
+    "sensor_2": {"name": "Bob", "trackers": ["person.bob"], "arrive_delay": 60},
+    "stale_timeouts": {"device_tracker": 30},
+}
+
+
+def make_core(track_delta=False):
+    return OccupancyCore.from_config(CONFIG, track_delta)
+
+
+def test_grace_delays_are_left_to_the_caller():
+    core = make_core()
+    person = core.feed("person.bob", "home")
+    assert person == 1
+    assert core.delay(person) == 60
+    assert not core.anyone_home
+    assert core.commit(person)
+    assert core.who_is_home == ("Bob",)
+    assert core.last_to_arrive == "Bob"
+
+    person = core.feed("person.bob", "not_home")
+    assert core.delay(person) == 0
+    # A flap back within the grace period leaves nothing to commit.
+    assert core.feed("person.bob", "home") == person
+    assert core.delay(person) is None
+    assert not core.commit(person)
+
+
+def test_feed_ignores_non_transitions():
+    core = make_core()
+    core.commit(core.feed("person.alice", "home"))
+    version = core.version
+    assert core.feed("person.alice", "home") is None
+    assert core.feed("device_tracker.alice_phone", "home") is None
+    assert core.feed("person.alice", "not_home") is None
+    assert core.anyone_home
+    assert core.version != version
+
+
+def test_version_changes_with_what_is_reported():
+    core = make_core()
+    version = core.version
+    # A transition still to be committed changes nothing that is reported.
+    core.feed("person.alice", "home")
+    assert core.version == version
+    core.commit(0)
+    assert core.version > version
+    version = core.version
+    core.feed("person.alice", "home")
+    assert core.version == version
+
+
+def test_resync_commits_without_grace_periods():
+    core = make_core(track_delta=True)
+    people = core.resync([("person.alice", "home"), ("person.bob", "home")])
+    assert people == [0, 1]
+    assert core.who_is_home == ("Alice", "Bob")
+    assert core.take_delta() == (["Alice", "Bob"], [])
+    assert core.take_delta() == ([], [])
+
+
+def test_stale_trackers():
+    core = make_core()
+    assert core.stale_after("device_tracker.alice_phone") == 30 * 60
+    assert core.stale_after("person.alice") is None
+    core.commit(core.feed("device_tracker.alice_phone", "home"))
+    assert core.stale_trackers == ()
+    person = core.set_stale("device_tracker.alice_phone", True)
+    assert person == 0
+    assert core.stale_trackers == ("device_tracker.alice_phone",)
+    assert core.set_stale("device_tracker.alice_phone", True) is None
+    core.commit(person)
+    assert not core.anyone_home
+    assert core.set_stale("device_tracker.alice_phone", False) == 0
+
+
+def test_zones_count_as_away_and_reclassify():
+    core = OccupancyCore.from_config(
+        {
+            "sensor_1": {
+                "name": "Alice",
+                "trackers": ["person.alice", "device_tracker.alice_phone"],
+                "fusion_policy": "priority",
+            },
+        }
+    )
+    core.commit(core.feed("device_tracker.alice_phone", "home"))
+    assert core.feed("person.alice", "Gym") is None
+    # Gym is not known as a zone yet, so the phone decides.
+    assert core.anyone_home
+    assert core.set_zones(["Work"]) == []
+    assert core.set_zones(["Work", "Gym"]) == [0]
+    core.commit(0)
+    assert not core.anyone_home
+    assert core.set_zones(["Work"]) == [0]
+
+
+def test_restore_keeps_arrival_order_and_skips_unchanged_trackers():
+    core = make_core()
+    core.commit(core.feed("person.bob", "home"))
+    core.commit(core.feed("person.alice", "home"))
+    core.set_zones(["Work"])
+    data = core.as_dict()
+
+    restored = make_core(track_delta=True)
+    restored.restore(data)
+    assert restored.who_is_home == ("Bob", "Alice")
+    assert restored.last_to_arrive == "Alice"
+    assert restored.zones == frozenset({"Work"})
+    # Only trackers that changed since are applied.
+    assert restored.resync(
+        [("person.alice", "home"), ("person.bob", "not_home"), ("device_tracker.alice_phone", None)]
+    ) == [1]
+    assert restored.who_is_home == ("Alice",)
+
+
+def test_household_state_is_weighted_only_when_configured():
+    people = {"sensor_1": {"name": "Alice", "trackers": ["person.alice"]}}
+    assert not OccupancyCore.from_config(people).index.weighted
+    assert OccupancyCore.from_config(
+        {**people, "tracker_reliability": {"person.alice": 0.6}}
+    ).index.weighted
+    core = OccupancyCore.from_config(
+        {"sensor_1": {**people["sensor_1"], "fusion_policy": "weighted"}}
+    )
+    assert core.index.weighted
+    core.commit(core.feed("person.alice", "home"))
+    assert core.occupied == (core.confidence >= core.index.confidence_on)
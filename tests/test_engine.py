@@ -0,0 +1,198 @@
+"""Tests for the incremental occupancy engine."""
+
+import math
+
+import pytest
+
+from custom_components.occupancy.const import (
+    POLICY_ALL,
+    POLICY_ANY,
+    POLICY_MAJORITY,
+    POLICY_PRIORITY,
+    POLICY_WEIGHTED,
+    PRESENCE_AWAY,
+    PRESENCE_HOME,
+    PRESENCE_UNAVAILABLE,
+    PRESENCE_UNKNOWN,
+)
+from custom_components.occupancy.engine import (
+    OccupancyEngine,
+    StateClassifier,
+    logit,
+    parse_count,
+    tracker_weight,
+)
+from custom_components.occupancy.index import Person
+
+TRACKERS = ("person.alice", "device_tracker.alice_phone", "binary_sensor.alice_ble")
+
+
+def make_engine(policy, reliability=(), guest=False):
+    return OccupancyEngine(
+        [Person("Alice", TRACKERS, policy, guest, reliability=reliability)]
+    )
+
+
+def apply(engine, *presences):
+    """Apply one presence per tracker, then commit."""
+    for entity_id, presence in zip(TRACKERS, presences):
+        engine.update(entity_id, presence)
+    engine.commit(0)
+    return engine.is_home(0)
+
+
+@pytest.mark.parametrize(
+    ("policy", "presences", "expected"),
+    [
+        (POLICY_ANY, (PRESENCE_AWAY, PRESENCE_AWAY, PRESENCE_HOME), True),
+        (POLICY_ANY, (PRESENCE_AWAY, PRESENCE_AWAY, PRESENCE_UNKNOWN), False),
+        (POLICY_ALL, (PRESENCE_HOME, PRESENCE_HOME, PRESENCE_AWAY), False),
+        (POLICY_ALL, (PRESENCE_HOME, PRESENCE_HOME, PRESENCE_HOME), True),
+        (POLICY_MAJORITY, (PRESENCE_HOME, PRESENCE_HOME, PRESENCE_AWAY), True),
+        (POLICY_MAJORITY, (PRESENCE_HOME, PRESENCE_UNKNOWN, PRESENCE_AWAY), False),
+        (POLICY_PRIORITY, (PRESENCE_AWAY, PRESENCE_HOME, PRESENCE_HOME), False),
+        (POLICY_PRIORITY, (PRESENCE_UNKNOWN, PRESENCE_HOME, PRESENCE_AWAY), True),
+    ],
+)
+def test_fusion_policies(policy, presences, expected):
+    assert apply(make_engine(policy), *presences) is expected
+
+
+def test_update_returns_person_only_when_fused_state_changes():
+    engine = make_engine(POLICY_ANY)
+    assert engine.update(TRACKERS[0], PRESENCE_HOME) == 0
+    assert engine.update(TRACKERS[1], PRESENCE_HOME) is None
+    assert engine.update("person.bob", PRESENCE_HOME) is None
+    assert engine.is_fused_home(0)
+    assert not engine.is_home(0)
+
+
+def test_commit_orders_who_is_home_by_arrival():
+    engine = OccupancyEngine(
+        [
+            Person("Alice", ("person.alice",), POLICY_ANY, False),
+            Person("Bob", ("person.bob",), POLICY_ANY, False),
+        ]
+    )
+    engine.update("person.bob", PRESENCE_HOME)
+    engine.update("person.alice", PRESENCE_HOME)
+    assert engine.commit(1)
+    assert engine.commit(0)
+    assert not engine.commit(0)
+    assert engine.who_is_home == ("Bob", "Alice")
+    assert engine.home_count == 2
+
+    engine.update("person.bob", PRESENCE_AWAY)
+    engine.commit(1)
+    assert engine.who_is_home == ("Alice",)
+    assert engine.anyone_home
+
+
+def test_guest_counts():
+    engine = OccupancyEngine(
+        [Person("Guests", ("input_number.guests", "binary_sensor.guest"), POLICY_ANY, True)]
+    )
+    assert engine.has_guests
+    engine.update_count("input_number.guests", 3)
+    engine.commit(0)
+    assert engine.guest_count == 3
+    assert engine.who_is_home == ()
+    engine.update_count("input_number.guests", 0)
+    engine.update("binary_sensor.guest", PRESENCE_HOME)
+    # Home without a count counts as one guest.
+    assert engine.guest_count == 1
+    engine.update("binary_sensor.guest", PRESENCE_AWAY)
+    engine.commit(0)
+    assert engine.guest_count == 0
+
+
+def test_stale_trackers_are_left_out_of_fusion():
+    engine = make_engine(POLICY_ALL)
+    assert apply(engine, PRESENCE_HOME, PRESENCE_HOME, PRESENCE_AWAY) is False
+    assert engine.set_live(TRACKERS[2], False) == 0
+    engine.commit(0)
+    assert engine.is_home(0)
+    assert engine.set_live(TRACKERS[2], True) == 0
+
+
+def test_stale_trackers_add_no_evidence():
+    engine = make_engine(POLICY_WEIGHTED)
+    engine.update(TRACKERS[0], PRESENCE_HOME)
+    engine.set_live(TRACKERS[0], False)
+    assert engine.confidence(0) == 0.5
+    engine.set_live(TRACKERS[0], True)
+    assert engine.confidence(0) == pytest.approx(0.9)
+
+
+def test_log_odds_add_up_per_tracker():
+    engine = make_engine(POLICY_WEIGHTED, reliability=(0.9, 0.8, 0.7))
+    assert engine.confidence(0) == 0.5
+    engine.update(TRACKERS[0], PRESENCE_HOME)
+    assert engine.confidence(0) == pytest.approx(0.9)
+    engine.update(TRACKERS[1], PRESENCE_AWAY)
+    expected = logit(0.9) - logit(0.8)
+    assert engine.confidence(0) == pytest.approx(1 / (1 + math.exp(-expected)))
+    engine.update(TRACKERS[1], PRESENCE_UNKNOWN)
+    assert engine.confidence(0) == pytest.approx(0.9)
+
+
+def test_weighted_policy_hysteresis():
+    engine = make_engine(POLICY_WEIGHTED, reliability=(0.9, 0.6, 0.7))
+    # 0.7 exactly reaches the arrival confidence.
+    assert engine.update(TRACKERS[2], PRESENCE_HOME) == 0
+    engine.commit(0)
+    assert engine.is_home(0)
+    # Between the thresholds, the person stays home.
+    assert engine.update(TRACKERS[1], PRESENCE_AWAY) is None
+    assert 0.3 < engine.confidence(0) < 0.7
+    assert engine.update(TRACKERS[0], PRESENCE_AWAY) == 0
+    engine.commit(0)
+    assert not engine.is_home(0)
+    # And away on the way back up.
+    assert engine.update(TRACKERS[0], PRESENCE_UNKNOWN) is None
+    assert not engine.is_fused_home(0)
+
+
+def test_tracker_weight_is_clamped():
+    assert tracker_weight(0.3) == tracker_weight(0.5) == 0
+    assert tracker_weight(1.0) == pytest.approx(logit(0.999))
+
+
+def test_classifier_and_counts():
+    classifier = StateClassifier({"home"}, {"not_home", "Work"})
+    assert classifier.classify("home") == PRESENCE_HOME
+    assert classifier.classify("Work") == PRESENCE_AWAY
+    assert classifier.classify("unknown") == PRESENCE_UNKNOWN
+    assert classifier.classify(None) == PRESENCE_UNAVAILABLE
+    assert parse_count("2.0") == 2
+    assert parse_count("-1") == 0
+    assert parse_count("unknown") is None
+
+
+def test_household_is_anyone_home_without_weights():
+    for order in (TRACKERS[1:], TRACKERS[:0:-1]):
+        engine = make_engine(POLICY_ANY)
+        presences = {TRACKERS[1]: PRESENCE_HOME, TRACKERS[2]: PRESENCE_AWAY}
+        for entity_id in order:
+            engine.update(entity_id, presences[entity_id])
+        engine.commit(0)
+        assert engine.who_is_home == ("Alice",)
+        assert engine.household_confidence < 0.7
+        assert engine.occupied
+
+    engine = make_engine(POLICY_PRIORITY)
+    assert apply(engine, PRESENCE_HOME, PRESENCE_AWAY)
+    assert engine.occupied
+
+
+def test_weighted_household_follows_the_confidence():
+    engine = OccupancyEngine(
+        [Person("Alice", TRACKERS, POLICY_ANY, False)], confidence_on=0.8, confidence_off=0.3, weighted=True
+    )
+    assert engine.household_confidence == 0.0
+    assert not engine.occupied
+    assert apply(engine, PRESENCE_AWAY, PRESENCE_HOME, PRESENCE_AWAY)
+    assert engine.household_confidence < 0.8
+    assert not engine.occupied
+    assert apply(engine, PRESENCE_HOME, PRESENCE_HOME, PRESENCE_AWAY)
+    assert engine.occupied
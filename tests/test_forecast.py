@@ -0,0 +1,124 @@
+"""Tests for the weekly arrive/leave forecast."""
+
+from datetime import date
+import json
+
+import pytest
+
+from custom_components.occupancy.forecast import (
+    ARRIVALS,
+    BUCKET_SECONDS,
+    DAYS_PER_WEEK,
+    DEPARTURES,
+    MAX_WEEKS,
+    TransitionForecast,
+    week_slot,
+)
+
+MONDAY = date(2024, 1, 1).toordinal()
+
+
+def hours(value):
+    return value * 3600
+
+
+def test_week_slot():
+    assert week_slot(MONDAY, 0) == 0
+    assert week_slot(MONDAY + 1, hours(1)) == 96 + 4
+    # Past midnight (a DST day) stays in the last slot.
+    assert week_slot(MONDAY, hours(25)) == 95
+
+
+def test_estimate_is_the_median_time_until_the_next_transition():
+    forecast = TransitionForecast()
+    forecast.start(0, MONDAY)
+    for day in range(MONDAY, MONDAY + 7):
+        forecast.record("Alice", True, day, hours(17.5))
+    sunday = MONDAY + 6
+    # At noon, the arrival at 17:30 is 22 buckets after the current one starts.
+    assert forecast.next_transition("Alice", ARRIVALS, sunday, hours(12)) == 22
+    assert forecast.next_transition("Alice", ARRIVALS, sunday, hours(12.2)) == 22
+    # Right after it, the next one is a day later.
+    assert forecast.next_transition("Alice", ARRIVALS, sunday, hours(17.75)) == 95
+    assert forecast.next_transition("Alice", DEPARTURES, sunday, hours(12)) is None
+    assert forecast.next_transition("Bob", ARRIVALS, sunday, hours(12)) is None
+    # Another Monday without an arrival halves the rate of Mondays, below
+    # even odds, so the Tuesday arrival is the median one.
+    assert forecast.next_transition("Alice", ARRIVALS, MONDAY + 7, hours(12)) == 22 + 96
+
+
+def test_days_without_transitions_count():
+    forecast = TransitionForecast()
+    forecast.start(0, MONDAY)
+    forecast.record("Alice", True, MONDAY, hours(8))
+    # Once a week is too rare for the median to fall within the day.
+    forecast.next_transition("Alice", ARRIVALS, MONDAY + 13, 0)
+    assert list(forecast._days) == [2] * DAYS_PER_WEEK
+    offset = forecast.next_transition("Alice", ARRIVALS, MONDAY + 14, 0)
+    assert offset is None or offset > 96 * 7
+
+
+def test_halving_after_max_weeks():
+    forecast = TransitionForecast()
+    forecast.start(0, MONDAY)
+    for week in range(MAX_WEEKS):
+        forecast.record("Alice", True, MONDAY + week * DAYS_PER_WEEK, hours(8))
+    slot = week_slot(MONDAY, hours(8))
+    assert forecast._counts[ARRIVALS][slot] == MAX_WEEKS
+    assert forecast._days[0] == MAX_WEEKS
+
+    forecast.record("Alice", True, MONDAY + MAX_WEEKS * DAYS_PER_WEEK, hours(8))
+    assert forecast._days[0] == (MAX_WEEKS + 1) / 2
+    assert forecast._counts[ARRIVALS][slot] == MAX_WEEKS / 2 + 1
+    # Every day of the week has passed as often, and is halved as well.
+    assert max(forecast._days) <= MAX_WEEKS
+
+
+def test_restore_round_trip():
+    forecast = TransitionForecast()
+    forecast.start(123.0, MONDAY)
+    forecast.bootstrapped = True
+    for day in range(MONDAY, MONDAY + 10):
+        forecast.record("Alice", day % 2 == 0, day, hours(9))
+        forecast.record("Bob", True, day, hours(18))
+    data = json.loads(json.dumps(forecast.as_dict()))
+
+    restored = TransitionForecast()
+    restored.restore(data)
+    assert restored.started == 123.0
+    assert restored.bootstrapped
+    for name in ("Alice", "Bob"):
+        for arrived in (ARRIVALS, DEPARTURES):
+            for seconds in range(0, hours(24), BUCKET_SECONDS * 5):
+                assert restored.next_transition(
+                    name, arrived, MONDAY + 10, seconds
+                ) == forecast.next_transition(name, arrived, MONDAY + 10, seconds)
+
+    with pytest.raises(ValueError):
+        restored.restore({**data, "days": [1]})
+
+
+def test_merge_halves_like_record():
+    forecast = TransitionForecast()
+    forecast.start(0, MONDAY + 8 * DAYS_PER_WEEK)
+    seed = TransitionForecast()
+    seed.count_days(MONDAY, MONDAY + 8 * DAYS_PER_WEEK - 1)
+    for week in range(8):
+        seed.record("Alice", True, MONDAY + week * DAYS_PER_WEEK, hours(8))
+    for week in range(1, 6):
+        forecast.record("Alice", True, MONDAY + (8 + week) * DAYS_PER_WEEK, hours(8))
+    forecast.merge(seed)
+    # 14 Mondays passed, more than MAX_WEEKS, so they were halved once.
+    assert forecast._days[0] == 7
+    assert forecast._counts[ARRIVALS][week_slot(MONDAY, hours(8))] == (8 + 5) / 2
+    assert max(forecast._days) <= MAX_WEEKS
+
+
+def test_clear():
+    forecast = TransitionForecast()
+    forecast.start(1.0, MONDAY)
+    forecast.record("Alice", True, MONDAY, hours(8))
+    forecast.clear()
+    assert len(forecast) == 0
+    assert forecast.started is None
+    assert forecast.as_dict() == TransitionForecast().as_dict()
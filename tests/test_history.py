@@ -0,0 +1,76 @@
+"""Tests for the arrive/leave ring buffer and its statistics."""
+
+import json
+
+from custom_components.occupancy.history import TransitionHistory
+
+DAY = 739_000
+DAY_START = 1_700_000_000.0
+
+
+def test_ring_buffer_wraps_keeping_the_newest():
+    history = TransitionHistory(3)
+    for minute in range(5):
+        history.record(DAY_START + minute * 60, "Alice", minute % 2 == 0, DAY, DAY_START)
+    assert len(history) == 3
+    assert list(history.transitions()) == [
+        (DAY_START + 240, "Alice", True),
+        (DAY_START + 180, "Alice", False),
+        (DAY_START + 120, "Alice", True),
+    ]
+    assert list(history.transitions(1)) == [(DAY_START + 240, "Alice", True)]
+
+
+def test_dwell_time_and_counts():
+    history = TransitionHistory(10)
+    history.record(DAY_START + 3600, "Alice", True, DAY, DAY_START)
+    history.record(DAY_START + 7200, "Alice", False, DAY, DAY_START)
+    history.record(DAY_START + 9000, "Alice", True, DAY, DAY_START)
+    summary = history.summary("Alice", DAY_START + 9600, DAY, DAY_START)
+    assert summary["home"]
+    assert summary["home_since"] == DAY_START + 9000
+    assert summary["dwell_today"] == 3600 + 600
+    assert summary["arrivals_today"] == 2
+    assert summary["departures_today"] == 1
+    assert summary["transitions_week"] == 3
+    assert history.is_home("Alice")
+    assert not history.is_home("Bob")
+
+    # A new day starts from zero, counting the time home since midnight.
+    tomorrow = DAY_START + 86_400
+    summary = history.summary("Alice", tomorrow + 60, DAY + 1, tomorrow)
+    assert summary["dwell_today"] == 60
+    assert summary["arrivals_today"] == 0
+    assert summary["transitions_week"] == 3
+    # A week later, the transitions of that weekday no longer count.
+    later = DAY_START + 7 * 86_400
+    assert history.summary("Alice", later, DAY + 7, later)["transitions_week"] == 0
+
+
+def test_restore_round_trip_into_a_smaller_buffer():
+    history = TransitionHistory(5)
+    for minute in range(5):
+        history.record(DAY_START + minute * 60, "Alice" if minute % 2 else "Bob", True, DAY, DAY_START)
+    data = json.loads(json.dumps(history.as_dict()))
+
+    restored = TransitionHistory(5)
+    restored.restore(data)
+    assert list(restored.transitions()) == list(history.transitions())
+    assert restored.summary("Bob", DAY_START, DAY, DAY_START) == history.summary(
+        "Bob", DAY_START, DAY, DAY_START
+    )
+
+    smaller = TransitionHistory(2)
+    smaller.restore(data)
+    assert list(smaller.transitions()) == list(history.transitions(2))
+    smaller.record(DAY_START + 600, "Alice", False, DAY, DAY_START)
+    assert [name for _, name, _ in smaller.transitions()] == ["Alice", "Bob"]
+
+
+def test_clear_keeps_the_capacity():
+    history = TransitionHistory(4)
+    history.record(DAY_START, "Alice", True, DAY, DAY_START)
+    history.clear()
+    assert len(history) == 0
+    assert history.capacity == 4
+    assert history.as_dict() == TransitionHistory(4).as_dict()
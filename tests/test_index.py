@@ -0,0 +1,82 @@
+"""Tests for the tracker index and the config entry migrations."""
+
+from custom_components.occupancy.const import (
+    DEFAULT_RELIABILITY,
+    POLICY_ANY,
+    POLICY_PRIORITY,
+)
+from custom_components.occupancy.index import (
+    PresenceIndex,
+    default_reliability,
+    migrate_people_v1,
+    migrate_people_v2,
+)
+
+V1_CONFIG = {
+    "number_of_sensors": 4,
+    "sensor_1": {"name": "Alice", "presence_sensor": "person.alice"},
+    "sensor_2": {"name": "Alice", "presence_sensor": "device_tracker.alice_phone"},
+    "sensor_3": {"name": "Guest room", "presence_sensor": "input_boolean.guest_room"},
+    "sensor_4": {"name": "Bob", "presence_sensor": "person.bob"},
+    "debounce": 2,
+}
+
+
+def test_migrate_v1_to_v3():
+    v2 = migrate_people_v1(V1_CONFIG)
+    assert v2["number_of_sensors"] == 3
+    assert v2["debounce"] == 2
+    assert v2["sensor_1"] == {
+        "name": "Alice",
+        "trackers": ["person.alice", "device_tracker.alice_phone"],
+        "fusion_policy": POLICY_ANY,
+    }
+    assert v2["sensor_3"]["trackers"] == ["person.bob"]
+
+    v3 = migrate_people_v2(v2)
+    assert v3["sensor_1"]["guest"] is False
+    assert v3["sensor_2"]["guest"] is True
+    assert v3["number_of_sensors"] == 3
+
+    index = PresenceIndex.from_config(v3)
+    assert [person.name for person in index.people] == ["Alice", "Guest room", "Bob"]
+    assert index.guest_entity_ids == {"input_boolean.guest_room"}
+
+
+def test_migration_keeps_options_without_people():
+    assert migrate_people_v2(migrate_people_v1({"debounce": 1})) == {"debounce": 1}
+
+
+def test_from_config():
+    index = PresenceIndex.from_config(
+        {
+            "sensor_1": {
+                "name": "Alice",
+                "trackers": ["person.alice", "binary_sensor.alice_ble", "person.alice"],
+                "fusion_policy": POLICY_PRIORITY,
+                "leave_delay": 120,
+            },
+            # A tracker belongs to the first person that lists it.
+            "sensor_2": {"name": "Bob", "trackers": ["person.bob", "person.alice"]},
+            "sensor_3": {"name": "Nobody", "trackers": []},
+            "sensor_4": {"name": "Guests", "trackers": ["counter.guests"], "guest": True},
+            "tracker_reliability": {"binary_sensor.alice_ble": 0.6},
+            "confidence_on": 0.8,
+            "confidence_off": 0.9,
+        }
+    )
+    alice, bob, guests = index.people
+    assert alice.entity_ids == ("person.alice", "binary_sensor.alice_ble")
+    assert alice.policy == POLICY_PRIORITY
+    assert alice.leave_delay == 120
+    assert alice.reliability == (DEFAULT_RELIABILITY["person"], 0.6)
+    # The departure confidence is capped at the arrival confidence.
+    assert alice.confidence_off == alice.confidence_on == 0.8
+    assert bob.entity_ids == ("person.bob",)
+    assert index["person.alice"].person == 0
+    assert index["counter.guests"].is_count
+    assert index.count_entity_ids == {"counter.guests"}
+    assert guests.guest
+    assert len(index) == 4
+    # Kinds without a default count as the least reliable.
+    assert default_reliability("sensor.x") == min(DEFAULT_RELIABILITY.values())
@@ -0,0 +1,127 @@
+"""Tests for the offline replay, against the live occupancy model."""
+
+import heapq
+import random
+
+import pytest
+
+from custom_components.occupancy.core import OccupancyCore
+
+pytest.importorskip("numpy")
+
+from custom_components.occupancy.replay import read_csv, replay  # noqa: E402
+
+CONFIG = {
+    "sensor_1": {
+        "name": "Alice",
+        "trackers": ["person.alice", "device_tracker.alice_phone"],
+        "fusion_policy": "any",
+        "arrive_delay": 0,
+        "leave_delay": 90.5,
+    },
+    "sensor_2": {
+        "name": "Bob",
+        "trackers": ["device_tracker.bob_phone", "binary_sensor.bob_ble", "person.bob"],
+        "fusion_policy": "majority",
+        "arrive_delay": 30.5,
+    },
+    "sensor_3": {
+        "name": "Carol",
+        "trackers": ["person.carol", "device_tracker.carol_phone"],
+        "fusion_policy": "priority",
+    },
+    "sensor_4": {
+        "name": "Dave",
+        "trackers": ["person.dave", "device_tracker.dave_phone", "binary_sensor.dave_ble"],
+        "fusion_policy": "weighted",
+        "leave_delay": 60.5,
+    },
+    "sensor_5": {
+        "name": "Erin",
+        "trackers": ["person.erin", "binary_sensor.erin_ble"],
+        "fusion_policy": "all",
+    },
+}
+STATES = ("home", "not_home", "on", "off", "Work", "unknown", None)
+
+
+def random_rows(seed, count=2000):
+    generator = random.Random(seed)
+    trackers = [
+        entity_id for person in CONFIG.values() for entity_id in person["trackers"]
+    ]
+    rows = []
+    for second in range(count):
+        rows.append((generator.choice(trackers), generator.choice(STATES), 1000.0 + second * 7))
+    return rows
+
+
+def live_transitions(rows, end):
+    """Feed the rows to OccupancyCore, committing after the grace periods as the binary_sensor does."""
+    core = OccupancyCore.from_config(CONFIG)
+    core.set_zones(["Work"])
+    pending: list[tuple[float, int]] = []
+    due: dict[int, float] = {}
+    transitions = []
+
+    def commit_until(time):
+        while pending and pending[0][0] <= time:
+            when, person = heapq.heappop(pending)
+            if due.get(person) != when:
+                continue
+            del due[person]
+            if core.commit(person):
+                transitions.append((when, core.engine.names[person], core.engine.is_home(person)))
+
+    for entity_id, state, time in rows:
+        commit_until(time)
+        if (person := core.feed(entity_id, state)) is None:
+            continue
+        due.pop(person, None)
+        if (delay := core.delay(person)) is None:
+            continue
+        due[person] = time + delay
+        heapq.heappush(pending, (time + delay, person))
+        commit_until(time)
+    commit_until(end)
+    return transitions
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_replay_agrees_with_the_live_model(seed):
+    rows = random_rows(seed)
+    end = rows[-1][2] + 1000
+    # Exports are not always in time order.
+    shuffled = rows[:]
+    random.Random(seed).shuffle(shuffled)
+    timeline = replay(CONFIG, [shuffled[:700], shuffled[700:]], zones=["Work"], end=end)
+    assert timeline.transitions() == live_transitions(rows, end)
+
+
+def test_occupied_intervals_and_who_opened_them():
+    rows = [
+        ("person.alice", "home", 100.0),
+        ("person.carol", "home", 200.0),
+        ("person.alice", "not_home", 300.0),
+        ("person.carol", "not_home", 400.0),
+        ("person.carol", "home", 1000.0),
+    ]
+    timeline = replay(CONFIG, [rows], end=2000.0)
+    assert timeline.occupied.tolist() == [[100.0, 400.0], [1000.0, 2000.0]]
+    assert timeline.opened_by == ("Alice", "Carol")
+    assert timeline.closed_by == ("Carol", None)
+    assert timeline.still_home == (False, False, True, False, False)
+
+
+def test_read_csv(tmp_path):
+    path = tmp_path / "history.csv"
+    path.write_text(
+        "entity_id,state,last_changed\n"
+        "person.alice,home,2024-01-01T10:00:00+00:00\n"
+        "person.alice,not_home,1704110400\n"
+    )
+    chunks = list(read_csv(str(path), chunk_size=1))
+    assert chunks == [
+        [("person.alice", "home", 1704103200.0)],
+        [("person.alice", "not_home", 1704110400.0)],
+    ]